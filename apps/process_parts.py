@@ -4,7 +4,7 @@ import traceback
 
 from discover_parts import discover_mosfets
 from dslib.field import DatasheetFields
-from dslib.pdf.tabular import tabula_is_running
+from dslib.pdf.tabular import tabula_available
 from dslib.store import Part, parts_db
 from main import compile_part_datasheet, get_fet_specs
 
@@ -72,8 +72,8 @@ if __name__ == '__main__':
                              '(1 = serial; >1 uses run_parallel from main.py)')
     args = parser.parse_args()
 
-    if not tabula_is_running():
-        raise RuntimeError('tabula is not running')
+    if not tabula_available():
+        raise RuntimeError('tabula is not available (no JPype/java and no tabula server running)')
 
     from wakepy import keep
 
@@ -408,8 +408,22 @@ def main():
         return
 
     updated: List[Part] = []
+    if args.jobs > 1 and not args.no_ocr:
+        # Vpl-only parts go straight to the chart extractor: fan it out over
+        # the chart pages of all their datasheets first, the per-part
+        # find_vpl below then reads the per-page cache.
+        vpl_pdfs = [p for p in (_ds_path(part) for part, miss in todo if miss == ['V_pl']) if p]
+        if len(vpl_pdfs) > 1:
+            try:
+                from dslib.viz.batch import find_in_pdfs
+                from dslib.util import num_cores
+                from dslib.workers import shared_worker_pool
+                find_in_pdfs(vpl_pdfs, pool=shared_worker_pool(min(num_cores(), args.jobs)))
+            except ImportError as e:  # pragma: no cover
+                print(f'  viz unavailable: {type(e).__name__}: {e}')
+
     if args.jobs > 1:
-        # Parallel dispatch via main.run_parallel (multiprocessing backend).
+        # Parallel dispatch on the shared warm worker pool (dslib.workers).
         from dslib.util import run_parallel
         jobs = {
             (part.mfr, part.mpn): (_process_one_part, part, miss,
@@ -420,7 +434,7 @@ def main():
         # the progress bar takes over.
         for i, (part, miss) in enumerate(todo, 1):
             print(f'[{i}/{len(todo)}] {part.mfr} {part.mpn}  missing={sorted(miss)}')
-        results = run_parallel(jobs, args.jobs, 'multiprocessing', verbose=0)
+        results = run_parallel(jobs, args.jobs, 'pool', verbose=0)
         for (mfr, mpn), result in results.items():
             if result is None:
                 continue
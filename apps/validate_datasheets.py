@@ -142,8 +142,8 @@ def main(argv: Optional[list[str]] = None) -> int:
                     help='output HTML path (default: out/validation.html)')
     ap.add_argument('-j', '--jobs', type=int, default=256,
                     help='max parallel workers (default: 256, capped by CPU count)')
-    ap.add_argument('--backend', default='multiprocessing',
-                    choices=['multiprocessing', 'threading'])
+    ap.add_argument('--backend', default='pool',
+                    choices=['pool', 'multiprocessing', 'threading'])
     ap.add_argument('--limit', type=int, default=0,
                     help='only validate the first N PDFs (0 = all, for smoke testing)')
     args = ap.parse_args(argv)
@@ -24,6 +24,8 @@ from typing import List, Optional, Tuple
 import fitz  # PyMuPDF
 import numpy as np
 
+from dslib.pdf.layout import page_spans
+
 # cv2 is imported lazily inside the functions that use it: its native bootstrap can take
 # 30+ s on a cold start (macOS Gatekeeper scanning the dylibs), which stalled every
 # importer of this module -- including `main.py -h` -- before argparse even ran.
@@ -141,16 +143,7 @@ def _parse_number(text: str) -> Optional[float]:
 
 
 def _get_spans(page) -> List[Tuple[str, Tuple[float, float, float, float]]]:
-    spans = []
-    for block in page.get_text('dict')['blocks']:
-        if 'lines' not in block:
-            continue
-        for line in block['lines']:
-            for span in line['spans']:
-                text = span['text'].strip()
-                if text:
-                    spans.append((text, tuple(span['bbox'])))
-    return spans
+    return page_spans(page)
 
 
 def _cluster_1d(items, key_idx, tol):
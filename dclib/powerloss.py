@@ -40,6 +40,10 @@ from maglib.wire import d2awg, MaterialResistivity, acr_factor_micrometals, skin
 
 Qrr_temp_rise_default = 1.2
 
+# Rds_on(Tj) = Rds_on(25°C) * (1 + RDS_ON_TEMPCO)**(Tj - 25°C), typical Si trench: 1.6-1.7x at 125°C.
+# The flat 1.22x of Rds_on(Tj=nan) corresponds to Tj ~65°C
+RDS_ON_TEMPCO = 0.005
+
 Pcl_ParallelMistmatchFactor = 0.9  # HS: one switch takes most of the dynamic load, the rest stay cooler
 
 
@@ -143,9 +147,13 @@ def mosfet_switching_trf(dc: DcDcLoadParams, mf: MosfetSpecs):
     return P_sw
 
 
-def Rds_on(mf: MosfetSpecs, Id, Tj):
-    # TODO https://application-notes.digchip.com/070/70-41484.pdf (pg5)
+def rds_on_temp_factor(Tj):
+    # https://application-notes.digchip.com/070/70-41484.pdf (pg5)
     # Rds_on(Tj) = Rds_on(Tj=25°C) * (1+alpha/100)**(Tj-25°C)
+    return (1 + RDS_ON_TEMPCO) ** (Tj - 25)
+
+
+def Rds_on(mf: MosfetSpecs, Id, Tj):
 
     # TODO Rds_on(Id) model
     # mostly constant?
@@ -157,8 +165,7 @@ def Rds_on(mf: MosfetSpecs, Id, Tj):
         return mf.Rds_on * 1.22
         # return mf.Rds_on * 1.35
 
-    assert Tj == 25
-    return mf.Rds_on
+    return mf.Rds_on * rds_on_temp_factor(Tj)
 
 
 def p_coss_eoss(dc: DcDcLoadParams, mf: MosfetSpecs) -> Tuple[float, float]:
@@ -284,7 +291,7 @@ def dcdc_buck_ls(dc: DcDcLoadParams, mf: MosfetSpecs, gd: GateDrive, Tj=math.nan
     # TODO https://application-notes.digchip.com/070/70-41484.pdf
     # TODO Qrr(didt) https://www.mouser.com/datasheet/2/268/mscos08164_1-2275581.pdf#page=7
 
-    rds = Rds_on(mf, dc.Io, Tj)  # temp rise Tj=100°C
+    rds = Rds_on(mf, dc.Io, Tj)
 
     if mf.QgdQgsRatio > 1:
         warnings.warn('%s: Qgd/Qgs %.1f > 1! LS might suffer from self turn-on' % (mf.part, mf.QgdQgsRatio))
@@ -420,7 +427,7 @@ class CoilSpecs():
         return u
 
 
-def dcdc_buck_coil(dc: DcDcLoadParams, coil: CoilSpecs):
+def dcdc_buck_coil(dc: DcDcLoadParams, coil: CoilSpecs, Bpk=None):
     """
 
     * Wire Loss
@@ -447,6 +454,8 @@ def dcdc_buck_coil(dc: DcDcLoadParams, coil: CoilSpecs):
 
     :param dc:
     :param coil:
+    :param Bpk: peak ac flux density, e.g. from `maglib.powerloss.coil_operating_point`. Defaults to
+        method 2 at the dc bias of Io.
     :return:
     """
 
@@ -514,14 +523,18 @@ def dcdc_buck_coil(dc: DcDcLoadParams, coil: CoilSpecs):
     Bpk_ac = ur * µ0 * Hpk_ac  # peak ac flux density [T]
     B_pk = ur * µ0 * Hpk_ac
     """
-    from maglib.powerloss import core_loss_from_dc_bias
+    from maglib.powerloss import core_hysteresis_loss, core_loss_from_dc_bias
 
     # P_core1, Bpk1, cld1 = core_loss_from_dc_magnetization(dc, coil)  # method 1
     P_core1, Bpk1, cld1 = 0, 0, 0
-    P_core2, Bpk2, cld2 = core_loss_from_dc_bias(dc, coil)  # method 2
+    if Bpk is None:
+        P_core2, Bpk2, cld2 = core_loss_from_dc_bias(dc, coil)  # method 2
+    else:
+        P_core2, Bpk2, cld2 = core_hysteresis_loss(Bpk, core=coil.core, f=dc.f)
 
     # TODO the mac-inc methods do not consider core saturation
     # L drops with rising dc bias current, which will increase ripple current and Bpk and hysteresis loss
+    # (see maglib.powerloss.coil_operating_point)
 
     return dotdict(
         P_dcr=P_dcr,
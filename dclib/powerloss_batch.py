@@ -0,0 +1,190 @@
+"""
+Vectorized variants of `dcdc_buck_hs` and `dcdc_buck_ls` (dclib/powerloss.py).
+
+Specs of many MOSFETs are held as struct-of-arrays (`MosfetArrays`), load points as `LoadGrid`.
+Loss functions return a `SwitchPowerLoss` whose terms are arrays of shape (n_parts, n_loads), so
+`parallel()`, `buck_hs()` and `buck_ls()` work unchanged on the result.
+
+Results match the scalar functions to float precision. Where a scalar function would raise (an
+assert on implausible gate charges, Vpl >= Von etc.) the batch result is NaN for that part instead.
+"""
+import math
+from typing import Sequence, Optional
+
+import numpy as np
+
+from dclib.powerloss import SwitchPowerLoss, Qrr_temp_rise_default, rds_on_temp_factor
+from dslib.mosfet import MosfetSpecs, GateDrive
+from dslib.spec_models import DcDcLoadParams
+
+
+def _f64(values):
+    return np.array([math.nan if v is None else v for v in values], dtype=np.float64)
+
+
+class MosfetArrays:
+    """Struct-of-arrays of the MosfetSpecs scalars used by the loss models, one entry per part."""
+
+    fields = ('Vds', 'Rds_on', 'Qg', 'Qgd', 'Qgs', 'Qgs2', 'Qg_th', 'Qsw', 'V_pl', 'Rg',
+              'Coss', 'Coss_V0', 'Qrr', 'Vsd', 'tRise', 'tFall')
+
+    def __init__(self, isGaN=None, **arrays):
+        n = None
+        for k in self.fields:
+            a = np.asarray(arrays.pop(k), dtype=np.float64)
+            assert a.ndim == 1, k
+            assert n is None or len(a) == n, (k, len(a), n)
+            n = len(a)
+            setattr(self, k, a)
+        assert not arrays, 'unknown fields %s' % list(arrays)
+        self.isGaN = np.zeros(n, dtype=bool) if isGaN is None else np.asarray(isGaN, dtype=bool)
+        assert len(self.isGaN) == n
+
+    def __len__(self):
+        return len(self.Rds_on)
+
+    @staticmethod
+    def from_specs(specs: Sequence[MosfetSpecs], isGaN: Optional[Sequence[bool]] = None) -> 'MosfetArrays':
+        return MosfetArrays(isGaN=isGaN, **{k: _f64(getattr(mf, k) for mf in specs) for k in MosfetArrays.fields})
+
+    @staticmethod
+    def from_spec_table(table) -> 'MosfetArrays':
+        """From a dslib.spec_table table (pyarrow.Table), without building any Python objects."""
+        cols = {k: table.column(k).to_numpy() for k in MosfetArrays.fields}
+        substrate = table.column('substrate').to_pylist()
+        return MosfetArrays(isGaN=[s == 'GaN' for s in substrate], **cols)
+
+
+class LoadGrid:
+    """Load points (DcDcLoadParams) as arrays, one entry per point."""
+
+    def __init__(self, loads: Sequence[DcDcLoadParams]):
+        self.loads = list(loads)
+        self.Vi = _f64(l.Vi for l in loads)
+        self.Vo = _f64(l.Vo for l in loads)
+        self.f = _f64(l.f for l in loads)
+        self.Io = _f64(l.Io for l in loads)
+        self.Iripple = _f64(l.Iripple for l in loads)
+        self.tDead = _f64(l.tDead for l in loads)
+        self.D_buck = _f64(l.D_buck for l in loads)
+        self.Io_min = _f64(l.Io_min for l in loads)
+        self.Io_max = _f64(l.Io_max for l in loads)
+        self.Io_mean_squared_on = _f64(l.Io_mean_squared_on for l in loads)
+
+    def __len__(self):
+        return len(self.Vi)
+
+
+def _rds_on(mfs: MosfetArrays, Tj):
+    # see dclib.powerloss.Rds_on, Tj is a scalar or an (n_parts, n_loads) array
+    if np.ndim(Tj) == 0 and math.isnan(Tj):
+        return mfs.Rds_on[:, None] * 1.22
+    return mfs.Rds_on[:, None] * rds_on_temp_factor(np.asarray(Tj, dtype=np.float64))
+
+
+def _von(mfs: MosfetArrays, gd: GateDrive):
+    von = np.where(mfs.isGaN, gd.Von_GaN, gd.Von)
+    return np.where(von > 0, von, np.nan)
+
+
+def _p_coss_eoss(mfs: MosfetArrays, lg: LoadGrid):
+    # see dclib.powerloss.p_coss_eoss
+    v0 = mfs.Coss_V0[:, None]
+    coss = mfs.Coss[:, None]
+    has_v0 = np.isfinite(v0) & (v0 > 0)
+    v0 = np.where(has_v0, v0, 0)
+    p_coss = np.where(has_v0,
+                      2 / 3 * coss * lg.Vi ** (3 / 2) * v0 ** .5 * lg.f,
+                      2 / 3 * coss * lg.Vi ** 2 * lg.f)
+    qoss = np.where(has_v0, 2 * coss * (v0 * lg.Vi) ** .5, 2 * coss * lg.Vi)
+    return p_coss, qoss
+
+
+def sw_timings_hs2(mfs: MosfetArrays, gd: GateDrive):
+    """Vectorized `mosfet_hs_sw_timings_hs2`. Returns (tr, tf), NaN where the scalar version asserts."""
+    rg_total = np.fmax(mfs.Rg, gd.rg_total)
+    rg_total_dis = np.fmax(mfs.Rg, gd.rg_total_dis)
+    von = _von(mfs, gd)
+
+    fallback_vpl = np.where(mfs.isGaN, gd.fallback_V_pl / 2, gd.fallback_V_pl)
+    vpl = np.where(np.isnan(mfs.V_pl), fallback_vpl, mfs.V_pl)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vgs_th = vpl * (mfs.Qg_th / mfs.Qgs)
+        v_ir = .5 * (vpl + vgs_th)
+        tr = (mfs.Qgs2 / (von - v_ir) + mfs.Qgd / (von - vpl)) * rg_total
+        tf = (mfs.Qgs2 / (v_ir - gd.Voff) + mfs.Qgd / (vpl - gd.Voff)) * rg_total_dis
+
+    valid = np.isnan(mfs.Qsw) | ((0 < mfs.Qsw) & (mfs.Qsw < 1000e-9))
+    valid &= ~mfs.isGaN | ((np.isnan(mfs.Qsw) | (mfs.Qsw < 10e-9)) & (von < 6))
+    valid &= np.isnan(vgs_th) | (vpl > vgs_th)
+    valid &= von > vpl
+    return np.where(valid, tr, np.nan), np.where(valid, tf, np.nan)
+
+
+def dcdc_buck_hs_batch(lg: LoadGrid, mfs: MosfetArrays, gd: GateDrive, Tj=math.nan,
+                       use_datasheet_timings=False) -> SwitchPowerLoss:
+    """
+    Batch `dcdc_buck_hs` (without the Lcsi model) over all parts x load points.
+    Tj is a scalar or an (n_parts, n_loads) array (see dclib.thermal).
+    :return: SwitchPowerLoss with (n_parts, n_loads) arrays, cond carries tr and tf (n_parts,)
+    """
+    assert np.all(np.isnan(lg.Iripple) | (lg.Iripple > 0))
+    tr, tf = sw_timings_hs2(mfs, gd)
+    if use_datasheet_timings:
+        # python max(tr, tRise) keeps tr unless tRise > tr
+        tr = np.where(mfs.tRise > tr, mfs.tRise, tr)
+        tf = np.where(mfs.tFall > tf, mfs.tFall, tf)
+
+    p_sw_on = 0.5 * lg.Vi * lg.Io_min * lg.f * tr[:, None]
+    p_sw_off = 0.5 * lg.Vi * lg.Io_max * lg.f * tf[:, None]
+
+    rds = _rds_on(mfs, Tj)
+    von = _von(mfs, gd)[:, None]
+    p_coss, qoss = _p_coss_eoss(mfs, lg)
+    zeros = np.zeros_like(p_coss)
+
+    return SwitchPowerLoss(
+        P_cl=lg.D_buck * lg.Io_mean_squared_on * rds,
+        P_sw=p_sw_on + p_sw_off,
+        P_dt=zeros,
+        P_rr=zeros,
+        P_gd=(von - gd.Voff) * lg.f * mfs.Qg[:, None],
+        P_coss=p_coss,
+        cond=dict(P_sw=dict(tr=tr, tf=tf, P_on=p_sw_on, P_off=p_sw_off),
+                  P_coss=dict(Qoss=qoss)),
+    )
+
+
+def dcdc_buck_ls_batch(lg: LoadGrid, mfs: MosfetArrays, gd: GateDrive, Tj=math.nan,
+                       Qrr_temp_rise=Qrr_temp_rise_default) -> SwitchPowerLoss:
+    """
+    Batch `dcdc_buck_ls` over all parts x load points, (n_parts, n_loads) arrays.
+    Tj and Qrr_temp_rise can be scalars or (n_parts, n_loads) arrays (see dclib.thermal).
+    """
+    assert np.all(np.isfinite(lg.tDead) & (lg.tDead != 0)), "no dead-time specified"
+
+    vsd = np.where((mfs.Vsd == 0) | np.isnan(mfs.Vsd), 1., np.abs(mfs.Vsd))[:, None]
+    qrr_eff = mfs.Qrr[:, None] * Qrr_temp_rise
+    rds = _rds_on(mfs, Tj)
+    von = _von(mfs, gd)[:, None]
+    p_coss, qoss = _p_coss_eoss(mfs, lg)
+
+    return SwitchPowerLoss(
+        P_cl=(1 - lg.D_buck) * lg.Io_mean_squared_on * rds,
+        P_dt=vsd * (lg.Io_max + lg.Io_min) * lg.tDead * lg.f,
+        P_rr=lg.Vi * lg.f * qrr_eff,
+        P_gd=(von - gd.Voff) * lg.f * mfs.Qg[:, None],
+        P_sw=np.zeros_like(p_coss),
+        P_coss=p_coss * 2,
+        cond=dict(P_rr=dict(Qrr=qrr_eff), P_coss=dict(Qoss=qoss)),
+    )
+
+
+def weighted(loss: SwitchPowerLoss, weights) -> SwitchPowerLoss:
+    """
+    Collapse the load-point axis of a batch result: every term becomes sum(weight * P) per part.
+    A NaN at any load point propagates, a part must be evaluable at all points to be ranked.
+    """
+    w = np.asarray(weights, dtype=np.float64)
+    assert loss.P_cl.shape[-1] == len(w), (loss.P_cl.shape, len(w))
+    return SwitchPowerLoss(**{k: v @ w for k, v in loss.items()})
@@ -0,0 +1,189 @@
+"""
+Electro-thermal steady state of the buck switches.
+
+The loss models take the junction temperature as an input (`Rds_on(Tj)`, `Qrr_temp_rise`), but Tj itself
+follows from the loss: Tj = Ta + Rth(j-a) * P_die(Tj). `solve_tj` finds that fixed point for every
+part x load point of a batch (dclib.powerloss_batch) with a vectorized Newton iteration:
+
+    hot = dcdc_buck_ls_hot(lg, mfs, gd, Ta=50, rth=package_rth(packages), qrr_fits=lm_fits(specs, names))
+    hot.Tj, hot.loss.buck_ls(), hot.converged, hot.runaway
+
+Models:
+
+- Rds_on(Tj): `dclib.powerloss.rds_on_temp_factor`
+- Qrr(Tj): the Lauritzen-Ma fit of the part (`dslib.qrr_model.best_lm_fit`, batched and persisted by
+  `dslib.qrr_batch`), tau scaled with `tau_at_tj`
+  and the exponent from `resolve_n_tau`, evaluated at the datasheet test condition (the loss model
+  books the datasheet Qrr). Parts without a fit use `QRR_TEMPCO_FALLBACK`.
+- Rth(j-a): per part, e.g. from `package_rth` (rough typical values per package, optionally with a
+  heatsink).
+
+Only the losses dissipated in the die heat it (`HS_SELF_HEATING`, `LS_SELF_HEATING`): the LS reverse
+recovery charge and the doubled LS Coss loss are dissipated in the HS channel, gate drive loss in the
+driver and gate resistors. With n parallel switches every die gets 1/n of the heating loss.
+
+A part whose loss grows faster with Tj than 1/Rth has no stable operating point (thermal runaway) or
+one above `Tj_max`; it gets Tj = NaN (and NaN losses) and `runaway` = True.
+"""
+import math
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from dclib.powerloss import SwitchPowerLoss
+from dclib.powerloss_batch import LoadGrid, MosfetArrays, dcdc_buck_hs_batch, dcdc_buck_ls_batch
+from dslib import dotdict
+from dslib.mosfet import GateDrive, MosfetSpecs
+
+HS_SELF_HEATING = ('P_cl', 'P_sw', 'P_coss')
+LS_SELF_HEATING = ('P_cl', 'P_dt')
+
+# relative Qrr rise per K for parts without a Lauritzen-Ma fit, matches Qrr_temp_rise_default (1.2) at 75°C
+QRR_TEMPCO_FALLBACK = 0.004
+
+# rough typical values (K/W): junction-case and junction-ambient on a ~1 in² 2 oz copper pad / free air
+_PACKAGES = (
+    # (name, package name fragments, Rth(j-c), Rth(j-a))
+    ('TO-247', ('TO247',), 0.5, 40.),
+    ('TO-220', ('TO220', 'T220'), 0.8, 62.),
+    ('D2PAK', ('D2PAK', 'TO263'), 0.8, 40.),
+    ('DPAK', ('DPAK', 'TO252'), 1.5, 50.),
+    ('TOLL', ('TOLL', 'HSOF8'), 0.4, 40.),
+    ('5x6', ('SUPERSO8', 'TDSON8', 'PQFN5', 'DFN5', 'SON5', 'LFPAK56', 'POWERPAKSO8', 'SO8FL'), 1.0, 50.),
+    ('3x3', ('TSDSON', 'PQFN3', 'DFN3', 'SON3', 'LFPAK33', 'POWERPAK1212'), 2.5, 60.),
+)
+RTH_CS = 0.5  # case-heatsink, with thermal interface material
+RTH_JC_UNKNOWN = 1.5
+RTH_JA_UNKNOWN = 62.
+
+
+def package_rth(packages, rth_sa: Optional[float] = None) -> np.ndarray:
+    """
+    Rough Rth(j-a) per package name. Without heatsink the PCB/free-air value, with a heatsink (`rth_sa`,
+    K/W) Rth(j-c) + RTH_CS + rth_sa. Unknown packages get the conservative `RTH_*_UNKNOWN`.
+    """
+    out = []
+    for package in packages:
+        p = str(package or '').upper().replace('-', '').replace(' ', '').replace('_', '')
+        jc, ja = next(((jc, ja) for _n, keys, jc, ja in _PACKAGES if any(k in p for k in keys)),
+                      (RTH_JC_UNKNOWN, RTH_JA_UNKNOWN))
+        out.append(ja if rth_sa is None else jc + RTH_CS + rth_sa)
+    return np.array(out, dtype=np.float64)
+
+
+def lm_fits(specs: Sequence[MosfetSpecs], parts: Optional[Sequence[str]] = None) -> List[Optional[dict]]:
+    """
+    `best_lm_fit` per part ("mfr:MPN" in `parts` resolves the Qrr(Tj) exponent), None where no fit exists.
+    Fits come from the persistent `dslib.qrr_batch.lm_fit_table()`.
+    """
+    from dslib.qrr_batch import lm_fit_table, lm_inputs
+
+    items = lm_inputs(specs, parts)
+    sel = [i for i, mf in enumerate(specs) if mf.Qrr and math.isfinite(mf.Qrr)]
+    fits = [None] * len(specs)
+    for i, fit in zip(sel, lm_fit_table().fits([items[i] for i in sel])):
+        fits[i] = fit if isinstance(fit, dict) else None
+    return fits
+
+
+def qrr_temp_factor(fits: Sequence[Optional[dict]], Tj) -> np.ndarray:
+    """
+    Qrr(Tj) / Qrr(datasheet Tj) at the datasheet test condition, per part (rows of the (n_parts, n_loads)
+    array Tj).
+    Parts without fit (None) use the linear `QRR_TEMPCO_FALLBACK`.
+    """
+    from dslib.qrr_batch import predict_fits
+
+    Tj = np.asarray(Tj, dtype=np.float64)
+    out = 1 + QRR_TEMPCO_FALLBACK * (Tj - 25)
+    fitted = np.array([fit is not None for fit in fits], dtype=bool)
+    if fitted.any():
+        def col(k):
+            return np.array([[fit[k] if fit is not None else math.nan] for fit in fits])
+
+        q_ref = predict_fits(fits, col('IF'), col('didt'), col('tj_fit'))['Qrr']
+        q = predict_fits(fits, col('IF'), col('didt'), Tj)['Qrr']
+        out[fitted] = (q / q_ref)[fitted]
+    return out
+
+
+def die_power(loss: SwitchPowerLoss, heating: Sequence[str], n_dies=1):
+    """Loss dissipated per die."""
+    return sum(getattr(loss, k) for k in heating) / n_dies
+
+
+def solve_tj(loss_fn: Callable[[np.ndarray], SwitchPowerLoss], shape, Ta, rth, heating: Sequence[str],
+             n_dies=1, tol=0.01, max_iter=30, Tj_max=200.) -> dotdict:
+    """
+    Steady-state junction temperature Tj = Ta + rth * P_die(Tj).
+
+    :param loss_fn: Tj array of `shape` (n_parts, n_loads) -> SwitchPowerLoss with arrays of that shape
+    :param Ta: ambient temperature °C
+    :param rth: Rth(j-a) K/W, scalar or per part (n_parts,)
+    :param heating: loss terms that are dissipated in the die
+    :param n_dies: parallel switches sharing the loss
+    :param tol: convergence criterion on the temperature residual, K
+    :return: dotdict(Tj, loss, converged, iterations, runaway, residual)
+    """
+    rth = np.asarray(rth, dtype=np.float64)
+    rth = rth[:, None] if rth.ndim == 1 else rth
+
+    def residual(T):
+        loss = loss_fn(T)
+        return T - Ta - rth * die_power(loss, heating, n_dies), loss
+
+    T = np.full(shape, Ta, dtype=np.float64)
+    g, loss = residual(T)
+    T = T - g
+    h = 0.1
+    iterations = np.zeros(shape, dtype=int)
+    runaway = np.zeros(shape, dtype=bool)
+    converged = np.zeros(shape, dtype=bool)
+
+    # P_die(Tj) is convex and increasing, so the residual is concave and Newton approaches the stable
+    # (lowest) root monotonically from below. No positive slope left means no root.
+    for _ in range(max_iter):
+        g, loss = residual(T)
+        converged = np.abs(g) <= tol
+        active = ~converged & np.isfinite(T)
+        if not active.any():
+            break
+        iterations += active
+        dg = (residual(T + h)[0] - g) / h
+        with np.errstate(divide='ignore', invalid='ignore'):
+            T_new = T - g / dg
+        hot = active & (~(dg > 0) | (T_new > Tj_max))
+        runaway |= hot
+        T = np.where(hot, np.nan, np.where(active, T_new, T))
+    else:
+        g, loss = residual(T)
+        converged = np.abs(g) <= tol
+
+    return dotdict(Tj=T, loss=loss, converged=converged, iterations=iterations, runaway=runaway,
+                   residual=np.abs(g))
+
+
+def dcdc_buck_hs_hot(lg: LoadGrid, mfs: MosfetArrays, gd: GateDrive, Ta, rth, n_parallel=1,
+                     heating=HS_SELF_HEATING, **kwargs) -> dotdict:
+    """`dcdc_buck_hs_batch(...).parallel(n_parallel)` at the steady-state Tj, see `solve_tj`."""
+    return solve_tj(lambda Tj: dcdc_buck_hs_batch(lg, mfs, gd, Tj=Tj, **kwargs).parallel(n_parallel),
+                    (len(mfs), len(lg)), Ta, rth, heating, n_dies=n_parallel)
+
+
+def dcdc_buck_ls_hot(lg: LoadGrid, mfs: MosfetArrays, gd: GateDrive, Ta, rth,
+                     qrr_fits: Optional[Sequence[Optional[dict]]] = None, n_parallel=1,
+                     heating=LS_SELF_HEATING) -> dotdict:
+    """
+    `dcdc_buck_ls_batch(...).parallel(n_parallel)` at the steady-state Tj, with Qrr at Tj
+    (`qrr_temp_factor` of `qrr_fits`, e.g. from `lm_fits`). See `solve_tj`.
+    """
+    fits = list(qrr_fits) if qrr_fits is not None else [None] * len(mfs)
+
+    def loss_fn(Tj, qrr=('P_rr' in heating)):
+        return dcdc_buck_ls_batch(lg, mfs, gd, Tj=Tj, Qrr_temp_rise=qrr_temp_factor(fits, Tj) if qrr else 1.0
+                                  ).parallel(n_parallel)
+
+    res = solve_tj(loss_fn, (len(mfs), len(lg)), Ta, rth, heating, n_dies=n_parallel)
+    if 'P_rr' not in heating:  # Qrr does not heat the LS, evaluate it once at the solution
+        res.loss = loss_fn(res.Tj, qrr=True)
+    return res
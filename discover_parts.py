@@ -18,7 +18,8 @@ import dslib.discovery.tw
 import dslib.discovery.vishay
 from dslib import mfr_tag
 from dslib.discovery import DiscoveredPart, benchmark_mpns
-from dslib.fetch import fetch_datasheet, close_browser, get_datasheet_url
+from dslib.downloader import download_datasheets_async
+from dslib.fetch import close_browser, get_datasheet_url
 
 
 def unique_parts(parts: List[DiscoveredPart]):
@@ -195,16 +196,10 @@ async function downloadAll(urls) {
 
     from wakepy import keep
     with keep.running():
-        i = 0
-        for part in download:
-            i += 1
-            print('download', i, '/', len(download))
-
-            # if os.path.exists('other-' + part.get_ds_path()):
-            #    os.rename('other-' + part.get_ds_path(), part.get_ds_path())
-            #    continue
-
-            await fetch_datasheet(part.ds_url, part.get_ds_path(), mfr=part.mfr, mpn=part.mpn)
+        print('download', len(download), 'datasheets')
+        results = await download_datasheets_async(download)
+        failed = [path for path, r in results.items() if not r.ok]
+        print('failed downloads:', len(failed), failed[:20])
 
 
 if __name__ == '__main__':
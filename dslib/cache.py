@@ -6,9 +6,12 @@ import pickle
 import random
 import re
 import string
+import struct
+import sys
 import threading
 import time
 import traceback
+import weakref
 from functools import wraps
 from os.path import expanduser
 from threading import Thread, Lock, RLock
@@ -354,6 +357,184 @@ class PickleFileStore:
         os.path.exists(fn) and os.unlink(fn)
 
 
+class SqliteStore:
+    """Pickle store with the PickleFileStore interface, backed by a few SQLite files instead of one
+    file per key.
+
+    Keys are spread over `shards` database files (WAL mode) by hash, so concurrent writers of a
+    process pool rarely contend for the same file lock. Each row carries its byte size and last
+    access time, which gives cheap size accounting and LRU/TTL eviction without walking a
+    directory tree. Use it with `disk_cache(..., store=SqliteStore())`.
+    """
+
+    def __init__(self, path=None, shards=4, max_bytes=None, max_age=None, evict_every=256):
+        """
+        :param path: directory holding the shard files, defaults to <cache_dir>/sqlite
+        :param max_bytes: evict least recently used entries once the store grows beyond this
+        :param max_age: evict entries not accessed for this long (timedelta or pandas string like '30d')
+        :param evict_every: check eviction limits every n writes of this process
+        """
+        self.path = path
+        self.shards = shards
+        self.max_bytes = max_bytes
+        self._max_age = _lazy_timedelta(max_age) if max_age is not None else None
+        self.evict_every = evict_every
+        self._local = threading.local()
+        self._writes = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_local')
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+    def _get_dir(self):
+        return self.path or (cache_dir + '/sqlite')
+
+    def _connections(self):
+        # sqlite connections must neither cross threads nor survive a fork
+        conns = getattr(self._local, 'conns', None)
+        if conns is None or self._local.pid != os.getpid():
+            import sqlite3
+            d = self._get_dir()
+            if not os.path.isdir(d):
+                mkdir_p(d)
+            conns = []
+            for i in range(self.shards):
+                con = sqlite3.connect('%s/shard-%02d.sqlite' % (d, i), timeout=60, isolation_level=None)
+                con.execute('PRAGMA journal_mode=WAL')
+                con.execute('PRAGMA synchronous=NORMAL')
+                con.execute('CREATE TABLE IF NOT EXISTS kv ('
+                            'key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, atime REAL NOT NULL)')
+                con.execute('CREATE INDEX IF NOT EXISTS kv_atime ON kv (atime)')
+                conns.append(con)
+            self._local.conns = conns
+            self._local.pid = os.getpid()
+        return conns
+
+    def _shard(self, key):
+        return int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16) % self.shards
+
+    def _group(self, keys):
+        by_shard = {}
+        for k in keys:
+            by_shard.setdefault(self._shard(k), []).append(k)
+        return by_shard
+
+    def get_path(self, key):
+        return '%s/shard-%02d.sqlite#%s' % (self._get_dir(), self._shard(key), key)
+
+    def read(self, key):
+        return self.read_many([key]).get(key)
+
+    def read_many(self, keys) -> dict:
+        """Read several keys with one query per shard. Missing or unreadable keys are omitted."""
+        conns = self._connections()
+        ret = {}
+        t = time.time()
+        for shard, shard_keys in self._group(keys).items():
+            con = conns[shard]
+            for i in range(0, len(shard_keys), 500):  # stay below SQLITE_MAX_VARIABLE_NUMBER
+                chunk = shard_keys[i:i + 500]
+                marks = ','.join('?' * len(chunk))
+                try:
+                    rows = con.execute('SELECT key, value FROM kv WHERE key IN (%s)' % marks, chunk).fetchall()
+                    if rows:
+                        con.execute('UPDATE kv SET atime = ? WHERE key IN (%s)' % marks, [t] + chunk)
+                except Exception as e:
+                    logger.warning('SqliteStore: error reading shard %d: %s', shard, e)
+                    continue
+                for k, blob in rows:
+                    # noinspection PyBroadException
+                    try:
+                        ret[k] = pickle.loads(blob)
+                    except:
+                        pass
+        return ret
+
+    def write(self, key, df):
+        assert isinstance(key, str)
+        self.write_many({key: df})
+
+    def write_many(self, items: dict):
+        """Write several key/value pairs, one transaction per shard."""
+        conns = self._connections()
+        t = time.time()
+        blobs = {k: pickle.dumps(v, pickle.HIGHEST_PROTOCOL) for k, v in items.items()}
+        for shard, shard_keys in self._group(blobs.keys()).items():
+            con = conns[shard]
+            with con:
+                con.execute('BEGIN IMMEDIATE')
+                con.executemany('INSERT OR REPLACE INTO kv (key, value, size, atime) VALUES (?, ?, ?, ?)',
+                                [(k, blobs[k], len(blobs[k]), t) for k in shard_keys])
+
+        self._writes += len(items)
+        if self.evict_every and self._writes >= self.evict_every and (self.max_bytes or self._max_age):
+            self._writes = 0
+            self.evict()
+
+    def delete(self, key):
+        con = self._connections()[self._shard(key)]
+        con.execute('DELETE FROM kv WHERE key = ?', (key,))
+
+    def __contains__(self, key):
+        con = self._connections()[self._shard(key)]
+        return con.execute('SELECT 1 FROM kv WHERE key = ?', (key,)).fetchone() is not None
+
+    def stats(self) -> dict:
+        n, size = 0, 0
+        for con in self._connections():
+            cn, cs = con.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kv').fetchone()
+            n += cn
+            size += cs
+        return dict(entries=n, bytes=size)
+
+    def size_bytes(self):
+        return self.stats()['bytes']
+
+    def evict(self, max_bytes=None, max_age=None) -> int:
+        """Drop entries older than `max_age` (by last access), then least recently used entries until
+        the store is below `max_bytes`. Defaults to the limits given to the constructor.
+        Returns the number of deleted entries."""
+        max_bytes = max_bytes if max_bytes is not None else self.max_bytes
+        if max_age is not None:
+            max_age = max_age if isinstance(max_age, datetime.timedelta) else pd.to_timedelta(max_age)
+        elif self._max_age is not None:
+            max_age = self._max_age()
+
+        conns = self._connections()
+        deleted = 0
+        if max_age is not None:
+            t_min = time.time() - max_age.total_seconds()
+            for con in conns:
+                deleted += con.execute('DELETE FROM kv WHERE atime < ?', (t_min,)).rowcount
+
+        if max_bytes is not None:
+            # shards hold about the same amount of data, so give each an equal share of the budget
+            shard_max = max_bytes / len(conns)
+            for con in conns:
+                size = con.execute('SELECT COALESCE(SUM(size), 0) FROM kv').fetchone()[0]
+                if size <= shard_max:
+                    continue
+                drop = []
+                for k, s in con.execute('SELECT key, size FROM kv ORDER BY atime').fetchall():
+                    if size <= shard_max:
+                        break
+                    drop.append((k,))
+                    size -= s
+                with con:
+                    con.execute('BEGIN IMMEDIATE')
+                    con.executemany('DELETE FROM kv WHERE key = ?', drop)
+                deleted += len(drop)
+
+        if deleted:
+            logger.info('SqliteStore: evicted %d entries', deleted)
+        return deleted
+
+
 class NoDataException(Exception):
     pass
 
@@ -490,14 +671,112 @@ def is_hashable(obj):
         return False
 
 
+def _approx_size(obj, depth=2) -> int:
+    """Cheap byte size estimate of a cached value (no full object-graph walk as pympler does)."""
+    if isinstance(obj, (bytes, bytearray, str)):
+        return sys.getsizeof(obj)
+    nbytes = getattr(obj, 'nbytes', None)  # numpy, pyarrow
+    if isinstance(nbytes, int):
+        return nbytes + 112
+    if type(obj).__module__.startswith('pandas.') and hasattr(obj, 'memory_usage'):
+        usage = obj.memory_usage(deep=False)
+        return int(getattr(usage, 'sum', lambda: usage)()) + 500
+    size = sys.getsizeof(obj)
+    if depth > 0:
+        if isinstance(obj, dict):
+            size += sum(_approx_size(k, depth - 1) + _approx_size(v, depth - 1) for k, v in obj.items())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            size += sum(_approx_size(v, depth - 1) for v in obj)
+        elif hasattr(obj, '__dict__'):
+            size += _approx_size(obj.__dict__, depth - 1)
+    return size
+
+
+def _parse_bytes(v) -> Optional[int]:
+    """'512MB', '2G', '100000' -> bytes"""
+    if v is None or v == '':
+        return None
+    if isinstance(v, (int, float)):
+        return int(v)
+    m = re.fullmatch(r'\s*([0-9.]+)\s*([kmgt]?)i?b?\s*', v.lower())
+    if not m:
+        raise ValueError('invalid byte size %r' % v)
+    return int(float(m.group(1)) * 1024 ** ' kmgt'.index(m.group(2) or ' '))
+
+
+class MemCacheStats:
+    """Hit/miss/eviction counters of one `mem_cache` decorated function."""
+
+    __slots__ = ('name', 'hits', 'misses', 'evictions')
+
+    def __init__(self, name):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        n = self.hits + self.misses
+        return self.hits / n if n else float('nan')
+
+    def as_dict(self):
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions, hit_rate=self.hit_rate)
+
+    def __repr__(self):
+        return 'MemCacheStats(%s hits=%d misses=%d evictions=%d)' % (self.name, self.hits, self.misses,
+                                                                     self.evictions)
+
+
+class _MemCacheEntry:
+    __slots__ = ('value', 'expire_at', 'size', 'uses', 'owner')
+
+    def __init__(self, value, expire_at, size, owner):
+        self.value = value
+        self.expire_at = expire_at
+        self.size = size
+        self.uses = 0
+        self.owner = owner
+
+
 class ManagedMemCache(CacheStorage):
-    def __init__(self):
-        self.cache = {}
+    """
+    In-process TTL cache. Expired entries are dropped by a housekeeping thread, everything is cleared
+    when system memory usage goes beyond 92%.
+
+    With `max_entries` and/or `max_bytes` the cache is bounded: after each `set` entries are evicted
+    (expired ones first, then by `policy`, 'lru' least recently used or 'lfu' least frequently used)
+    until both limits hold. Value sizes are estimated with `_approx_size`. `lfu` eviction scans all
+    entries, prefer `lru` for large caches.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None, policy='lru'):
+        from collections import OrderedDict
+        self.cache = OrderedDict()  # key -> _MemCacheEntry, least recently used first
         self._lock = RLock()
         self._now = now()
+        self._bytes = 0
+        self.evictions = 0
+        self.max_entries = self.max_bytes = None
+        self.policy = 'lru'
+        self.set_limits(max_entries, max_bytes, policy)
         self._housekeeping_thread: Optional[Thread] = None
         self._start_housekeeping()
 
+    def set_limits(self, max_entries: Optional[int] = None, max_bytes=None, policy='lru'):
+        """Change the bounds (None = unbounded), evicts right away if the cache is beyond them."""
+        assert policy in ('lru', 'lfu'), policy
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = _parse_bytes(max_bytes)
+            self.policy = policy
+            if self.max_bytes is not None:
+                self._bytes = 0
+                for e in self.cache.values():
+                    e.size = _approx_size(e.value)
+                    self._bytes += e.size
+            self._enforce_limits()
+
     def _start_housekeeping(self):
         assert self._housekeeping_thread is None, "Housekeeping thread already running"
         self._housekeeping_thread = Thread(target=self._housekeeping, name='MemCacheHousekeeping', daemon=True)
@@ -521,9 +800,7 @@ class ManagedMemCache(CacheStorage):
             _now = now()
             self._now = _now + datetime.timedelta(seconds=15)
             with self._lock:
-                for key, (value, expire_at) in list(self.cache.items()):
-                    if _now > expire_at:
-                        del self.cache[key]
+                self._drop_expired(_now)
 
                 mem_usage_percent = psutil.virtual_memory().percent
                 if mem_usage_percent > 92 and len(self.cache):
@@ -533,23 +810,77 @@ class ManagedMemCache(CacheStorage):
 
             time.sleep(30)
 
-    def set(self, key, value, ttl, ignore_overwrite=False):
+    def _pop(self, key, evicted=False):
+        e = self.cache.pop(key)
+        self._bytes -= e.size
+        if evicted:
+            self.evictions += 1
+            if e.owner is not None:
+                e.owner.evictions += 1
+        return e
+
+    def _drop_expired(self, _now):
+        for key, e in list(self.cache.items()):
+            if _now > e.expire_at:
+                self._pop(key)
+
+    def _over_limits(self):
+        return (self.max_entries is not None and len(self.cache) > self.max_entries) or \
+            (self.max_bytes is not None and self._bytes > self.max_bytes)
+
+    def _enforce_limits(self, keep=None):
+        """Evict until within limits. `keep` (the key just set) goes last, a new entry has no uses yet."""
+        if not self._over_limits():
+            return
+        self._drop_expired(now())
+        while self._over_limits():
+            others = (k for k in self.cache if k != keep)
+            if self.policy == 'lfu':
+                key = min(others, key=lambda k: self.cache[k].uses, default=keep)
+            else:
+                key = next(others, keep)  # least recently used first
+            self._pop(key, evicted=True)
+
+    def set(self, key, value, ttl, ignore_overwrite=False, owner: Optional[MemCacheStats] = None):
+        """
+        :param owner: stats of the `mem_cache` function that owns the entry, counts its evictions
+        """
         if not isinstance(ttl, datetime.timedelta):
             ttl = pd.to_timedelta(ttl)
+        size = _approx_size(value) if self.max_bytes is not None else 0
         with self._lock:
-            if not ignore_overwrite and key in self.cache and now() < self.cache[key][1] and value is not None:
-                t = threading.currentThread()
+            old = self.cache.get(key)
+            if not ignore_overwrite and old is not None and now() < old.expire_at and value is not None:
+                t = threading.current_thread()
                 logger.warning(
                     'MMC: overwrite key %s expiring at %s (in %s) (cache might be inefficient due to race condition in thread %s#%s)',
-                    key, self.cache[key][1], (self.cache[key][1] - now()), t.name, t.ident)
-            self.cache[key] = (value, now() + ttl)
+                    key, old.expire_at, (old.expire_at - now()), t.name, t.ident)
+            if old is not None:
+                self._pop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # would flush the whole cache and then not fit anyway
+                self.evictions += 1
+                if owner is not None:
+                    owner.evictions += 1
+                return
+            e = _MemCacheEntry(value, now() + ttl, size, owner)
+            if old is not None:
+                e.uses = old.uses
+            self.cache[key] = e
+            self._bytes += size
+            self._enforce_limits(keep=key)
 
     def get(self, key):
         with self._lock:
-            got = self.cache.get(key)
-        if got is None or got[1] <= now():
-            return None
-        return got[0]
+            e = self.cache.get(key)
+            if e is None:
+                return None
+            if e.expire_at <= now():
+                self._pop(key)
+                return None
+            e.uses += 1
+            self.cache.move_to_end(key)
+            return e.value
 
     def get_default(self, key, default, ttl):
         with self._lock:
@@ -564,14 +895,18 @@ class ManagedMemCache(CacheStorage):
             mb = (self.size_bytes() / 1e6) if self.cache else 0
             if mb > 1:
                 logger.info('Clearing mem cache (size=%.1fMB)', mb)
-            if mb > 0:
+            if self.cache:
                 self.cache.clear()
+                self._bytes = 0
                 import gc
                 gc.collect()
 
     def __delitem__(self, key):
         with self._lock:
-            del self.cache[key]
+            self._pop(key)
+
+    def __len__(self):
+        return len(self.cache)
 
     def size_bytes(self):
         from pympler import asizeof
@@ -581,43 +916,71 @@ class ManagedMemCache(CacheStorage):
         # TODO add locking?
         if item not in self:
             raise KeyError(item)
-        return self.cache[item][0]
+        return self.cache[item].value
 
     def __contains__(self, item):
         # TODO add locking?
-        return item in self.cache and self.cache[item][1] >= now()
+        e = self.cache.get(item)
+        return e is not None and e.expire_at >= now()
+
+    def stats(self) -> dict:
+        """Entries, estimated bytes (only tracked with `max_bytes`), limits and evictions of the storage."""
+        with self._lock:
+            return dict(entries=len(self.cache), bytes=self._bytes if self.max_bytes is not None else None,
+                        max_entries=self.max_entries, max_bytes=self.max_bytes, policy=self.policy,
+                        evictions=self.evictions)
 
     def print_stats(self):
         from pympler import asizeof
         size_by_key = {}
         with self._lock:
             items = list(self.cache.items())
-        for key, (value, expire_at) in items:
-            size_by_key[key] = asizeof.asizeof(value)
+        for key, e in items:
+            size_by_key[key] = asizeof.asizeof(e.value)
 
         cache_size = asizeof.asizeof(self.cache)
-        print('ManagedMemCache size by key (total = %.1fMB):' % cache_size / 1e6)
+        print('ManagedMemCache size by key (total = %.1fMB):' % (cache_size / 1e6))
         for key, size in sorted(size_by_key.items(), key=lambda kv: kv[1], reverse=True)[:20]:
-            print('%20s: %8.1fkB' % (key[:20], size / 1e3))
+            print('%20s: %8.1fkB' % (str(key)[:20], size / 1e3))
 
 
 _managed_mem_cache = None
 
 
 def shared_managed_mem_cache() -> ManagedMemCache:
+    """
+    The process-wide mem_cache storage. Bounded by the env vars DSLIB_MEM_CACHE_MAX_ENTRIES,
+    DSLIB_MEM_CACHE_MAX_BYTES (e.g. '512MB') and DSLIB_MEM_CACHE_POLICY (lru|lfu), unbounded by default.
+    Use `.set_limits()` to change them at runtime.
+    """
     global _managed_mem_cache
     if _managed_mem_cache is None:
-        _managed_mem_cache = ManagedMemCache()
+        max_entries = os.environ.get('DSLIB_MEM_CACHE_MAX_ENTRIES')
+        _managed_mem_cache = ManagedMemCache(max_entries=int(max_entries) if max_entries else None,
+                                             max_bytes=os.environ.get('DSLIB_MEM_CACHE_MAX_BYTES') or None,
+                                             policy=os.environ.get('DSLIB_MEM_CACHE_POLICY', 'lru'))
     return _managed_mem_cache
 
 
-def disk_cache_key(mod, target, ignore_kwargs, args, kwargs):
+_repo_root = os.path.realpath(os.path.dirname(__file__) + '/..')
+
+
+def _repo_relative(path):
+    rel = os.path.relpath(os.path.realpath(path), _repo_root)
+    return path if rel.startswith('..') else rel
+
+
+def disk_cache_key(mod, target, ignore_kwargs, args, kwargs, repo_relative=False):
+    """:param repo_relative: key on the module path relative to the repository root, so the key does not
+    depend on where the checkout lives (content-hash mode)"""
     # TODO    target.__code__
     kwargs_cache = {k: v for k, v in kwargs.items() if k not in ignore_kwargs}
     cache_key_obj = (to_hashable(args), to_hashable(kwargs_cache))
     cache_key_hash = hashlib.sha224(bytes(str(cache_key_obj), 'utf-8')).hexdigest()
 
     mod_file = mod.__file__.replace('__mp_main__', '__main__')
+    if repo_relative:
+        mod_file = _repo_relative(mod_file)
     path_hash = hashlib.sha224(bytes(mod_file, 'utf-8')).hexdigest()[:4]
 
     cache_key_prefix = ''
@@ -707,16 +1070,51 @@ class CacheStorageRedis(CacheStorage):
         self.redis.delete('csr:' + key)
 
 
+_shared_sqlite_store = None
+
+
+def default_disk_cache_store():
+    global _shared_sqlite_store
+    if os.environ.get('DSLIB_DISK_CACHE_STORE', 'pickle') == 'sqlite':
+        if _shared_sqlite_store is None:
+            _shared_sqlite_store = SqliteStore()
+        return _shared_sqlite_store
+    return PickleFileStore()
+
+
+class _CachedNone:
+    """Stored in place of a `None` result by `mem_cache(cache_none=True)` (storages return None for a miss)."""
+
+    def __reduce__(self):
+        return _CachedNone, ()
+
+
+_CACHED_NONE = _CachedNone()
+
+_mem_cache_stats = {}
+
+
+def mem_cache_stats() -> dict:
+    """'module.function' -> MemCacheStats of all `mem_cache` decorated functions."""
+    return dict(_mem_cache_stats)
+
+
+def reset_mem_cache_stats():
+    for st in _mem_cache_stats.values():
+        st.hits = st.misses = st.evictions = 0
+
+
 # noinspection PyShadowingNames
 def mem_cache(ttl, touch=False, ignore_kwargs=None, synchronized=False, expired=None, ignore_rc=False,
               cache_storage: CacheStorage = shared_managed_mem_cache(),
-              key_func: Callable = None):
+              key_func: Callable = None, cache_none=False):
     """
     Decorator
     :param touch: touch key time on hit
     :param ttl:
     :param ignore_kwargs: a set of keyword arguments to ignore when building the cache key
     :param expired Callable to evaluate whether the cached value has expired/invalidated
+    :param cache_none: also cache a `None` return value (negative result), otherwise it is recomputed on every call
     :return:
     """
 
@@ -725,9 +1123,11 @@ def mem_cache(ttl, touch=False, ignore_kwargs=None, synchronized=False, expired=
 
     _ttl = _lazy_timedelta(ttl)      # NOT at decoration time — see _lazy_timedelta
     _mem_cache = cache_storage
-    _lock_cache = shared_managed_mem_cache()
 
     def decorate(target):
+        stats = MemCacheStats('%s.%s' % (target.__module__, target.__qualname__))
+        _mem_cache_stats[stats.name] = stats
+        set_kw = dict(owner=stats) if isinstance(_mem_cache, ManagedMemCache) else {}
 
         if key_func:
             def _cache_key_obj(args, kwargs):
@@ -741,31 +1141,49 @@ def mem_cache(ttl, touch=False, ignore_kwargs=None, synchronized=False, expired=
         def _inner_wrapper(cache_key_obj, args, kwargs):
             ret = _mem_cache.get(cache_key_obj)
 
+            if isinstance(ret, _CachedNone):
+                stats.hits += 1
+                if touch:
+                    _mem_cache.set(cache_key_obj, ret, ttl=_ttl(), ignore_overwrite=True, **set_kw)
+                return None
+
             if expired and ret is not None and expired(ret):
                 del _mem_cache[cache_key_obj]
                 ret = None
 
             if ret is None:
+                stats.misses += 1
                 ret = target(*args, **kwargs)
-                _mem_cache.set(cache_key_obj, ret, ttl=_ttl(), ignore_overwrite=ignore_rc)
-            elif touch:
-                _mem_cache.set(cache_key_obj, ret, ttl=_ttl(), ignore_overwrite=True)
+                if ret is not None or cache_none:
+                    _mem_cache.set(cache_key_obj, _CACHED_NONE if ret is None else ret, ttl=_ttl(),
+                                   ignore_overwrite=ignore_rc, **set_kw)
+            else:
+                stats.hits += 1
+                if touch:
+                    _mem_cache.set(cache_key_obj, ret, ttl=_ttl(), ignore_overwrite=True, **set_kw)
 
             return ret
 
         if synchronized:
             target_lock = Lock()
+            # per-key locks live apart from the (bounded, evicting) value cache: an evicted lock would let
+            # a second caller compute the same key concurrently. Weak values drop a lock once no caller
+            # holds it anymore.
+            key_locks = weakref.WeakValueDictionary()
 
             @wraps(target)
             def _mem_cache_synchronized_wrapper(*args, **kwargs):
                 cache_key_obj = _cache_key_obj(args, kwargs)
 
                 with target_lock:
-                    lock = _lock_cache.get_default((cache_key_obj, target_lock), Lock, ttl=_ttl())
+                    lock = key_locks.get(cache_key_obj)
+                    if lock is None:
+                        lock = key_locks[cache_key_obj] = Lock()
 
                 with lock:
                     return _inner_wrapper(cache_key_obj, args, kwargs)
 
+            _mem_cache_synchronized_wrapper.cache_stats = stats
             return _mem_cache_synchronized_wrapper
 
         else:
@@ -774,12 +1192,174 @@ def mem_cache(ttl, touch=False, ignore_kwargs=None, synchronized=False, expired=
                 cache_key_obj = _cache_key_obj(args, kwargs)
                 return _inner_wrapper(cache_key_obj, args, kwargs)
 
+            _mem_cache_wrapper.cache_stats = stats
             return _mem_cache_wrapper
 
     return decorate
 
 
 _disk_cache_disabled = False
+# called with hit=True/False after each disk_cache lookup (dslib.trace counts them per parse stage)
+disk_cache_read_hook: Optional[Callable[[bool], None]] = None
+_disk_cache_content_hash = os.environ.get('DSLIB_DISK_CACHE_CONTENT_HASH', '') not in ('', '0')
+
+
+class FileHashIndex:
+    """Persistent (path, size, mtime, inode) -> sha256 index for disk_cache file dependencies.
+
+    A file is hashed once per stat signature. A `touch`, `git clone` or rsync changes the mtime,
+    so the file is hashed again, but the digest (and with it the cache key) stays the same.
+    New digests are appended to a log next to the index snapshot under a file lock, so a hashing
+    pass over many files costs O(entry) per file and concurrent workers of `run_parallel` do not
+    drop each other's entries. Other processes' entries are picked up by reading the log tail. The
+    log is merged into the snapshot once it holds `compact_every` entries, or earlier once most of
+    its entries are superseded by a later one for the same path (a file touched or rewritten over
+    and over). Compaction also drops the entries of files that no longer exist.
+    """
+
+    _rec_header = struct.Struct('<I')
+
+    def __init__(self, path=None, compact_every=10000):
+        self.path = path
+        self.compact_every = compact_every
+        self._index = None
+        self._log_ino = None
+        self._log_pos = 0  # end of the last complete log record applied to _index
+        self._log_n = 0
+        self._log_paths = set()  # distinct paths in the log, _log_n - len(_log_paths) are superseded
+        self._lock = Lock()
+
+    def _get_path(self):
+        return self.path or (cache_dir + '/__file_sha256_index.pickle')
+
+    def _log_path(self):
+        return self._get_path() + '.log'
+
+    def _read(self):
+        # noinspection PyBroadException
+        try:
+            with open(self._get_path(), 'rb') as fh:
+                return pickle.load(fh)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning('Error reading file hash index %s: %s', self._get_path(), e)
+            return {}
+
+    def _reset_log(self, ino):
+        self._log_ino, self._log_pos, self._log_n = ino, 0, 0
+        self._log_paths = set()
+
+    def _load(self):
+        self._index = self._read()
+        self._reset_log(None)
+        self._catch_up()
+
+    def _catch_up(self):
+        """Apply the log records appended since the last call (all of them after a compaction)."""
+        try:
+            fh = open(self._log_path(), 'rb')
+        except FileNotFoundError:
+            return
+        with fh:
+            st = os.fstat(fh.fileno())
+            if st.st_ino != self._log_ino or st.st_size < self._log_pos:
+                if self._log_ino is not None:  # compacted by another process, the snapshot has our entries
+                    self._index = self._read()
+                self._reset_log(st.st_ino)
+            fh.seek(self._log_pos)
+            data = fh.read()
+        pos = 0
+        hs = self._rec_header.size
+        while pos + hs <= len(data):
+            n, = self._rec_header.unpack_from(data, pos)
+            if pos + hs + n > len(data):
+                break  # torn or in-progress write
+            # noinspection PyBroadException
+            try:
+                fn, entry = pickle.loads(data[pos + hs:pos + hs + n])
+            except Exception:
+                break
+            self._index[fn] = entry
+            pos += hs + n
+            self._log_n += 1
+            self._log_paths.add(fn)
+        self._log_pos += pos
+
+    def _append(self, fn, entry):
+        path = self._get_path()
+        if not os.path.isdir(os.path.dirname(path)):
+            mkdir_p(os.path.dirname(path))
+        rec = pickle.dumps((fn, entry), pickle.HIGHEST_PROTOCOL)
+        lock = acquire_file_lock(path + '.lock', kill_holder=False, max_time=30)
+        try:
+            self._catch_up()
+            with open(self._log_path(), 'ab') as fh:
+                st = os.fstat(fh.fileno())
+                if st.st_ino != self._log_ino:  # we just created the log
+                    self._reset_log(st.st_ino)
+                if fh.tell() > self._log_pos:
+                    fh.truncate(self._log_pos)  # drop a torn record left by a crashed writer
+                fh.write(self._rec_header.pack(len(rec)) + rec)
+            self._log_pos += self._rec_header.size + len(rec)
+            self._log_n += 1
+            self._log_paths.add(fn)
+            self._index[fn] = entry
+            superseded = self._log_n - len(self._log_paths)
+            if self._log_n >= self.compact_every or (superseded >= 64 and superseded * 2 > self._log_n):
+                self._compact_locked()
+        finally:
+            lock.close()
+
+    def _compact_locked(self):
+        path, log_path = self._get_path(), self._log_path()
+        self._index = {fn: e for fn, e in self._index.items() if os.path.exists(fn)}
+        s = f'.{random_str(6)}.tmp'
+        with open(path + s, 'wb') as fh:
+            pickle.dump(self._index, fh, pickle.HIGHEST_PROTOCOL)
+        os.replace(path + s, path)
+        open(log_path + s, 'wb').close()
+        os.replace(log_path + s, log_path)
+        self._reset_log(os.stat(log_path).st_ino)
+
+    @staticmethod
+    def _hash_file(fn):
+        h = hashlib.sha256()
+        with open(fn, 'rb') as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def sha256(self, fn):
+        st = os.stat(fn)
+        sig = (st.st_size, st.st_mtime_ns, st.st_ino)
+        with self._lock:
+            if self._index is None:
+                self._load()
+            entry = self._index.get(fn)
+            if entry is not None and entry[0] == sig:
+                return entry[1]
+
+            # another process might have hashed it since we loaded the index
+            self._catch_up()
+            entry = self._index.get(fn)
+            if entry is not None and entry[0] == sig:
+                return entry[1]
+
+            entry = (sig, self._hash_file(fn))
+            try:
+                self._append(fn, entry)
+            except Exception as e:
+                logger.warning('Error writing file hash index: %s', e)
+                self._index[fn] = entry
+            return entry[1]
+
+
+_file_hash_index = FileHashIndex()
+
+
+def file_sha256(fn):
+    return _file_hash_index.sha256(fn)
 
 
 def _disk_cache_get_file_names(args, kwargs, pwd: str, deps, ignore_missing_inp_paths: bool):
@@ -812,11 +1392,24 @@ def _disk_cache_get_file_names(args, kwargs, pwd: str, deps, ignore_missing_inp_
 
 def disk_cache(ttl, ignore_kwargs=None, file_dependencies=None, out_files=None, salt=None,
                ignore_missing_inp_paths=False,
-               hash_func_code=False):
+               hash_func_code=False,
+               content_hash: Optional[bool] = None,
+               store=None):
+    """
+    Decorator, pickles return values to the disk cache.
+    :param file_dependencies: arg positions/names (or literal paths) of input files the result depends on.
+    :param content_hash: key file dependencies by their sha256 instead of their mtime, so a `touch` or a
+        fresh clone does not invalidate entries. Keys then use the module path relative to the repository
+        root, so they match across checkouts as long as path arguments are relative too (e.g. `datasheets/..`).
+        None follows `disk_cache.content_hash()` (or the DSLIB_DISK_CACHE_CONTENT_HASH env var). Switching
+        modes changes the keys of existing entries.
+    :param store: storage backend with read/write/delete (PickleFileStore, SqliteStore). Defaults to one
+        pickle file per key, or a shared SqliteStore if DSLIB_DISK_CACHE_STORE=sqlite.
+    """
     if ignore_kwargs is None:
         ignore_kwargs = set()
 
-    disk_cache_store = PickleFileStore()
+    disk_cache_store = store if store is not None else default_disk_cache_store()
     _ttl = _lazy_timedelta(ttl)      # NOT at decoration time — see _lazy_timedelta
 
     def decorate(target):
@@ -828,12 +1421,16 @@ def disk_cache(ttl, ignore_kwargs=None, file_dependencies=None, out_files=None,
 
         def _cache_key(*args, **kwargs):
             mtimes = {}
+            by_content = _disk_cache_content_hash if content_hash is None else content_hash
             if file_dependencies:
-                mtimes = {
-                    '__mtime:' + fn: (os.path.getmtime(fn))
-                    for fn in _disk_cache_get_file_names(args, kwargs, pwd, file_dependencies, ignore_missing_inp_paths)
-                    if
-                    not ignore_missing_inp_paths or fn is not None}
+                fns = [fn for fn in
+                       _disk_cache_get_file_names(args, kwargs, pwd, file_dependencies, ignore_missing_inp_paths)
+                       if not ignore_missing_inp_paths or fn is not None]
+                if by_content:
+                    # positional, not path-keyed: the digest alone identifies the input
+                    mtimes = {'__sha256:%d' % i: file_sha256(fn) for i, fn in enumerate(fns)}
+                else:
+                    mtimes = {'__mtime:' + fn: (os.path.getmtime(fn)) for fn in fns}
             if salt is not None:
                 # callable salts (also inside a tuple) resolve at call time, so decoration (import)
                 # stays cheap when the salt is expensive to build (e.g. parse.py's regex tables).
@@ -848,7 +1445,8 @@ def disk_cache(ttl, ignore_kwargs=None, file_dependencies=None, out_files=None,
                     mtimes['__salt__'] = salt
             if hash_func_code:
                 mtimes['__target_source'] = source_code
-            cache_key_str = disk_cache_key(mod, target, ignore_kwargs, args=args, kwargs={**kwargs, **mtimes})
+            cache_key_str = disk_cache_key(mod, target, ignore_kwargs, args=args, kwargs={**kwargs, **mtimes},
+                                           repo_relative=by_content)
             return cache_key_str
 
         def _invalidate(*args, **kwargs):
@@ -904,6 +1502,12 @@ def disk_cache(ttl, ignore_kwargs=None, file_dependencies=None, out_files=None,
 
         def _try_read(cache_key_str, out_fns, out_sizes):
             """Return (value, hit) — hit=True when a fresh, valid cached value was found."""
+            ret, hit = _read_valid(cache_key_str, out_fns, out_sizes)
+            if disk_cache_read_hook:
+                disk_cache_read_hook(hit)
+            return ret, hit
+
+        def _read_valid(cache_key_str, out_fns, out_sizes):
             try:
                 cache_val = disk_cache_store.read(cache_key_str)
                 if cache_val is None:
@@ -989,7 +1593,18 @@ def disk_cache_disable(disable: bool):
     _disk_cache_disabled = disable
 
 
+def disk_cache_content_hash(enable: bool):
+    """Key file dependencies by content for every disk_cache that does not set `content_hash` itself.
+    Also exported to the environment, so worker processes spawned afterwards follow."""
+    global _disk_cache_content_hash
+    if enable and not _disk_cache_content_hash:
+        logger.info('Disk cache keys file dependencies by content hash')
+    _disk_cache_content_hash = enable
+    os.environ['DSLIB_DISK_CACHE_CONTENT_HASH'] = '1' if enable else '0'
+
+
 setattr(disk_cache, 'disable', disk_cache_disable)
+setattr(disk_cache, 'content_hash', disk_cache_content_hash)
 
 
 class NopLock:
@@ -0,0 +1,271 @@
+"""
+Bulk datasheet download stage.
+
+`fetch_datasheet` downloads one part with blocking `requests` and no connection reuse. `BulkDownloader`
+fetches many datasheets concurrently over one aiohttp session: a per-host connection pool and limit
+(manufacturer sites throttle), a total limit, resume of interrupted downloads (`<path>.part` + Range),
+and with `revalidate=True` a HEAD request that skips files whose ETag / Last-Modified / size did not change
+(kept in `<path>.meta.json`). Only URLs that do not serve a PDF directly go to the (serialized) chromium
+fallback, after all plain HTTP downloads are done.
+"""
+import asyncio
+import json
+import os
+import shutil
+import time
+from os.path import expanduser
+from typing import Dict, List, Optional, Union, Callable
+
+from dslib import get_logger
+
+logger = get_logger()
+
+MIN_PDF_SIZE = 10e3
+
+
+class DownloadJob:
+    def __init__(self, path: str, urls: List[Union[str, Callable[[], str]]], mfr=None, mpn=None):
+        self.path = path
+        self.urls = urls
+        self.mfr = mfr
+        self.mpn = mpn
+
+    @staticmethod
+    def for_part(part, resolve=True) -> 'DownloadJob':
+        """Job for a DiscoveredPart. `resolve` runs dslib.fetch.datasheet_urls (might do blocking requests)."""
+        urls = part.ds_url
+        if resolve:
+            from dslib.fetch import datasheet_urls
+            urls = datasheet_urls(part.ds_url, part.mfr, part.mpn)
+        elif isinstance(urls, str):
+            urls = [urls]
+        return DownloadJob(part.get_ds_path(), list(urls or []), mfr=part.mfr, mpn=part.mpn)
+
+    def __repr__(self):
+        return f'DownloadJob({self.mfr} {self.mpn} {self.path})'
+
+
+class DownloadResult:
+    """status: downloaded, resumed, unchanged, exists, copied, browser, failed, no_url"""
+
+    def __init__(self, status, url=None, size=0, error=None):
+        self.status = status
+        self.url = url
+        self.size = size
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.status not in {'failed', 'no_url'}
+
+    def __repr__(self):
+        return f'DownloadResult({self.status} {self.url} {self.size}B{" " + self.error if self.error else ""})'
+
+
+class _NeedsBrowser(Exception):
+    pass
+
+
+def _meta_path(path):
+    return path + '.meta.json'
+
+
+def _read_meta(path) -> Dict:
+    try:
+        with open(_meta_path(path)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(path, meta):
+    with open(_meta_path(path), 'w') as fh:
+        json.dump(meta, fh)
+
+
+def _remove_part(path):
+    for fn in (path + '.part', _meta_path(path + '.part')):
+        try:
+            os.remove(fn)
+        except FileNotFoundError:
+            pass
+
+
+def _validators(headers) -> Dict:
+    return {k: headers[h] for k, h in (('etag', 'ETag'), ('last_modified', 'Last-Modified'),
+                                        ('length', 'Content-Length')) if h in headers}
+
+
+def _is_pdf_type(headers):
+    ct = headers.get('Content-Type', '').split(';')[0].strip().lower()
+    return ct in ('application/pdf', 'application/octet-stream', 'binary/octet-stream')
+
+
+class BulkDownloader:
+    def __init__(self, per_host=4, total=32, timeout=60, revalidate=False, browser_fallback=True,
+                 user_agent='Mozilla/5.0'):
+        """
+        :param per_host: max concurrent connections per host
+        :param total: max concurrent connections
+        :param timeout: connect timeout and max. stall while reading a response (s). There is no limit on the
+          whole transfer, a large datasheet from a slow host may take longer
+        :param revalidate: re-check existing files with HEAD and re-download them if changed
+        :param browser_fallback: try dslib.fetch.download_with_chromium for URLs that don't serve a PDF
+        """
+        self.per_host = per_host
+        self.total = total
+        self.timeout = timeout
+        self.revalidate = revalidate
+        self.browser_fallback = browser_fallback
+        self.headers = {'User-Agent': user_agent}
+
+    async def download_all(self, jobs: List[DownloadJob]) -> Dict[str, DownloadResult]:
+        """Download all jobs, returns path -> DownloadResult."""
+        import aiohttp
+
+        t0 = time.time()
+        results: Dict[str, DownloadResult] = {}
+        browser_todo: Dict[str, List[str]] = {}
+
+        connector = aiohttp.TCPConnector(limit=self.total, limit_per_host=self.per_host)
+        async with aiohttp.ClientSession(connector=connector, headers=self.headers,
+                                         timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout,
+                                                                       sock_read=self.timeout)) as session:
+            async def _run(job: DownloadJob):
+                res, browser_urls = await self._download_job(session, job)
+                results[job.path] = res
+                if browser_urls:
+                    browser_todo[job.path] = browser_urls
+
+            await asyncio.gather(*(_run(job) for job in jobs))
+
+        if browser_todo and self.browser_fallback:
+            # chromium downloads are serialized by a file lock anyway
+            from dslib.fetch import download_with_chromium
+            for path, urls in browser_todo.items():
+                for url in urls:
+                    try:
+                        await download_with_chromium(url, path)
+                    except Exception as e:
+                        logger.warning('chromium download %s failed: %s', url, e)
+                        continue
+                    if os.path.isfile(path):
+                        results[path] = DownloadResult('browser', url, os.path.getsize(path))
+                        break
+
+        for path, res in results.items():
+            # a partial download is stale once the file exists, unless a failed revalidation might resume it
+            if os.path.isfile(path) and not (res.status == 'exists' and res.error):
+                _remove_part(path)
+
+        counts = {}
+        for r in results.values():
+            counts[r.status] = counts.get(r.status, 0) + 1
+        logger.info('Downloaded %d datasheets in %.1fs: %s', len(jobs), time.time() - t0, counts)
+        return results
+
+    async def _download_job(self, session, job: DownloadJob):
+        """Returns (DownloadResult, urls for the browser fallback)."""
+        if os.path.isfile(job.path) and not self.revalidate:
+            return DownloadResult('exists', size=os.path.getsize(job.path)), []
+
+        if not job.urls:
+            return DownloadResult('no_url'), []
+
+        os.makedirs(os.path.dirname(job.path) or '.', exist_ok=True)
+        browser_urls = []
+        error = None
+        for url in job.urls:
+            try:
+                if callable(url):
+                    url = await asyncio.to_thread(url)
+                if not url:
+                    continue
+                if url.startswith('//'):
+                    url = 'https:' + url
+                if not url.startswith('http'):
+                    if os.path.isfile(expanduser(url)):
+                        shutil.copyfile(expanduser(url), job.path)
+                        return DownloadResult('copied', url, os.path.getsize(job.path)), []
+                    continue
+                res = await self._fetch_url(session, url, job.path)
+                if res is not None:
+                    return res, []
+            except _NeedsBrowser as e:
+                browser_urls.append(url)
+                error = str(e)
+            except Exception as e:
+                # connection errors etc. might still work in a browser (bot protection)
+                if 'not found' not in str(e).lower():
+                    browser_urls.append(url)
+                error = '%s: %s' % (type(e).__name__, e)
+
+        if os.path.isfile(job.path):
+            # revalidation failed, keep what we have
+            return DownloadResult('exists', size=os.path.getsize(job.path), error=error), []
+        return DownloadResult('failed', error=error), browser_urls
+
+    async def _fetch_url(self, session, url, path) -> Optional[DownloadResult]:
+        """Download `url` to `path`. Returns None on 404 (try the next url)."""
+        meta = _read_meta(path)
+
+        if os.path.isfile(path) and meta.get('url') == url:
+            async with session.head(url, allow_redirects=True) as resp:
+                if resp.status == 200:
+                    v = _validators(resp.headers)
+                    if v and all(meta.get(k) == x for k, x in v.items()):
+                        return DownloadResult('unchanged', url, os.path.getsize(path))
+
+        part = path + '.part'
+        part_meta = _read_meta(part)
+        offset = os.path.getsize(part) if os.path.isfile(part) and part_meta.get('url') == url else 0
+        headers = {}
+        if offset:
+            headers['Range'] = 'bytes=%d-' % offset
+            if part_meta.get('etag'):
+                headers['If-Range'] = part_meta['etag']
+
+        async with session.get(url, headers=headers, allow_redirects=True) as resp:
+            if resp.status == 404:
+                return None
+            if resp.status not in (200, 206):
+                raise _NeedsBrowser('HTTP %d' % resp.status)
+            if not _is_pdf_type(resp.headers):
+                raise _NeedsBrowser('content-type %s' % resp.headers.get('Content-Type'))
+
+            resumed = resp.status == 206 and offset > 0
+            if not resumed:
+                # the server ignored the Range (or If-Range did not match), start over
+                _write_meta(part, dict(url=url, **_validators(resp.headers)))
+
+            with open(part, 'ab' if resumed else 'wb') as fh:
+                async for chunk in resp.content.iter_chunked(1 << 16):
+                    fh.write(chunk)
+
+        size = os.path.getsize(part)
+        with open(part, 'rb') as fh:
+            head = fh.read(4)
+        if head != b'%PDF' or size < MIN_PDF_SIZE:
+            os.remove(part)
+            os.remove(_meta_path(part))
+            raise _NeedsBrowser('not a pdf (%d bytes)' % size)
+
+        os.replace(part, path)
+        meta = _read_meta(part)
+        os.remove(_meta_path(part))
+        meta['length'] = str(size)
+        _write_meta(path, meta)
+        return DownloadResult('resumed' if resumed else 'downloaded', url, size)
+
+
+async def download_datasheets_async(parts, **kwargs) -> Dict[str, DownloadResult]:
+    """Download missing datasheets of `parts` (DiscoveredPart), see BulkDownloader for kwargs."""
+    downloader = BulkDownloader(**kwargs)
+    todo = [p for p in parts if downloader.revalidate or not os.path.isfile(p.get_ds_path())]
+    # url resolution might do blocking requests (mcc, onsemi)
+    jobs = await asyncio.gather(*(asyncio.to_thread(DownloadJob.for_part, p) for p in todo))
+    return await downloader.download_all(jobs)
+
+
+def download_datasheets(parts, **kwargs) -> Dict[str, DownloadResult]:
+    return asyncio.run(download_datasheets_async(parts, **kwargs))
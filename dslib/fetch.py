@@ -52,7 +52,10 @@ def get_datasheet_url(mfr, mpn):
     # ))
 
 
-async def fetch_datasheet(ds_url, datasheet_path, mfr, mpn):
+def datasheet_urls(ds_url, mfr, mpn) -> List[Union[str, callable]]:
+    """
+    Candidate URLs (or local paths) of a part's datasheet, in the order to try. Empty if there is none.
+    """
     ds_url_alt = None
     if isinstance(ds_url, float) and math.isnan(ds_url):
         ds_url = None
@@ -80,23 +83,28 @@ async def fetch_datasheet(ds_url, datasheet_path, mfr, mpn):
         ds_url = get_datasheet_url(mfr, mpn)
 
     if not ds_url or str(ds_url) == 'nan':
-        print('SKIP', datasheet_path, 'no url', ds_url)
-        return None
+        print('SKIP', mfr, mpn, 'no url', ds_url)
+        return []
 
     if ('infineon-technologies/fundamentals-of-power-semiconductors' in ds_url or 'MCCProductCatalog.pdf' in ds_url):
         print(mfr, 'skip url to', ds_url)
-        return None
+        return []
 
     if isinstance(ds_url, str):
         ds_url = [ds_url]
 
+    return [du for du in [*ds_url, ds_url_alt] if du]
+
+
+async def fetch_datasheet(ds_url, datasheet_path, mfr, mpn):
+    ds_url = datasheet_urls(ds_url, mfr, mpn)
+    if not ds_url:
+        return None
+
     print('downloading', ds_url, datasheet_path)
     dp = os.path.dirname(datasheet_path)
     os.path.isdir(dp) or os.makedirs(dp)
-    for du in [*ds_url, ds_url_alt]:
-        if not du:
-            continue
-
+    for du in ds_url:
         try:
             if callable(du):
                 du = du()
@@ -10,11 +10,11 @@ from pdfminer.layout import LAParams
 
 from dslib.cache import disk_cache
 from dslib.pdf.tree import vertical_sort, vertical_merge, pdf_blocks_pdfminer_six, bbox_union, Word, GraphicBlock, \
-    TextBlock
+    TextBlock, _Slotted
 from dslib.pdf.pdf2txt import whitespaces_to_space
 
 
-@disk_cache(ttl='999d', file_dependencies=[0], hash_func_code=True, salt=('v11', pdf_blocks_pdfminer_six.__code__.co_code))
+@disk_cache(ttl='999d', file_dependencies=[0], hash_func_code=True, salt=('v12', pdf_blocks_pdfminer_six.__code__.co_code))
 def pdf_to_ascii(pdf_path,
                  grouping: Literal['block', 'line', 'word'] = 'line',
                  sort_vert=True,
@@ -116,10 +116,11 @@ def pdf_to_ascii(pdf_path,
         return ascii_lines
 
 
-class Phrase:
+class Phrase(_Slotted):
     """
     A collection of words that are spatially close.
     """
+    __slots__ = ('words', 'bbox', 'parent')
 
     def __init__(self, words: List[Word], parent=None):
         self.words = words
@@ -144,7 +145,9 @@ class Phrase:
         return c
 
 
-class Row():
+class Row(_Slotted):
+    __slots__ = ('text', 'elements', 'bbox', 'page')
+
     def __init__(self, text: str, elements: Dict[int, Word], page):
         self.text = text
         self.elements = elements
@@ -791,6 +791,87 @@ def get_field_detect_regex(mfr):
     return fields_detect
 
 
+def _split_top_level(pat: str):
+    """
+    Split `pat` at the `|` outside of groups and character classes.
+    Returns (alternatives, whether `pat` is one parenthesized group).
+    """
+    alts, depth, in_class, start, enclosed = [], 0, False, 0, pat.startswith('(')
+    i = 0
+    while i < len(pat):
+        c = pat[i]
+        if c == '\\':
+            i += 2
+            continue
+        if in_class:
+            in_class = c != ']'
+        elif c == '[':
+            in_class = True
+        elif c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0 and i < len(pat) - 1:
+                enclosed = False
+        elif c == '|' and depth == 0:
+            alts.append(pat[start:i])
+            start = i + 1
+        i += 1
+    alts.append(pat[start:])
+    return alts, enclosed
+
+
+def _detect_alternatives(pat: str) -> List[str]:
+    """Alternatives of a `rec()` pattern `(?P<detect>(A|B|..))`, the whole pattern if it doesn't split."""
+    head = '(?P<detect>'
+    if not (pat.startswith(head) and pat.endswith(')')):
+        return [pat]
+    alts, enclosed = _split_top_level(pat[len(head):-1])
+    if len(alts) == 1 and enclosed:
+        alts, _ = _split_top_level(alts[0][1:-1])
+    return alts
+
+
+class FieldDetector:
+    """
+    `get_field_detect_regex(mfr)` prepared for `detect_fields`: stop-words lower-cased once and the
+    alternatives of all field patterns merged into two regexes, the `^`-anchored ones (only tried at the
+    start of a line) and the floating ones. Most lines match no field; two searches reject them instead
+    of one search per field. Lines that pass are then checked field by field, in priority order, as before.
+    """
+
+    def __init__(self, fields_detect: dict):
+        self.fields = []
+        for field_sym, field_re in fields_detect.items():
+            stop_words = ()
+            if isinstance(field_re, tuple):
+                field_re, stop_words = field_re
+                assert not isinstance(stop_words, str)
+            self.fields.append((field_sym, field_re, tuple(sw.lower() for sw in stop_words)))
+
+        flags = {field_re.flags for _, field_re, _ in self.fields}
+        assert len(flags) == 1, flags
+        flags = flags.pop()
+        assert not flags & regex.MULTILINE  # `^` must only match at 0
+
+        anchored, floating = [], []
+        for _, field_re, _ in self.fields:
+            for alt in _detect_alternatives(field_re.pattern):
+                (anchored if alt.startswith('^') else floating).append(f'(?:{alt})')
+        self.anchored = regex.compile('|'.join(anchored), flags=flags) if anchored else None
+        self.floating = regex.compile('|'.join(floating), flags=flags) if floating else None
+
+    def any_field(self, s: str) -> bool:
+        """False if no field regex can match `s`."""
+        return bool((self.anchored is not None and self.anchored.match(s))
+                    or (self.floating is not None and self.floating.search(s)))
+
+
+@mem_cache(ttl='1min')
+def get_field_detector(mfr) -> FieldDetector:
+    return FieldDetector(get_field_detect_regex(mfr))
+
+
 any_unit = '|'.join(d.unit_regex for d in DIMENSIONS.values())
 any_head = '|'.join(d.head_regex for d in DIMENSIONS.values() if d.head_regex)
 
@@ -368,7 +368,8 @@ def get_symbol_font_unicode():
     return tsv
 
 
-@mem_cache(ttl='5min', synchronized=True)
+# most fonts have no default encoding (None), cache that too, this is called for every char
+@mem_cache(ttl='5min', synchronized=True, cache_none=True)
 @disk_cache(ttl='99d', hash_func_code=True)
 def get_font_default_enc(fontname) -> Optional[Dict[int, int]]:
     if not isinstance(fontname, str):
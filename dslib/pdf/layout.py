@@ -0,0 +1,239 @@
+"""
+Per-PDF page layout, computed once and shared by the extractors.
+
+Laying out a datasheet (pymupdf words/spans/drawings, pdfminer chars) is the dominant CPU cost after
+OCR, and the chart finder, curve/raster extractors, `apps/vpl_from_chart.py` and the v2 pipeline all
+used to redo it on the same PDF, some of them several times per page. `get_layout(path)` returns a
+`PdfLayout` with one `PageLayout` per page, stored column-wise:
+
+    words       (n, 4) float64 x0,y0,x1,y1 + word_text list + (n, 3) int32 block,line,word numbers
+    spans       (n, 4) float64 bbox + span_text list (non-empty `get_text('dict')` spans)
+    drawings    `page.get_drawings()` list
+    text        `page.get_text()`
+
+The pdfminer char layer (`get_char_layout`) is separate because only the v2 pipeline needs it:
+(n, 4) bboxes, sizes, a text list and per-char font ids in layout traversal order.
+
+Both layers are disk-cached with the PDF as file dependency and memoized in-process. The `page_*`
+helpers take a pymupdf page and fall back to a direct call for in-memory or modified documents.
+"""
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from dslib import get_logger
+from dslib.cache import disk_cache, mem_cache
+
+logger = get_logger()
+
+
+class PageLayout:
+    __slots__ = ('number', 'rect', 'text', 'words', 'word_text', 'word_pos', 'spans', 'span_text', 'drawings')
+
+    def __init__(self, number, rect, text, words, word_text, word_pos, spans, span_text, drawings):
+        self.number = number
+        self.rect: Tuple[float, float, float, float] = rect
+        self.text: str = text
+        self.words: np.ndarray = words
+        self.word_text: List[str] = word_text
+        self.word_pos: np.ndarray = word_pos
+        self.spans: np.ndarray = spans
+        self.span_text: List[str] = span_text
+        self.drawings: List[dict] = drawings
+
+    def __getstate__(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    def word_tuples(self) -> List[tuple]:
+        """Same tuples as `page.get_text('words')`."""
+        return [(x0, y0, x1, y1, t, b, l, w) for (x0, y0, x1, y1), t, (b, l, w) in
+                zip(self.words.tolist(), self.word_text, self.word_pos.tolist())]
+
+    def span_tuples(self) -> List[Tuple[str, Tuple[float, float, float, float]]]:
+        return [(t, tuple(bb)) for t, bb in zip(self.span_text, self.spans.tolist())]
+
+
+class PdfLayout:
+    def __init__(self, pages: List[PageLayout]):
+        self.pages = pages
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __getitem__(self, i) -> PageLayout:
+        return self.pages[i]
+
+    def __iter__(self) -> Iterator[PageLayout]:
+        return iter(self.pages)
+
+
+class CharPage:
+    __slots__ = ('number', 'mediabox', 'bbox', 'size', 'text', 'font', 'fonts')
+
+    def __init__(self, number, mediabox, bbox, size, text, font, fonts):
+        self.number = number
+        self.mediabox: Tuple[float, float, float, float] = mediabox
+        self.bbox: np.ndarray = bbox
+        self.size: np.ndarray = size
+        self.text: List[str] = text
+        self.font: np.ndarray = font  # index into `fonts`
+        self.fonts: List[str] = fonts
+
+    def __getstate__(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __setstate__(self, state):
+        for k, v in state.items():
+            setattr(self, k, v)
+
+    def __len__(self):
+        return len(self.text)
+
+    def chars(self) -> List['LayoutChar']:
+        fonts = self.fonts
+        return [LayoutChar(tuple(bb), sz, t, fonts[f]) for bb, sz, t, f in
+                zip(self.bbox.tolist(), self.size.tolist(), self.text, self.font.tolist())]
+
+
+class LayoutChar:
+    """Stand-in for pdfminer's LTChar (bbox, size, fontname, get_text())."""
+    __slots__ = ('bbox', 'size', '_text', 'fontname')
+
+    def __init__(self, bbox, size, text, fontname):
+        self.bbox = bbox
+        self.size = size
+        self._text = text
+        self.fontname = fontname
+
+    def get_text(self):
+        return self._text
+
+    def __repr__(self):
+        return 'LayoutChar(%r, %r)' % (self._text, self.bbox)
+
+
+def _page_layout(page) -> PageLayout:
+    raw = page.get_text('words')
+    words = np.array([w[:4] for w in raw], dtype=np.float64).reshape(len(raw), 4)
+    word_pos = np.array([w[5:8] for w in raw], dtype=np.int32).reshape(len(raw), 3)
+
+    spans = _page_spans(page)
+    span_text = [t for t, _ in spans]
+    span_bbox = [bb for _, bb in spans]
+
+    r = page.rect
+    return PageLayout(page.number, (r.x0, r.y0, r.x1, r.y1), page.get_text(),
+                      words, [w[4] for w in raw], word_pos,
+                      np.array(span_bbox, dtype=np.float64).reshape(len(span_bbox), 4), span_text,
+                      page.get_drawings())
+
+
+@disk_cache(ttl='30d', file_dependencies=[0], salt='v02')
+def _pdf_layout(path: str) -> PdfLayout:
+    import pymupdf
+    with pymupdf.open(path) as doc:
+        return PdfLayout([_page_layout(page) for page in doc])
+
+
+def _file_key(layer, path, *args, **kwargs):
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    return (__name__, layer, path, st.st_mtime_ns, st.st_size) + args + tuple(sorted(kwargs.items()))
+
+
+@mem_cache(ttl='10min', key_func=lambda path: _file_key('pages', path))
+def get_layout(path: str) -> PdfLayout:
+    return _pdf_layout(path)
+
+
+def _iter_lt_chars(layout):
+    from pdfminer.layout import LTChar
+    stack = [layout]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, LTChar):
+            yield obj
+        elif hasattr(obj, '__iter__'):
+            stack.extend(reversed(list(obj)))
+
+
+@disk_cache(ttl='30d', file_dependencies=[0], salt='v01')
+def _char_layout(path: str, max_pages: int, char_margin: float, line_overlap: float) -> List[CharPage]:
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LAParams
+
+    laparams = LAParams(line_overlap=line_overlap, char_margin=char_margin, line_margin=0.5, all_texts=True)
+    pages = []
+    for num, lt_page in enumerate(extract_pages(path, maxpages=max_pages, laparams=laparams)):
+        chars = list(_iter_lt_chars(lt_page))
+        font_ids: Dict[str, int] = {}
+        pages.append(CharPage(
+            num, tuple(lt_page.mediabox) if hasattr(lt_page, 'mediabox') else (0, 0, 612, 792),
+            np.array([c.bbox for c in chars], dtype=np.float64).reshape(len(chars), 4),
+            np.array([c.size for c in chars], dtype=np.float64),
+            [c.get_text() for c in chars],
+            np.array([font_ids.setdefault(c.fontname, len(font_ids)) for c in chars], dtype=np.int32),
+            list(font_ids)))
+    return pages
+
+
+@mem_cache(ttl='10min', key_func=lambda *a, **kw: _file_key('chars', *a, **kw))
+def get_char_layout(path: str, max_pages: int = 0, char_margin: float = 2.0,
+                    line_overlap: float = 0.3) -> List[CharPage]:
+    """pdfminer chars per page, in the traversal order of a layout with the given LAParams."""
+    return _char_layout(path, max_pages, char_margin, line_overlap)
+
+
+def _cached_page(page) -> Optional[PageLayout]:
+    """Layout of a page of a saved, unmodified PDF, else None."""
+    try:
+        doc = page.parent
+        if not doc.name or doc.is_dirty or not os.path.isfile(doc.name):
+            return None
+        return get_layout(doc.name)[page.number]
+    except Exception as e:
+        logger.warning('page layout of %s p%s unavailable, reading the page directly: %r',
+                       getattr(page.parent, 'name', None), page.number, e)
+        return None
+
+
+def page_words(page) -> List[tuple]:
+    """`page.get_text('words')`"""
+    pl = _cached_page(page)
+    return pl.word_tuples() if pl is not None else page.get_text('words')
+
+
+def page_spans(page) -> List[Tuple[str, Tuple[float, float, float, float]]]:
+    """(stripped text, bbox) of the non-empty spans of `page.get_text('dict')`"""
+    pl = _cached_page(page)
+    if pl is not None:
+        return pl.span_tuples()
+    return _page_spans(page)
+
+
+def _page_spans(page):
+    spans = []
+    for block in page.get_text('dict')['blocks']:
+        for line in block.get('lines', ()):
+            for span in line['spans']:
+                t = span['text'].strip()
+                if t:
+                    spans.append((t, tuple(span['bbox'])))
+    return spans
+
+
+def page_drawings(page) -> List[dict]:
+    """`page.get_drawings()`"""
+    pl = _cached_page(page)
+    return pl.drawings if pl is not None else page.get_drawings()
+
+
+def page_text(page) -> str:
+    """`page.get_text()`"""
+    pl = _cached_page(page)
+    return pl.text if pl is not None else page.get_text()
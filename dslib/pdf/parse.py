@@ -14,10 +14,11 @@ import timeout_decorator
 from dslib.cache import disk_cache
 from dslib.field import Field, DatasheetFields
 from dslib.pdf import expr
-from dslib.pdf.expr import get_field_detect_regex, date_regexs, months_short
+from dslib.pdf.expr import get_field_detect_regex, get_field_detector, date_regexs, months_short
 from dslib.pdf.pdf2txt import strip_no_print_latin, ocr_post_subs, whitespaces_to_space, \
     whitespaces_remove, normalize_text, ocr_strip_string, whitespace_to_space
-from dslib.pdf.pipeline import convertapi, pdf2pdf
+from dslib.pdf.pipeline import convertapi, pdf2pdf, select_ocr_method
+from dslib.trace import skip_stage, trace_stage
 
 pymupdf.TOOLS.mupdf_display_errors(False)
 
@@ -351,7 +352,7 @@ def ocr_pdf(pdf_path, method='r600_ocrmypdf'):
     return out_path
 
 
-@disk_cache(ttl='999d', file_dependencies=[0], salt=(regex_ver_salt, 'v04'), ignore_missing_inp_paths=True,
+@disk_cache(ttl='999d', file_dependencies=[0], salt=(regex_ver_salt, 'v06'), ignore_missing_inp_paths=True,
             hash_func_code=True)
 def parse_datasheet(pdf_path=None, mfr=None, mpn=None,
                     tabular_pre_methods=None,
@@ -374,12 +375,16 @@ def parse_datasheet(pdf_path=None, mfr=None, mpn=None,
     if not mpn:
         mpn = os.path.basename(pdf_path).split('.')[0]
 
-    pdf_text, meta = extract_text(pdf_path, try_ocr=False, auto_decrypt=True)
+    with trace_stage('extract_text'):
+        pdf_text, meta = extract_text(pdf_path, try_ocr=False, auto_decrypt=True)
 
     if not validate_datasheet_text(mfr, mpn, pdf_text) or force_ocr:
         methods = ['gs', 'fix_font_enc']  # 'qpdf_decrypt']  # 'r400_ocrmypdf'
         if not no_ocr:
-            methods += ['r600_ocrmypdf', ]  # 'ocrmypdf_redo', 'ocrmypdf_r400',
+            # OCR only the image-only pages of mixed documents first, whole document if that isn't enough
+            ocr_method = select_ocr_method(pdf_path, dpi=600)
+            methods += [ocr_method] if ocr_method == 'r600_ocrmypdf' else [ocr_method, 'r600_ocrmypdf']
+            # 'ocrmypdf_redo', 'ocrmypdf_r400',
 
             # if not pdf_text:
             #    methods.remove('ocrmypdf_redo')
@@ -388,9 +393,10 @@ def parse_datasheet(pdf_path=None, mfr=None, mpn=None,
         for method in methods:
             try:
                 out_path = pdf_path + '.' + method + '.pdf'
-                pdf2pdf(pdf_path, out_path, method)
+                with trace_stage('pdf2pdf:' + method, ocr='ocr' in method):
+                    pdf2pdf(pdf_path, out_path, method)
 
-                pdf_text, _ = extract_text(out_path, try_ocr=False)
+                    pdf_text, _ = extract_text(out_path, try_ocr=False)
 
                 if not validate_datasheet_text(mfr, mpn, pdf_text):
                     print(pdf_path, 'text extraction error using', method)
@@ -421,23 +427,27 @@ def parse_datasheet(pdf_path=None, mfr=None, mpn=None,
                          )
 
     from dslib.pdf.sheet import read_sheet
-    fields = read_sheet(pdf_path).all_fields()
-    method = 'r600_ocrmypdf'
-    if not fields:
-        f2 = pdf_path + '.' + method + '.pdf' if method != 'nop' else pdf_path
-        pdf2pdf(pdf_path, f2, method)
-        fields = read_sheet(f2).all_fields()
 
-    ds.add_multiple(fields, ['read_sheet'])
+    plan = ParsePlan(need_symbols)
 
-    # Vpl
-    if not math.isfinite(ds.get_max_or_min_or_typ('Vpl')):
-        ds.add_multiple(read_charts(pdf_path), ['read_charts'])
+    # stages run cheapest first, their fields are added to `ds` in priority order below (first value wins)
+    with trace_stage('extract_fields_from_text') as st:
+        txt_fields = extract_fields_from_text(pdf_text, mfr=mfr, pdf_path=pdf_path, verbose=False).all_fields()
+        st.fields = len(txt_fields)
+    plan.resolve(txt_fields)
 
-    if need_symbols:
-        subsctract_needed_symbols(need_symbols, ds.keys())
-    else:
-        need_symbols = None
+    with trace_stage('read_sheet') as st:
+        sheet_fields = read_sheet(pdf_path).all_fields()
+        st.fields = len(sheet_fields)
+    plan.resolve(sheet_fields)
+
+    # Vpl (chart values outrank the text fields, so only read_sheet can make the charts unnecessary)
+    chart_fields = []
+    if not any(f.symbol == 'Vpl' and math.isfinite(f.typ_or_max_or_min) for f in sheet_fields):
+        with trace_stage('read_charts') as st:
+            chart_fields = read_charts(pdf_path)
+            st.fields = len(chart_fields)
+        plan.resolve(chart_fields)
 
     if tabular_pre_methods is None:
         # assert not tabular_pre_methods
@@ -445,30 +455,57 @@ def parse_datasheet(pdf_path=None, mfr=None, mpn=None,
                                'r600_ocrmypdf',  # IPB027N10N3
                                )  # 'cups',
 
-    try:
-        # if verbose:
-        # print(pdf_path, 'tabular read ...  need=', need_symbols)
-        tabular_ds = tabula_read(pdf_path, pre_process_methods=tabular_pre_methods, need_symbols=need_symbols)
-        if not tabular_ds:
-            warnings.warn('tabula_read(%r) failed' % pdf_path)
-            # raise NoTabularData(pdf_path)
-        if tabular_ds:
-            ds.add_multiple(tabular_ds.all_fields())
-    except NoTabularData:
-        pass
-    except (LookupError, AttributeError, TimeoutError):
-        raise
-    except Exception as e:
-        print(pdf_path, 'tabula error', type(e).__name__, e)
-        ds.errors.append('tabula error {!r}'.format(e))
-        # raise
+    # tabula outranks the text fields too: it must still look for symbols only the text has resolved
+    tabula_need = None
+    if need_symbols is not None:
+        tabula_need = subsctract_needed_symbols(set(need_symbols), {f.symbol for f in sheet_fields + chart_fields},
+                                                copy=True)
+
+    tabular_fields = []
+    if plan.wants('tabula_read'):
+        try:
+            # if verbose:
+            # print(pdf_path, 'tabular read ...  need=', need_symbols)
+            with trace_stage('tabula_read') as st:
+                tabular_ds = tabula_read(pdf_path, pre_process_methods=tabular_pre_methods,
+                                         need_symbols=tabula_need or None)
+                tabular_fields = tabular_ds.all_fields() if tabular_ds else []
+                st.fields = len(tabular_fields)
+            if not tabular_ds:
+                warnings.warn('tabula_read(%r) failed' % pdf_path)
+                # raise NoTabularData(pdf_path)
+        except NoTabularData:
+            pass
+        except (LookupError, AttributeError, TimeoutError):
+            raise
+        except Exception as e:
+            print(pdf_path, 'tabula error', type(e).__name__, e)
+            ds.errors.append('tabula error {!r}'.format(e))
+            # raise
+        plan.resolve(tabular_fields)
+
+    if not sheet_fields and plan.wants('read_sheet:r600_ocrmypdf'):
+        # image-only pages of mixed documents first, whole document if that isn't enough
+        ocr_method = select_ocr_method(pdf_path, dpi=600)
+        for method in [ocr_method] if ocr_method == 'r600_ocrmypdf' else [ocr_method, 'r600_ocrmypdf']:
+            f2 = pdf_path + '.' + method + '.pdf'
+            with trace_stage('pdf2pdf:' + method, ocr=True):
+                pdf2pdf(pdf_path, f2, method)
+            with trace_stage('read_sheet:' + method) as st:
+                sheet_fields = read_sheet(f2).all_fields()
+                st.fields = len(sheet_fields)
+            if sheet_fields:
+                break
+        plan.resolve(sheet_fields)
 
-    txt_fields = extract_fields_from_text(pdf_text, mfr=mfr, pdf_path=pdf_path, verbose=False)
-    ds.add_multiple(txt_fields.all_fields())
+    ds.add_multiple(sheet_fields, ['read_sheet'])
+    ds.add_multiple(chart_fields, ['read_charts'])
+    ds.add_multiple(tabular_fields)
+    ds.add_multiple(txt_fields)
     # TODO do extract_fields_from_text again afet raster_ocr
 
     if not ds:
-        if not force_ocr:
+        if not force_ocr and plan.wants('force_ocr'):
             return parse_datasheet(pdf_path, mfr, mpn, tabular_pre_methods=tabular_pre_methods,
                                    need_symbols=need_symbols, force_ocr=True)
         raise NoTabularData(pdf_path)
@@ -476,6 +513,29 @@ def parse_datasheet(pdf_path=None, mfr=None, mpn=None,
     return ds
 
 
+class ParsePlan:
+    """
+    Needed symbols still missing during `parse_datasheet`. Without `need_symbols` (None) every stage runs.
+    With a set, the expensive stages (tabula pre-processing, OCR) are skipped once all of it is resolved.
+    A tuple in `need_symbols` is resolved by any one of its symbols (see `subsctract_needed_symbols`).
+    """
+
+    def __init__(self, need_symbols: Optional[set]):
+        self.missing = None if need_symbols is None else set(need_symbols)
+        self.skipped = []
+
+    def resolve(self, fields: List[Field]):
+        if self.missing:
+            subsctract_needed_symbols(self.missing, {f.symbol for f in fields})
+
+    def wants(self, stage: str) -> bool:
+        if self.missing is None or self.missing:
+            return True
+        self.skipped.append(stage)
+        skip_stage(stage)
+        return False
+
+
 try:
     import jpype
 
@@ -499,12 +559,12 @@ def tabula_pdf_dataframes(pdf_path=None):
 
     dfs = []
 
-    from dslib.pdf.tabular import tabula_browser, NoTextInPdfError
+    from dslib.pdf.tabular import tabula_tables, NoTextInPdfError
 
     last_e = None
 
     try:
-        dfs += tabula_browser(pdf_path)
+        dfs += tabula_tables(pdf_path)
     except TimeoutError:
         raise
     except NoTextInPdfError as e:
@@ -514,7 +574,7 @@ def tabula_pdf_dataframes(pdf_path=None):
     except Exception as e:
         last_e = e
         print(traceback.format_exc())
-        print('tabula_browser error', e)
+        print('tabula_tables error', e)
         # '/Users/fab/dev/pv/pwr-mosfet-lib/datasheets/nxp/PSMN3R9-100YSFX.pdf'
         #
 
@@ -723,13 +783,40 @@ def detect_fields(mfr, strings: List[Union[str, float]], multi=False) -> Union[
     # strings = [whitespace_to_space(s) for s in strings]
     strings = [whitespace_to_space(str(s)).lower() for s in strings]
 
+    detector = get_field_detector(mfr)
+    # one scan per string, skips strings no field regex can match
+    candidates = [i for i, s in enumerate(strings) if len(s) <= 80 and detector.any_field(s)]
+    detected = []
+
+    if candidates:
+        for field_sym, field_re, stop_words in detector.fields:
+            for i in candidates:
+                s = strings[i]
+
+                if stop_words and any(sw in s for sw in stop_words):
+                    continue
+
+                m = field_re.search(s)
+
+                if m:
+                    ds = DetectedSymbol(i, m, field_sym)
+                    if multi:
+                        detected.append(ds)
+                    else:
+                        return ds
+    return detected if multi else DetectedSymbol(0, None, None)
+
+
+def _detect_fields_sequential(mfr, strings: List[Union[str, float]], multi=False):
+    """Reference for `detect_fields`: every field regex against every string (tests and benchmark)."""
+    strings = [whitespace_to_space(str(s)).lower() for s in strings]
+
     fields_detect = get_field_detect_regex(mfr)
     detected = []
 
     for field_sym, field_re in fields_detect.items():
         if isinstance(field_re, tuple):
             stop_words = field_re[1]
-            assert not isinstance(stop_words, str)
             field_re = field_re[0]
         else:
             stop_words = []
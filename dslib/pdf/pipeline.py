@@ -1,7 +1,7 @@
 import logging
 import os
 import pathlib
-from typing import Literal, Union
+from typing import List, Literal, Optional, Union
 
 from dslib.cache import disk_cache
 from dslib.pdf.fix_encoding import fix_pdf_font_encoding
@@ -154,6 +154,71 @@ def rasterize_ocrmypdf(in_path, out_path, dpi):
     return ocrmypdf(int_file, out_path, rasterize=False)
 
 
+def pages_needing_ocr(pdf_path, min_chars=50) -> List[int]:
+    """
+    Indices of the pages without a usable text layer: fewer than `min_chars` non-whitespace chars but
+    with images or vector drawings (outlined text) to OCR.
+    """
+    import fitz
+    from dslib.pdf.layout import page_drawings, page_text
+
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for page in doc:
+            if len(''.join(page_text(page).split())) >= min_chars:
+                continue
+            if page.get_images(full=False) or page_drawings(page):
+                pages.append(page.number)
+    return pages
+
+
+def select_ocr_method(pdf_path, dpi=600) -> str:
+    """`r<dpi>_pages_ocrmypdf` if only some pages lack text, else the whole-document `r<dpi>_ocrmypdf`."""
+    try:
+        import fitz
+        with fitz.open(pdf_path) as doc:
+            n = len(doc)
+        flagged = pages_needing_ocr(pdf_path)
+    except Exception as e:
+        print(pdf_path, 'cannot select OCR pages', type(e).__name__, e)
+        return f'r{dpi}_ocrmypdf'
+    return f'r{dpi}_pages_ocrmypdf' if 0 < len(flagged) < n else f'r{dpi}_ocrmypdf'
+
+
+def rasterize_ocrmypdf_pages(in_path, out_path, dpi, pages: Optional[List[int]] = None):
+    """
+    Rasterize and OCR only `pages` (default `pages_needing_ocr`) and splice them back into a copy of the
+    document, the other pages keep their original text layer. Falls back to `rasterize_ocrmypdf` when no
+    page (or every page) is flagged.
+    """
+    import fitz
+
+    if pages is None:
+        pages = pages_needing_ocr(in_path)
+
+    with fitz.open(in_path) as doc:
+        n = len(doc)
+        pages = sorted(set(pages))
+        if not pages or len(pages) == n:
+            return rasterize_ocrmypdf(in_path, out_path, dpi)
+
+        sub_file = in_path + '.ocr_pages.pdf'
+        with fitz.open(in_path) as sub:
+            sub.select(pages)
+            sub.save(sub_file, garbage=3, deflate=True)
+
+    sub_ocr_file = sub_file + f'.r{int(dpi)}_ocrmypdf.pdf'
+    rasterize_ocrmypdf(sub_file, sub_ocr_file, dpi)
+
+    print('ocr pages', [i + 1 for i in pages], 'of', n, in_path)
+    with fitz.open(in_path) as doc, fitz.open(sub_ocr_file) as ocr:
+        for j, i in enumerate(pages):
+            doc.insert_pdf(ocr, from_page=j, to_page=j, start_at=i)
+            doc.delete_page(i + 1)
+        doc.save(out_path, garbage=3, deflate=True)
+    assert os.path.isfile(out_path)
+
+
 # @disk_cache(ttl='99d', file_dependencies=[0], out_files=[1], salt='v02')
 def pdf2pdf(in_path, out_path, method):
     # import fitz
@@ -217,6 +282,10 @@ def pdf2pdf(in_path, out_path, method):
         r600_ocrmypdf=lambda: rasterize_ocrmypdf(in_path, out_path, dpi=600),
         r800_ocrmypdf=lambda: rasterize_ocrmypdf(in_path, out_path, dpi=800),
 
+        # only the pages without a text layer, see select_ocr_method()
+        r400_pages_ocrmypdf=lambda: rasterize_ocrmypdf_pages(in_path, out_path, dpi=400),
+        r600_pages_ocrmypdf=lambda: rasterize_ocrmypdf_pages(in_path, out_path, dpi=600),
+
         img2table_r400=lambda: img2table_ocr(in_path, out_path, dpi=400),
 
         ocrmypdf_redo=lambda: ocrmypdf(in_path, out_path, rasterize=False),
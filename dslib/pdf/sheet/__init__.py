@@ -340,7 +340,7 @@ def _is_valid_value(mtm, s):
 
     return False
 
-@mem_cache(ttl='1h')
+@mem_cache(ttl='1h', cache_none=True)
 def get_symbol_unit_end(symbol:str) -> re.Pattern:
     dim: Dimension = DIMENSIONS.get(symbol[0])
     if dim:
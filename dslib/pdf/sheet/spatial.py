@@ -1,6 +1,6 @@
-from typing import List, Dict, Literal
+from typing import List, Dict, Literal, Tuple
 
-import pandas as pd
+import numpy as np
 
 from dslib.pdf.ascii import Row
 from dslib.pdf.tree import Block, GraphicBlock
@@ -25,8 +25,22 @@ def take(gen, n: int) -> list:
     return l
 
 
+def _overlap_rel(bbox, boxes: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """Vectorized `Bbox.h_overlap_rel` (lo, hi = 0, 2) / `Bbox.v_overlap_rel` (1, 3) of bbox with each row of
+    the (n, 4) `boxes`."""
+    a_lo, a_hi = bbox[lo], bbox[hi]
+    b_lo, b_hi = boxes[:, lo], boxes[:, hi]
+    ov = np.where((b_lo <= a_hi) & (a_lo <= b_hi), np.minimum(np.abs(a_lo - b_hi), np.abs(a_hi - b_lo)), 0.)
+    ext = np.minimum(a_hi - a_lo, b_hi - b_lo)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ext != 0, ov / np.where(ext != 0, ext, 1.), 0.)
+
+
 class SpatialQuery():
     # see pdfminer.utils.Plane
+    # Blocks are packed once into an (n, 4) bbox array and, per bbox edge, the edge values in ascending order
+    # with the matching block indices. A cast is two binary searches, ray overlap filtering is vectorized over
+    # the cast range.
 
     def __init__(self, blocks: List[Block], graphic_max_area=200):
         self.blocks = []
@@ -41,20 +55,26 @@ class SpatialQuery():
                 raise ValueError(repr(b))
         del blocks
 
-        self.by_bbox_edge: Dict[Literal, pd.Series] = dict()
+        n = len(self.blocks)
+        self.bboxes = np.array([[b.bbox.x1, b.bbox.y1, b.bbox.x2, b.bbox.y2] for b in self.blocks],
+                               dtype=np.float64).reshape(n, 4)
 
-        for dir in ('x1', 'x2', 'y1', 'y2'):
-            b = []
-            idx = []
-            for block in self.blocks:
-                idx.append(block.bbox[dir])
-                b.append(block)
-            s = pd.Series(b, index=idx)
-            s.sort_index(inplace=True)
-            self.by_bbox_edge[dir] = s
+        self.by_bbox_edge: Dict[Literal, Tuple[np.ndarray, np.ndarray]] = dict()
+        for j, dir in enumerate(('x1', 'y1', 'x2', 'y2')):
+            edge = self.bboxes[:, j]
+            # same order of equal edges as the pandas sort_index() this replaced (no-op if already sorted)
+            order = np.arange(n) if n < 2 or (edge[1:] >= edge[:-1]).all() else np.argsort(edge, kind='quicksort')
+            self.by_bbox_edge[dir] = (edge[order], order)
+
+    def _cast_indices(self, dir, start, end) -> np.ndarray:
+        edge, order = self.by_bbox_edge[dir]
+        lo, hi = (start, end) if start <= end else (end, start)
+        idx = order[np.searchsorted(edge, lo, 'left'):np.searchsorted(edge, hi, 'right')]
+        return idx if start <= end else idx[::-1]
 
     def cast(self, dir, start, end):
         """
+        Blocks with bbox edge `dir` in [start, end] (inclusive), ordered from start to end.
 
         dir: y2: down
 
@@ -63,12 +83,7 @@ class SpatialQuery():
         :param end:
         :return:
         """
-        if start <= end:
-            v = self.by_bbox_edge[dir][start:end]
-        else:
-            v = self.by_bbox_edge[dir][end:start].iloc[::-1]
-
-        return list(v)
+        return [self.blocks[i] for i in self._cast_indices(dir, start, end)]
 
     def ray(self, dir, bbox, length, min_overlap, limit=10, start_from_bbox_center=False, ignore=None, types=None):
         assert length > 0
@@ -79,10 +94,11 @@ class SpatialQuery():
         if start_from_bbox_center:
             start = (start + bbox[dir]) * .5
 
-        els = self.cast(dir, start, start + length * (3 - 2 * d))
+        idx = self._cast_indices(dir, start, start + length * (3 - 2 * d))
 
-        ol_fn = getattr(bbox, 'v_overlap_rel' if dir[0] == 'x' else 'h_overlap_rel')
-        els_filt = filter(lambda el: ol_fn(el.bbox) > min_overlap, els)
+        # v_overlap_rel for horizontal rays, h_overlap_rel for vertical ones
+        ol = _overlap_rel(bbox, self.bboxes[idx], *((1, 3) if dir[0] == 'x' else (0, 2)))
+        els_filt = (self.blocks[i] for i in idx[ol > min_overlap])
 
         if ignore:
             els_filt = filter(lambda el: bbox not in ignore, els_filt)
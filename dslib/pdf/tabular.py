@@ -1,5 +1,6 @@
 import json
 import logging
+import os
 import random
 import re
 import sys
@@ -7,7 +8,7 @@ import threading
 import time
 import warnings
 from collections import deque
-from typing import List
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
 
 import backoff
 import pandas as pd
@@ -36,6 +37,36 @@ def tabula_is_running():
         return False
 
 
+def jvm_available():
+    """JPype and a java runtime for the in-process backend (`tabula_jvm`)."""
+    import shutil
+    try:
+        import jpype  # noqa: F401
+    except ImportError:
+        return False
+    return bool(os.environ.get('JAVA_HOME') or shutil.which('java'))
+
+
+def tabula_backend() -> str:
+    """'jvm' or 'web', `DSLIB_TABULA_BACKEND` overrides the default (jvm if available)."""
+    backend = os.environ.get('DSLIB_TABULA_BACKEND', '').lower()
+    if backend:
+        assert backend in {'jvm', 'web'}, backend
+        return backend
+    return 'jvm' if jvm_available() else 'web'
+
+
+def tabula_available():
+    return jvm_available() if tabula_backend() == 'jvm' else tabula_is_running()
+
+
+def tabula_tables(pdf_path, pad=2) -> List[pd.DataFrame]:
+    """Detect and extract all tables with the configured backend."""
+    if tabula_backend() == 'jvm':
+        return tabula_jvm(pdf_path, pad=pad)
+    return tabula_browser(pdf_path, pad=pad)
+
+
 tabula_browser_concurrency = 5
 
 #@disk_cache(ttl='999d', file_dependencies=[0], salt='v02', hash_func_code=True)
@@ -165,3 +196,178 @@ def tabula_browser(pdf_path, pad=2) -> List[pd.DataFrame]:
             # print(pdf_path, 'tabula browser extracted', len(dfs), 'tables with', sum(len(df) for df in dfs), 'rows')
 
             return dfs
+
+
+class _TabulaJvm:
+    """
+    tabula-java running in this process' JVM (JPype). Does what the tabula web app does for a PDF: detect
+    table areas per page (Nurminen) and extract each padded area with the stream ('original') and the
+    lattice ('spreadsheet') algorithm.
+    """
+
+    def __init__(self):
+        import jpype
+        import jpype.imports  # noqa: F401
+        from tabula.backend import jar_path
+
+        if not jpype.isJVMStarted():
+            jpype.addClassPath(jar_path())
+            jpype.startJVM('-Djava.awt.headless=true',
+                           '-Dorg.slf4j.simpleLogger.defaultLogLevel=off',
+                           '-Dorg.apache.commons.logging.Log=org.apache.commons.logging.impl.NoOpLog',
+                           convertStrings=False)
+
+        from java.io import File
+        from org.apache.pdfbox.pdmodel import PDDocument
+        from technology.tabula import ObjectExtractor
+        from technology.tabula.detectors import NurminenDetectionAlgorithm
+        from technology.tabula.extractors import BasicExtractionAlgorithm, SpreadsheetExtractionAlgorithm
+
+        self.File = File
+        self.PDDocument = PDDocument
+        self.ObjectExtractor = ObjectExtractor
+        self.detector = NurminenDetectionAlgorithm
+        self.algorithms = (('original', BasicExtractionAlgorithm), ('spreadsheet', SpreadsheetExtractionAlgorithm))
+
+    def extract(self, pdf_path, pages: Optional[Sequence[int]] = None,
+                areas: Optional[Sequence[Tuple[int, float, float, float, float]]] = None,
+                pad=2) -> List[Tuple[str, List[List[str]]]]:
+        """
+        :param pages: 1-based page numbers to detect tables on, default all
+        :param areas: (page, top, left, bottom, right) table areas, skips detection
+        :return: [(extraction method, rows of cell texts)]
+        """
+        doc = self.PDDocument.load(self.File(pdf_path))
+        oe = None
+        try:
+            oe = self.ObjectExtractor(doc)
+            if areas is None:
+                page_nums = list(pages or range(1, doc.getNumberOfPages() + 1))
+            else:
+                page_nums = sorted({a[0] for a in areas})
+
+            out = []
+            has_text = False
+            for p in page_nums:
+                page = oe.extract(p)
+                has_text = has_text or not page.getText().isEmpty()
+                if areas is None:
+                    rects = [(r.getTop(), r.getLeft(), r.getBottom(), r.getRight())
+                             for r in self.detector().detect(page)]
+                else:
+                    rects = [a[1:] for a in areas if a[0] == p]
+                for top, left, bottom, right in rects:
+                    area = page.getArea(float(top - pad), float(left - pad), float(bottom + pad), float(right + pad))
+                    for method, algorithm in self.algorithms:
+                        for table in algorithm().extract(area):
+                            out.append((method, [[str(cell.getText()) for cell in row] for row in table.getRows()]))
+        finally:
+            if oe is not None:
+                oe.close()
+            doc.close()
+
+        if page_nums and not has_text:
+            raise NoTextInPdfError('no text data is contained in ' + pdf_path)
+        return out
+
+
+_worker_jvm: Optional[_TabulaJvm] = None
+
+
+def _jvm_extract(pdf_path, pages, areas, pad):
+    """Pool task, the JVM is started once per worker process and kept."""
+    global _worker_jvm
+    if _worker_jvm is None:
+        _worker_jvm = _TabulaJvm()
+    try:
+        return _worker_jvm.extract(pdf_path, pages=pages, areas=areas, pad=pad)
+    except NoTextInPdfError:
+        raise
+    except Exception as e:
+        # java exceptions don't pickle
+        raise RuntimeError('%s: %s' % (type(e).__name__, e)) from None
+
+
+_jvm_local_lock = threading.Lock()
+
+
+def _jvm_slot(max_time=900):
+    """Lock one of the `tabula_jvm_workers()` machine-wide JVM slots. Tries every slot without blocking (in
+    random order, so workers spread out) and waits only while all of them are taken."""
+    n = tabula_jvm_workers()
+    t0 = time.time()
+    delay = .05
+    while True:
+        for slot in random.sample(range(1, n + 1), n):
+            try:
+                return acquire_file_lock(f'data/.tabula_jvm_{slot}.lock', kill_holder=False, max_time=0)
+            except (TimeoutError, ValueError):  # ValueError: holder has not written its pid yet
+                pass
+        if time.time() - t0 > max_time:
+            raise TimeoutError('all %d tabula JVM slots busy for %ds' % (n, max_time))
+        time.sleep(delay)
+        delay = min(delay * 2, 1.)
+
+
+def _jvm_extract_local(pdf_path, pages, areas, pad):
+    """`_jvm_extract` in this process, holding one of `tabula_jvm_workers()` machine-wide slots."""
+    with _jvm_local_lock:
+        with _jvm_slot():
+            return _jvm_extract(pdf_path, pages, areas, pad)
+
+
+_jvm_pool = None
+_jvm_pool_lock = threading.Lock()
+
+
+def tabula_jvm_workers() -> int:
+    return int(os.environ.get('DSLIB_TABULA_WORKERS', 4))
+
+
+def tabula_jvm_pool():
+    """Workers with one JVM each, `tabula_jvm_workers()` (`DSLIB_TABULA_WORKERS`, default 4). Workers are
+    never recycled, a JVM start costs ~1s."""
+    global _jvm_pool
+    with _jvm_pool_lock:
+        if _jvm_pool is None:
+            import atexit
+            from dslib.workers import WorkerPool
+            _jvm_pool = WorkerPool(max_workers=tabula_jvm_workers(), max_tasks_per_child=None,
+                                   preload=('dslib.pdf.tabular',))
+            atexit.register(_jvm_pool.shutdown)
+        return _jvm_pool
+
+
+def _to_dataframes(tables: List[Tuple[str, List[List[str]]]]) -> List[pd.DataFrame]:
+    dfs = []
+    for method, rows in tables:
+        df = pd.DataFrame(rows)
+        # same source names as tabula_browser, the algorithms are the same
+        df.index.name = 'tabula_web_' + method
+        dfs.append(df)
+    return dfs
+
+
+def tabula_jvm_many(requests_: Dict[Hashable, tuple], pad=2) -> Dict[Hashable, List[pd.DataFrame]]:
+    """
+    Extract a batch on the JVM pool, one task per PDF.
+    In a worker process (e.g. `parse_datasheet` running on `shared_worker_pool`) the batch runs on the
+    worker's own JVM instead, so the parse workers don't each start a JVM pool. Like `tabula_browser`, at
+    most `tabula_jvm_workers()` of them extract at a time (file lock slots).
+    :param requests_: key -> (pdf_path, pages, areas), see `_TabulaJvm.extract`
+    """
+    import multiprocessing
+    if multiprocessing.parent_process() is not None:
+        res = {k: _jvm_extract_local(path, pages, areas, pad) for k, (path, pages, areas) in requests_.items()}
+    else:
+        res = tabula_jvm_pool().map_jobs({k: (_jvm_extract, path, pages, areas, pad)
+                                          for k, (path, pages, areas) in requests_.items()}, progress=False)
+    return {k: _to_dataframes(tables) for k, tables in res.items()}
+
+
+@disk_cache(ttl='999d', file_dependencies=[0], salt='v01')
+def tabula_jvm(pdf_path, pages: Optional[Tuple[int, ...]] = None,
+               areas: Optional[Tuple[Tuple[int, float, float, float, float], ...]] = None,
+               pad=2) -> List[pd.DataFrame]:
+    """In-process alternative to `tabula_browser`, same output."""
+    return tabula_jvm_many({0: (pdf_path, pages, areas)}, pad=pad)[0]
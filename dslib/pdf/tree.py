@@ -49,7 +49,28 @@ def has_custom_embed_enc(c, fontname, fonts_enc):
     return False
 
 
+class _Slotted:
+    """
+    Base of the layout primitives: `__slots__` instead of an instance dict (a page holds thousands of words and
+    bboxes), pickled and copied as a plain tuple of the slot values.
+    """
+    __slots__ = ()
+    _state_slots: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._state_slots = tuple(k for c in reversed(cls.__mro__) for k in c.__dict__.get('__slots__', ()))
+
+    def __getstate__(self):
+        return tuple(getattr(self, k, None) for k in self._state_slots)
+
+    def __setstate__(self, state):
+        for k, v in zip(self._state_slots, state):
+            setattr(self, k, v)
+
+
 class Bbox():
+    __slots__ = ('x1', 'y1', 'x2', 'y2')
 
     def __repr__(self):
         r2 = lambda x: round(x, 2)
@@ -71,12 +92,21 @@ class Bbox():
         self.y1: float = y1
         self.x2: float = x2
         self.y2: float = y2
-        self.t = (self.x1, self.y1, self.x2, self.y2)
-        self.area = self.width * self.height
+
+    def __reduce__(self):
+        return Bbox, (self.x1, self.y1, self.x2, self.y2)
+
+    @property
+    def t(self):
+        return self.x1, self.y1, self.x2, self.y2
+
+    @property
+    def area(self):
+        return self.width * self.height
 
     def __getitem__(self, item):
-        if isinstance(item, str) and item in {'x1', 'y1', 'x2', 'y2'}:
-            return self.__dict__[item]
+        if isinstance(item, str) and item in Bbox.__slots__:
+            return getattr(self, item)
         assert isinstance(item, int), repr(item)
         return (self.x1, self.y1, self.x2, self.y2)[item]
 
@@ -140,8 +170,6 @@ class Bbox():
         self.y1 = b.y1
         self.x2 = b.x2
         self.y2 = b.y2
-        self.t = b.t
-        self.area = b.area
         return self
 
 
@@ -295,7 +323,8 @@ class Char:
         return self.c
 
 
-class Word:
+class Word(_Slotted):
+    __slots__ = ('index', 'bbox', 's', 'line_offset')
     Delimiter = ' '
 
     def __init__(self, index, bbox, s: str):
@@ -316,7 +345,9 @@ class Word:
         return round(self.bbox.width / len(self.s), 2)
 
 
-class Line:
+class Line(_Slotted):
+    __slots__ = ('index', 'words', 'bbox', '_dirty')
+
     def __init__(self, index, words: List[Word]):
         self.index = index
         self.words = words
@@ -349,7 +380,9 @@ class Line:
             self._dirty = False
 
 
-class Block():
+class Block(_Slotted):
+    __slots__ = ('index', 'bbox', 'page')
+
     def __init__(self, index: int, bbox, page: 'Page'):
         self.index = index
         self.bbox = Bbox(bbox)
@@ -357,6 +390,8 @@ class Block():
 
 
 class GraphicBlock(Block):
+    __slots__ = ('type', 'text')
+
     def __init__(self, index, bbox, page: 'Page', type: Literal['vector', 'image']):
         super().__init__(index, bbox, page)
         self.type = type
@@ -364,6 +399,8 @@ class GraphicBlock(Block):
 
 
 class TextBlock(Block):
+    __slots__ = ('lines', '_dirty')
+
     def __init__(self, block_num: int, bbox, lines: List[Line], page: 'Page'):
         super().__init__(block_num, bbox, page)
         self.lines = lines
@@ -388,7 +425,9 @@ class TextBlock(Block):
         pass
 
 
-class Page():
+class Page(_Slotted):
+    __slots__ = ('page_num', 'mediabox', 'cropbox')
+
     def __init__(self, page_num, mediabox, cropbox):
         self.page_num = page_num
         # self.blocks = blocks
@@ -425,13 +464,10 @@ class PDFPageInterpreter_NO_WS(PDFPageInterpreter):
             ctm: Matrix = MATRIX_IDENTITY,
     ) -> None:
         r = super().render_contents(resources, streams, ctm)
-        for obj in list(self.device.cur_item):
-            if isinstance(obj, LTChar):
-                c = obj.get_text()
-                if c.isspace():
-                    self.device.cur_item._objs.remove(obj)
-            elif isinstance(obj, LTAnno):
-                self.device.cur_item._objs.remove(obj)
+        # one pass, list.remove() per char was quadratic on dense pages
+        self.device.cur_item._objs = [
+            obj for obj in self.device.cur_item._objs
+            if not (isinstance(obj, LTAnno) or (isinstance(obj, LTChar) and obj.get_text().isspace()))]
         return r
 
 
@@ -0,0 +1,10 @@
+"""
+Imported once by the forkserver of `dslib.workers.WorkerPool`: loads the PDF stack and builds the
+lazy regex tables of dslib.pdf.expr, so every worker forked from the server starts warm instead of
+paying the imports and ~1.7 s of regex compilation itself.
+"""
+from dslib.pdf import expr
+from dslib.pdf import parse  # noqa: F401 (pymupdf, pandas, pdf2txt)
+
+for _name in expr._LAZY_TABLES:
+    getattr(expr, _name)
@@ -0,0 +1,391 @@
+"""Batched Lauritzen-Ma fit/predict over a whole parts catalog (fl4p/fetlib#37).
+
+dslib/qrr_model.py stays the scalar reference (a verbatim port of lm_diode.py, kept in
+lock-step). This module runs the SAME root-finding — same brackets, same bisection
+counts, same fail-loud checks — on numpy arrays, one element per part (or per
+operating point), so thousands of parts cost a few hundred array passes instead of
+a few hundred Python loops each:
+
+    fits = LMFitTable().fits(lm_inputs(specs, parts))       # persistent, see below
+    p = predict_fits(fits, IF=30.0, didt=[1e9, 3e9], Tj=100.0)   # (n_parts, n_points)
+
+Where the scalar function raises LMFitError, the batch result is NaN for that element
+and `error` carries the scalar message; `best_lm_fits` returns the LMFitError
+instance in place of the fit, so a consumer can still fail loud per part.
+
+`LMFitTable` persists best_lm_fit records keyed by the datasheet inputs, the
+calibration constants K_TRR / QRR_QOSS_FRACTION and a hash of the fit code, so a
+ranking run (dclib.thermal) only root-solves parts it has not seen before.
+The Tj exponent stamp (resolve_n_tau) is applied on read, it depends on the part,
+not on the datasheet numbers. `MosfetSpecs.Qrr_op` keeps its per-instance
+`_lm_fit_cache`: it caches the plain fit_lm / fit_lm_2pt fits at the operating
+point, not best_lm_fit records.
+"""
+import functools
+import hashlib
+import math
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from dslib import qrr_model
+from dslib.qrr_model import K_TRR, LMFitError, resolve_n_tau, tau_at_tj
+
+FitOrError = Union[dict, LMFitError]
+
+
+def _arrays(*values):
+    return np.broadcast_arrays(*(np.asarray(np.nan if v is None else v, dtype=np.float64) for v in values))
+
+
+def _fail(error, mask, msg):
+    """Record `msg(i)` for the elements of `mask` that have not failed before."""
+    for i in map(tuple, np.argwhere(mask & (error == None))):  # noqa: E711 (object array)
+        error[i] = msg(i)
+
+
+def _bisect(fn, lo, hi, n, active, rising):
+    """`n` bisection steps of fn on [lo, hi] per element, like the scalar loops."""
+    for _ in range(n):
+        mid = 0.5 * (lo + hi)
+        with np.errstate(all='ignore'):
+            below = fn(mid) < 0 if rising else fn(mid) > 0
+        lo = np.where(active & below, mid, lo)
+        hi = np.where(active & ~below, mid, hi)
+    return lo, hi
+
+
+def fit_lm_batch(Qrr, trr, IF, didt, tj_fit=25.0) -> dict:
+    """`qrr_model.fit_lm` on arrays (broadcast). Returns the fit_lm keys as arrays plus `error`
+    (object array, the LMFitError message or None); failed elements are NaN."""
+    Qrr, trr, IF, didt, tj_fit = _arrays(Qrr, trr, IF, didt, tj_fit)
+    error = np.full(Qrr.shape, None, dtype=object)
+    for nm, v in (("Qrr", Qrr), ("trr", trr), ("IF", IF), ("didt", didt)):
+        _fail(error, ~(np.isfinite(v) & (v > 0)),
+              lambda i, nm=nm, v=v: f"Lauritzen-Ma fit needs a positive finite {nm} (got {float(v[i])!r})")
+
+    a = didt
+    L = math.log(1.0 / K_TRR)
+    with np.errstate(all='ignore'):
+        A = (L - 2.0) / (2.0 * a * L)
+        B = trr / L
+        disc = B * B + 4.0 * A * Qrr
+        _fail(error, disc < 0, lambda i: f"no Lauritzen-Ma solution for Qrr={Qrr[i]*1e9:.1f}nC, "
+                                         f"trr={trr[i]*1e9:.1f}ns at di/dt={a[i]/1e6:.0f}A/us "
+                                         f"(negative discriminant)")
+        irrm = 2.0 * Qrr / (B + np.sqrt(disc))
+        _fail(error, irrm <= 0, lambda i: f"fitted IRRM<=0 for Qrr={Qrr[i]*1e9:.1f}nC, trr={trr[i]*1e9:.1f}ns")
+        ta = irrm / a
+        td = (trr - ta) / L
+        _fail(error, td <= 0, lambda i: (
+            f"datasheet trr={trr[i]*1e9:.1f}ns is shorter than the current-ramp time "
+            f"ta=IRRM/(di/dt)={ta[i]*1e9:.1f}ns implied by Qrr={Qrr[i]*1e9:.1f}nC at "
+            f"di/dt={a[i]/1e6:.0f}A/us — no Lauritzen-Ma (tau,TM) reproduces this pair. "
+            f"Check the Qrr/trr entries and dslib/qrr_conditions.py."))
+        t0 = (IF + irrm) / a
+
+    def f(tau):
+        return a * (tau - td) * (1.0 - np.exp(-t0 / tau)) - irrm
+
+    ok = error == None  # noqa: E711
+    lo = td * (1.0 + 1e-9)
+    hi = np.maximum(np.maximum(10.0 * td, 10.0 * t0), 1e-6)
+    for _ in range(61):  # 61 x4 steps, then the scalar gives up
+        with np.errstate(all='ignore'):
+            short = ok & (f(hi) < 0)
+        if not short.any():
+            break
+        hi = np.where(short, hi * 4.0, hi)
+    _fail(error, short, lambda i: "could not bracket the Lauritzen-Ma tau root")
+    ok = error == None  # noqa: E711
+
+    lo, hi = _bisect(f, lo, hi, 200, ok, rising=True)
+    with np.errstate(all='ignore'):
+        tau = np.where(ok, 0.5 * (lo + hi), np.nan)
+        TM = tau * td / (tau - td)
+
+    def out(v):
+        return np.where(ok, v, np.nan)
+
+    return dict(tau=tau, TM=TM, tau0=tau, irrm=out(irrm), td=out(td), ta=out(ta),
+                Qrr=Qrr, trr=trr, IF=IF, didt=a, tj_fit=tj_fit, error=error)
+
+
+def predict_batch(tau, TM, IF, didt) -> dict:
+    """`qrr_model.predict` on arrays (broadcast), NaN (and `error`) where the scalar raises."""
+    tau, TM, IF, didt = _arrays(tau, TM, IF, didt)
+    error = np.full(tau.shape, None, dtype=object)
+    for nm, v, lo_ok in (("tau", tau, False), ("TM", TM, False), ("IF", IF, True), ("didt", didt, False)):
+        _fail(error, ~(np.isfinite(v) & ((v > 0) | (lo_ok & (v == 0)))),
+              lambda i, nm=nm, v=v, lo_ok=lo_ok: f"predict needs a {'non-negative' if lo_ok else 'positive'} "
+                                                 f"finite {nm} (got {float(v[i])!r})")
+    a = didt
+    with np.errstate(all='ignore'):
+        td = tau * TM / (tau + TM)
+
+    def g(ir):
+        return a * (tau - td) * (1.0 - np.exp(-(IF + ir) / (a * tau))) - ir
+
+    ok = error == None  # noqa: E711
+    lo = np.zeros_like(tau)
+    with np.errstate(all='ignore'):
+        hi = np.maximum(1.0, 10.0 * a * tau)
+    for _ in range(61):
+        with np.errstate(all='ignore'):
+            wide = ok & (g(hi) > 0)
+        if not wide.any():
+            break
+        hi = np.where(wide, hi * 4.0, hi)
+    _fail(error, wide, lambda i: "could not bracket IRRM in predict()")
+    ok = error == None  # noqa: E711
+
+    lo, hi = _bisect(g, lo, hi, 200, ok, rising=False)
+    irrm = np.where(ok, 0.5 * (lo + hi), np.nan)
+    with np.errstate(all='ignore'):
+        qa = irrm * irrm / (2.0 * a)
+        qb = irrm * td
+        trr = irrm / a + td * math.log(1.0 / K_TRR)
+    return dict(irrm=irrm, Qrr=qa + qb, trr=trr, td=np.where(ok, td, np.nan), qa=qa, qb=qb, error=error)
+
+
+def fit_lm_2pt_batch(Qrr_lo, trr_lo, didt_lo, Qrr_hi, trr_hi, didt_hi, IF, tj_fit=25.0) -> dict:
+    """
+    `qrr_model.fit_lm_2pt` on arrays, rows already ordered (didt_lo < didt_hi) at the same IF
+    (see `_pick_2pt_rows`). Returns the fit_lm_2pt keys as arrays plus `error`.
+    """
+    Qrr_lo, trr_lo, didt_lo, Qrr_hi, trr_hi, didt_hi, IF, tj_fit = _arrays(
+        Qrr_lo, trr_lo, didt_lo, Qrr_hi, trr_hi, didt_hi, IF, tj_fit)
+    error = np.full(Qrr_lo.shape, None, dtype=object)
+
+    def err(q0):
+        fit = fit_lm_batch(Qrr_lo - q0, trr_lo, IF, didt_lo, tj_fit=tj_fit)
+        p = predict_batch(fit["tau"], fit["TM"], IF, didt_hi)
+        return p["Qrr"] - (Qrr_hi - q0), np.where(fit["error"] == None, p["error"], fit["error"])  # noqa: E711
+
+    lo = np.zeros_like(Qrr_lo)
+    hi = np.minimum(Qrr_lo, Qrr_hi) * 0.98
+    f_lo, e_lo = err(lo)
+    _fail(error, np.isnan(f_lo), lambda i: f"two-point fit: low row not LM-representable ({e_lo[i]})")
+
+    # walk hi back into range where the subtraction consumed the pair
+    f_hi = np.full_like(lo, np.nan)
+    pending = (error == None) & (hi > lo + 1e-12)  # noqa: E711
+    while pending.any():
+        f, _e = err(hi)
+        f_hi = np.where(pending, f, f_hi)
+        pending &= np.isnan(f)
+        hi = np.where(pending, hi * 0.85, hi)
+        pending &= hi > lo + 1e-12
+    with np.errstate(invalid='ignore'):
+        _fail(error, np.isnan(f_hi) | (f_lo * f_hi > 0), lambda i: (
+            "no LM-consistent capacitive offset q0 in [0, min(Qrr)) — the pair "
+            "is contamination-dominated or non-LM (Qrr ~flat/falling with di/dt)"))
+    ok = error == None  # noqa: E711
+
+    for _ in range(80):
+        mid = 0.5 * (lo + hi)
+        f_mid, _e = err(mid)
+        with np.errstate(invalid='ignore'):
+            left = np.isnan(f_mid) | (f_lo * f_mid <= 0)
+        hi = np.where(ok & left, mid, hi)
+        lo = np.where(ok & ~left, mid, lo)
+        f_lo = np.where(ok & ~left, f_mid, f_lo)
+
+    q0 = np.where(ok, 0.5 * (lo + hi), np.nan)
+    fit = fit_lm_batch(Qrr_lo - q0, trr_lo, IF, didt_lo, tj_fit=tj_fit)
+    trr_hi_pred = predict_batch(fit["tau"], fit["TM"], IF, didt_hi)["trr"]
+    fit.update(q0=q0, trr_hi_resid=trr_hi_pred / trr_hi - 1.0,
+               qrr_diffusion=Qrr_lo - q0, qrr_measured_equiv=Qrr_lo, error=error)
+    return fit
+
+
+def _record(fits: dict, i, **extra) -> dict:
+    return dict({k: float(v[i]) for k, v in fits.items() if k != 'error'}, **extra)
+
+
+def best_lm_fits(items: Sequence[dict]) -> List[FitOrError]:
+    """
+    `qrr_model.best_lm_fit` for many parts. `items` are dicts with the best_lm_fit arguments
+    (Qrr, trr, cond, qrr_points, qoss_vr, part; see `lm_inputs`). Returns per item the fit record
+    or the LMFitError best_lm_fit would raise.
+    """
+    out: List[Optional[FitOrError]] = [None] * len(items)
+    fallback = [None] * len(items)
+
+    two = []
+    for i, it in enumerate(items):
+        if it.get('qrr_points'):
+            try:
+                two.append((i,) + qrr_model._pick_2pt_rows(it['qrr_points']))
+            except LMFitError as e:
+                fallback[i] = str(e)
+    if two:
+        lo = [r for _i, r, _h in two]
+        hi = [r for _i, _l, r in two]
+        res = fit_lm_2pt_batch([r["Qrr"] for r in lo], [r["trr"] for r in lo], [r["didt"] for r in lo],
+                               [r["Qrr"] for r in hi], [r["trr"] for r in hi], [r["didt"] for r in hi],
+                               [float(r["IF"]) for r in lo], [float(r.get("Tj", 25.0)) for r in lo])
+        for k, (i, _l, _h) in enumerate(two):
+            if res['error'][k] is None:
+                out[i] = _record(res, k, method="2pt", decontaminated=True)
+            else:
+                fallback[i] = res['error'][k]
+
+    one = []
+    for i, it in enumerate(items):
+        if out[i] is not None:
+            continue
+        cond = it.get('cond')
+        if cond is None:
+            out[i] = LMFitError("no reverse-recovery test conditions — add the part to "
+                                "dslib/qrr_conditions.py (see fl4p/fetlib#37)"
+                                + (f" (2pt path failed first: {fallback[i]})" if fallback[i] else ""))
+            continue
+        try:
+            q_cal = qrr_model.calibration_qrr(it['Qrr'], it.get('qoss_vr'))
+        except LMFitError as e:
+            out[i] = e
+            continue
+        one.append((i, q_cal, cond))
+    if one:
+        res = fit_lm_batch([q for _i, q, _c in one], [items[i]['trr'] for i, _q, _c in one],
+                           [c.get("IF") for _i, _q, c in one], [c.get("didt") for _i, _q, c in one],
+                           [float(c.get("Tj", 25.0)) for _i, _q, c in one])
+        for k, (i, q_cal, _c) in enumerate(one):
+            if res['error'][k] is not None:
+                out[i] = LMFitError(res['error'][k])
+                continue
+            Qrr = items[i]['Qrr']
+            out[i] = _record(res, k, method="1pt", q0=Qrr - q_cal, qrr_diffusion=q_cal, qrr_measured_equiv=Qrr,
+                             decontaminated=items[i].get('qoss_vr') is not None)
+            if fallback[i]:
+                out[i]["fallback_from_2pt"] = fallback[i]
+
+    for i, it in enumerate(items):
+        if isinstance(out[i], dict):
+            out[i].update(_n_tau_stamp(it.get('part')))
+    return out
+
+
+def _n_tau_stamp(part):
+    n_res = resolve_n_tau(part)
+    return dict(n_tau=n_res["n_tau"], n_tau_state=n_res["state"], n_tau_source=n_res["source"])
+
+
+def lm_inputs(specs, parts: Optional[Sequence[str]] = None, qoss_vr: Optional[Sequence[float]] = None
+              ) -> List[dict]:
+    """best_lm_fit arguments of MosfetSpecs (`parts`: "mfr:MPN" per spec for the Tj exponent)."""
+    return [dict(Qrr=mf.Qrr, trr=mf.trr, cond=getattr(mf, 'qrr_cond', None),
+                 qrr_points=getattr(mf, 'qrr_points', None),
+                 qoss_vr=qoss_vr[i] if qoss_vr is not None else None,
+                 part=parts[i] if parts is not None else None)
+            for i, mf in enumerate(specs)]
+
+
+@functools.lru_cache(maxsize=None)
+def fit_code_version() -> str:
+    """Hash of the fit code (qrr_model and this module), part of every `fit_key`: records computed
+    by an older fit are not served after an edit."""
+    h = hashlib.sha1()
+    for fn in (qrr_model.__file__, __file__):
+        with open(fn, 'rb') as fh:
+            h.update(fh.read())
+    return h.hexdigest()
+
+
+def fit_key(item: dict) -> str:
+    """Table key: everything best_lm_fit's numbers depend on, except the part name."""
+    cond = item.get('cond')
+    points = item.get('qrr_points') or []
+    key = (
+        fit_code_version(), K_TRR, qrr_model.QRR_QOSS_FRACTION,
+        item.get('Qrr'), item.get('trr'), item.get('qoss_vr'),
+        None if cond is None else tuple(cond.get(k) for k in ('IF', 'didt', 'Tj')),
+        tuple(tuple(sorted(p.items())) for p in points),
+    )
+    return 'qrr_lm_fit/' + hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+
+
+class LMFitTable:
+    """
+    Persistent `best_lm_fits` results, keyed by `fit_key` (datasheet inputs). Backed by a
+    `dslib.cache.SqliteStore` in the disk cache directory; memory only while the disk cache is
+    disabled.
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+        self._mem = {}
+
+    def store(self):
+        import dslib.cache
+        if dslib.cache._disk_cache_disabled:
+            return None
+        if self._store is None:
+            self._store = dslib.cache.SqliteStore(path=dslib.cache.cache_dir + '/qrr_lm_fits', shards=1)
+        return self._store
+
+    def fits(self, items: Sequence[dict]) -> List[FitOrError]:
+        keys = [fit_key(it) for it in items]
+        missing = [k for k in dict.fromkeys(keys) if k not in self._mem]
+        store = self.store()
+        if missing and store is not None:
+            self._mem.update(store.read_many(missing))
+            missing = [k for k in missing if k not in self._mem]
+
+        if missing:
+            todo = {}
+            for k, it in zip(keys, items):
+                if k in missing and k not in todo:
+                    todo[k] = dict(it, part=None)
+            computed = {}
+            for k, fit in zip(todo, best_lm_fits(list(todo.values()))):
+                if isinstance(fit, LMFitError):
+                    computed[k] = dict(error=str(fit))
+                else:
+                    computed[k] = {f: v for f, v in fit.items() if not f.startswith('n_tau')}
+            self._mem.update(computed)
+            if store is not None:
+                store.write_many(computed)
+
+        out = []
+        for k, it in zip(keys, items):
+            rec = self._mem[k]
+            out.append(LMFitError(rec['error']) if 'error' in rec else dict(rec, **_n_tau_stamp(it.get('part'))))
+        return out
+
+
+def predict_fits(fits: Sequence[Optional[FitOrError]], IF, didt, Tj=25.0) -> dict:
+    """
+    Diffusion-charge recovery (see best_lm_fit's q0 contract) of every fit at every operating point.
+    IF, didt, Tj broadcast to (n_points,) or (n_parts, n_points); tau is scaled per part with
+    `tau_at_tj` and the fit's n_tau. Parts without fit (None / LMFitError) are NaN.
+    :return: dict of (n_parts, n_points) arrays: Qrr, trr, irrm, td, qa, qb, tau
+    """
+    n = len(fits)
+    IF, didt, Tj = _arrays(IF, didt, Tj)
+    shape = (n,) + (IF.shape[-1:] or (1,))
+    IF, didt, Tj = (np.broadcast_to(v, shape) for v in (IF, didt, Tj))
+
+    tau = np.full(shape, np.nan)
+    TM = np.full(shape, np.nan)
+    for i, fit in enumerate(fits):
+        if isinstance(fit, dict):
+            tau[i] = tau_at_tj(fit["tau0"], Tj[i], fit.get("tj_fit", 25.0), n_tau=fit.get("n_tau"))
+            TM[i] = fit["TM"]
+    ok = np.isfinite(tau)
+    p = predict_batch(np.where(ok, tau, 1.0), np.where(ok, TM, 1.0), IF, didt)
+    res = {k: np.where(ok, v, np.nan) for k, v in p.items() if k != 'error'}
+    res['tau'] = tau
+    return res
+
+
+_shared_table = None
+
+
+def lm_fit_table() -> LMFitTable:
+    """The process-wide fit table."""
+    global _shared_table
+    if _shared_table is None:
+        _shared_table = LMFitTable()
+    return _shared_table
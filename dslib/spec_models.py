@@ -186,7 +186,12 @@ class BuckConverter():
     def __init__(self, name, Io_max, f_sw, coil: 'CoilSpecs', hs: MosfetSlot, ls: MosfetSlot, output_parasitics,
                  cin_imp=0, cout_imp=0,
                  pcb=None,
+                 coupled_coil=False,
                  ):
+        """
+        :param coupled_coil: solve ripple current and coil inductance self-consistently
+            (`maglib.powerloss.coil_operating_point`) instead of using the inductance at the dc bias of Io
+        """
 
         self.name = name
         self.Io_max = Io_max
@@ -200,10 +205,17 @@ class BuckConverter():
         self.cout_imp = cout_imp
         self.cin_imp = cin_imp
         self.pcb = pcb
+        self.coupled_coil = coupled_coil
 
     def powerloss(self, dcdc: DcDcLoadParams, gd: GateDrive):
         coil = self.coil
         Ldc = coil.Ldc(dcdc.Io)
+        Bpk = None
+        if self.coupled_coil:
+            from maglib.powerloss import coil_operating_point
+            op = coil_operating_point(coil, dcdc.Vi, dcdc.Vo, dcdc.Io, dcdc.f)
+            assert op.converged, ('coil operating point did not converge', op)
+            Ldc, Bpk = float(op.L), float(op.Bpk)
         dcdc = DcDcLoadParams(vi=dcdc.Vi, vo=dcdc.Vo, io=dcdc.Io, f=dcdc.f, tDead=dcdc.tDead, L=Ldc)
 
         from dclib.powerloss import dcdc_buck_hs
@@ -223,7 +235,7 @@ class BuckConverter():
         p_hs = p_hs.parallel(self.hs.parallel)
 
         from dclib.powerloss import dcdc_buck_coil
-        p_coil = dcdc_buck_coil(dcdc, coil)
+        p_coil = dcdc_buck_coil(dcdc, coil, Bpk=Bpk)
 
         from dclib.powerloss import dcdc_buck_ls
         p_ls = dcdc_buck_ls(dcdc,
@@ -0,0 +1,201 @@
+"""
+Columnar snapshot of the scalar MosfetSpecs/MosfetBasicSpecs attributes of every part in `parts_db`.
+
+Readers that only need ~30 numbers per part (web backend, ranking, fidelity tools) memory-map this
+Arrow IPC file instead of unpickling the full Part object graphs. `update_spec_table` regenerates it
+incrementally: rows of parts whose parts_db record did not change are copied over, only new or
+rewritten records are unpickled.
+
+Parts without `specs` get no row; their record versions are kept in the table metadata so they are
+not unpickled again either. The metadata also carries `spec_table_version()`, a hash of the code that
+builds the rows, a mismatch forces a full rebuild.
+
+Missing values are NaN (float columns) or None (string columns). `Vds_max` etc. of the discovered
+basic specs are prefixed with `basic_`, to keep them apart from the datasheet values.
+"""
+import functools
+import hashlib
+import json
+import math
+import os
+from typing import Dict, List, Optional
+
+from dslib import get_logger
+
+logger = get_logger()
+
+# attributes (and properties) of MosfetSpecs
+SPEC_COLUMNS = (
+    'Vds', 'Rds_on', 'Id',
+    'Qg', 'Qgd', 'Qgs', 'Qgs2', 'Qg_th', 'Qsw', 'Qg_sync',
+    'Qrr', 'trr', 'Vsd', 'V_pl',
+    'Coss', 'Coss_Vds', 'Coss_V0', 'Rg', 'tRise', 'tFall',
+    'Id_gc', 'gfs_min', 'gfs_typ', 'Id_gfs', 'Vgs_th', 'Id_vsd',
+    'FoM', 'FoMqsw', 'FoMqrr', 'FoMcoss', 'QgdQgsRatio',
+)
+
+# attributes of MosfetBasicSpecs (DiscoveredPart.specs), stored as basic_<name>
+BASIC_COLUMNS = ('Vds_max', 'Rds_on_10v_max', 'ID_25', 'Vgs_th_min', 'Vgs_th_typ', 'Vgs_th_max',
+                 'Qg_typ_nC', 'Qg_max_nC')
+
+STRING_COLUMNS = ('mfr', 'mpn', 'substrate', 'package', 'release_date')
+
+_VERSION_COLUMNS = ('_rec_ino', '_rec_off', '_rec_len')
+
+
+_META_VERSION = b'spec_table_version'
+_META_NO_SPECS = b'no_specs'
+
+
+@functools.lru_cache(maxsize=None)
+def spec_table_version() -> str:
+    """Hash of this module and of dslib/mosfet.py (MosfetSpecs and its properties), i.e. of
+    everything `spec_row` computes the columns with."""
+    import dslib.mosfet
+    h = hashlib.sha1(b'v1')
+    for fn in (__file__, dslib.mosfet.__file__):
+        with open(fn, 'rb') as fh:
+            h.update(fh.read())
+    return h.hexdigest()
+
+
+def default_spec_table_path(db=None):
+    import dslib.store
+    db = db or dslib.store.parts_db
+    return os.path.splitext(db._lib_path)[0] + '-specs.arrow'
+
+
+def _num(obj, name) -> float:
+    try:
+        v = float(getattr(obj, name))
+    except Exception:  # missing attr, None, str, ZeroDivisionError in properties etc.
+        return math.nan
+    return v if math.isfinite(v) else math.nan
+
+
+def _str(v) -> Optional[str]:
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return None
+    return str(v)
+
+
+def spec_row(part) -> Dict:
+    """Flatten one `dslib.store.Part` into a row of scalars."""
+    specs = part.specs
+    disc = part.discovered
+    basic = getattr(disc, 'specs', None) if disc is not None else None
+
+    release = getattr(disc, 'release_data', None) if disc is not None else None
+    if release is not None:
+        try:
+            release = release.date().isoformat() if hasattr(release, 'date') else release.isoformat()
+        except Exception:
+            release = str(release)
+
+    row = dict(mfr=part.mfr, mpn=part.mpn,
+               substrate=_str(getattr(basic, 'substrate', None)),
+               package=_str(getattr(disc, 'package', None)),
+               release_date=_str(release))
+    for k in SPEC_COLUMNS:
+        row[k] = _num(specs, k)
+    for k in BASIC_COLUMNS:
+        row['basic_' + k] = _num(basic, k)
+    return row
+
+
+def _schema(no_specs=None):
+    import pyarrow as pa
+    fields = [pa.field(k, pa.string()) for k in STRING_COLUMNS]
+    fields += [pa.field(k, pa.float64()) for k in SPEC_COLUMNS]
+    fields += [pa.field('basic_' + k, pa.float64()) for k in BASIC_COLUMNS]
+    fields += [pa.field(k, pa.int64()) for k in _VERSION_COLUMNS]
+    meta = {_META_VERSION: spec_table_version(),
+            _META_NO_SPECS: json.dumps(sorted(list(k) + list(v) for k, v in (no_specs or {}).items()))}
+    return pa.schema(fields, metadata=meta)
+
+
+def _no_specs(table) -> Dict:
+    """{(mfr, mpn): record version} of the parts without specs, from the table metadata."""
+    rows = json.loads(table.schema.metadata.get(_META_NO_SPECS, b'[]'))
+    return {(mfr, mpn): tuple(ver) for mfr, mpn, *ver in rows}
+
+
+def load_spec_table(path=None):
+    """Memory-map the table (zero-copy for the float columns). Returns a pyarrow.Table or None."""
+    import pyarrow as pa
+    path = path or default_spec_table_path()
+    if not os.path.exists(path):
+        return None
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    if not table.schema.equals(_schema()):
+        logger.info('%s has an outdated schema', path)
+        return None
+    if (table.schema.metadata or {}).get(_META_VERSION) != spec_table_version().encode():
+        logger.info('%s was built by other code', path)
+        return None
+    return table
+
+
+def update_spec_table(db=None, path=None, force=False):
+    """Bring the table in sync with `db` (default `parts_db`) and return it.
+
+    Only parts whose record version changed since the last update are unpickled, this includes parts
+    without specs (they get no row).
+    """
+    import pyarrow as pa
+    import dslib.store
+
+    db = db or dslib.store.parts_db
+    path = path or default_spec_table_path(db)
+
+    versions = db.record_versions()
+    old = None if force else load_spec_table(path)
+
+    rows: List[Dict] = []
+    n_new = 0
+    keep = {}
+    old_no_specs = {}
+    if old is not None:
+        cols = old.select(['mfr', 'mpn'] + list(_VERSION_COLUMNS)).to_pydict()
+        for i, key in enumerate(zip(cols['mfr'], cols['mpn'])):
+            ver = (cols['_rec_ino'][i], cols['_rec_off'][i], cols['_rec_len'][i])
+            if versions.get(key) == ver:
+                keep[key] = i
+        old_no_specs = _no_specs(old)
+
+    no_specs = {}
+    for key, ver in versions.items():
+        if key in keep:
+            continue
+        if old_no_specs.get(key) == ver:
+            no_specs[key] = ver
+            continue
+        part = db.get(key)
+        if part is None or getattr(part, 'specs', None) is None:
+            no_specs[key] = ver
+            n_new += 1
+            continue
+        row = spec_row(part)
+        row.update(zip(_VERSION_COLUMNS, ver))
+        rows.append(row)
+        n_new += 1
+
+    if old is not None and n_new == 0 and len(keep) == old.num_rows and no_specs == old_no_specs:
+        return old
+
+    schema = _schema(no_specs)
+    parts = []
+    if keep:
+        parts.append(old.take(pa.array(sorted(keep.values()), pa.int64())).replace_schema_metadata(schema.metadata))
+    if rows:
+        parts.append(pa.Table.from_pylist(rows, schema=schema))
+    table = pa.concat_tables(parts) if parts else schema.empty_table()
+
+    tmp = path + '.tmp'
+    with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+    logger.info('Spec table %s: %d rows (%d updated, %d removed)', path, table.num_rows, n_new,
+                (old.num_rows - len(keep)) if old is not None else 0)
+    return load_spec_table(path)
+
@@ -1,8 +1,10 @@
 import logging
 import os
 import pickle
+import struct
 import threading
 import time
+import zlib
 from copy import copy
 from typing import Tuple, Dict, Optional, Generic, TypeVar, Callable, Union, List
 
@@ -59,52 +61,336 @@ class WriteBuffer():
                     self._running = False
 
 
+class StaleIndexError(RuntimeError):
+    """The in-memory index no longer matches the log file."""
+
+
+class RecordLog:
+    """Append-only keyed record file with an on-disk index.
+
+    Every `put`/`delete` appends one record (op, key, pickled value, crc) under a file lock, so a
+    write costs O(record) instead of re-pickling the whole dict. The key -> (offset, length) index
+    lives in memory and is snapshotted next to the log; a process that finds the log longer than
+    its snapshot only scans the new tail (headers and keys, values stay on disk). Values are
+    unpickled on demand. Superseded records are dropped by `compact`, which copies the live records
+    raw (without unpickling them) and runs automatically once more than half of the log is dead.
+    Readers check the key and crc of every record they read, so an index made stale by another
+    process's compaction is detected and refreshed instead of returning a different record.
+    """
+
+    _header = struct.Struct('<cIII')  # op, key length, value length, crc32(key + value)
+    _PUT, _DEL = b'P', b'D'
+
+    def __init__(self, path, lock_path, compact_min_bytes=1 << 20, snapshot_every=1000):
+        self.path = path
+        self.lock_path = lock_path
+        self.compact_min_bytes = compact_min_bytes
+        self.snapshot_every = snapshot_every
+
+        self._index: Dict = {}
+        self._end = 0  # offset after the last valid record we have scanned
+        self._ino = None
+        self._dead_bytes = 0
+        self._unsnapshotted = 0
+        self._lock = threading.RLock()
+
+    @property
+    def _idx_path(self):
+        return self.path + '.idx'
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_ino, st.st_size
+        except FileNotFoundError:
+            return None, 0
+
+    def _load_snapshot(self, ino):
+        self._index, self._end, self._ino, self._dead_bytes = {}, 0, ino, 0
+        try:
+            with open(self._idx_path, 'rb') as fh:
+                snap = pickle.load(fh)
+            if snap['ino'] == ino:
+                self._index, self._end, self._dead_bytes = snap['index'], snap['end'], snap['dead_bytes']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning('Failed to read index %s, rescanning log: %s', self._idx_path, e)
+
+    def _write_snapshot(self):
+        tmp = self._idx_path + '.tmp'
+        with open(tmp, 'wb') as fh:
+            pickle.dump(dict(ino=self._ino, end=self._end, dead_bytes=self._dead_bytes, index=self._index), fh,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._idx_path)
+        self._unsnapshotted = 0
+
+    def _scan_tail(self, size):
+        if size <= self._end:
+            return
+        n = 0
+        with open(self.path, 'rb') as fh:
+            fh.seek(self._end)
+            off = self._end
+            while off + self._header.size <= size:
+                op, kl, vl, crc = self._header.unpack(fh.read(self._header.size))
+                if op not in (self._PUT, self._DEL) or off + self._header.size + kl + vl > size:
+                    break  # torn write at the tail
+                kb = fh.read(kl)
+                if vl:
+                    vb = fh.read(vl)
+                    if zlib.crc32(vb, zlib.crc32(kb)) != crc:
+                        break
+                elif zlib.crc32(kb) != crc:
+                    break
+                key = pickle.loads(kb)
+                rec_len = self._header.size + kl + vl
+                old = self._index.pop(key, None)
+                if old is not None:
+                    self._dead_bytes += old[1]
+                if op == self._PUT:
+                    self._index[key] = (off, rec_len)
+                else:
+                    self._dead_bytes += rec_len
+                off += rec_len
+                n += 1
+        self._end = off
+        self._unsnapshotted += n
+
+    def refresh(self):
+        """Catch up with records other processes appended (or a compaction they ran)."""
+        with self._lock:
+            ino, size = self._stat()
+            if ino != self._ino or size < self._end:
+                self._load_snapshot(ino)
+            if ino is not None:
+                self._scan_tail(size)
+                if self._unsnapshotted >= self.snapshot_every:
+                    self._write_snapshot()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def keys(self):
+        return self._index.keys()
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def locate(self, key):
+        return self._index.get(key)
+
+    def versions(self) -> Dict:
+        """(log inode, offset, length) of every live record, as of the last `refresh`."""
+        ino = self._ino or 0
+        return {k: (ino,) + loc for k, loc in self._index.items()}
+
+    def read_raw(self, fh, loc, key):
+        """Value bytes of the record of `key` at `loc`. Raises StaleIndexError when a different record is
+        there (another process compacted the log after our index was built)."""
+        off, rec_len = loc
+        fh.seek(off)
+        rec = fh.read(rec_len)
+        if len(rec) < self._header.size:
+            raise StaleIndexError(self.path)
+        op, kl, vl, crc = self._header.unpack_from(rec)
+        kb = rec[self._header.size:self._header.size + kl]
+        vb = rec[self._header.size + kl:]
+        if op != self._PUT or self._header.size + kl + vl != rec_len or zlib.crc32(vb, zlib.crc32(kb)) != crc:
+            raise StaleIndexError(self.path)
+        if pickle.loads(kb) != key:
+            raise StaleIndexError(self.path)
+        return vb
+
+    def records(self, keys=None):
+        """Yield (key, location, value bytes) in log order. A stale index (the log was replaced by another
+        process's compaction) is refreshed and the remaining keys are read again."""
+        with self._lock:
+            keys = list(self._index if keys is None else keys)
+        done = set()
+        for _ in range(3):
+            with self._lock:
+                locs = sorted((self._index[k], k) for k in keys if k in self._index and k not in done)
+                ino = self._ino
+            if not locs:
+                return
+            try:
+                with open(self.path, 'rb') as fh:
+                    if os.fstat(fh.fileno()).st_ino != ino:
+                        raise StaleIndexError(self.path)
+                    for loc, key in locs:
+                        raw = self.read_raw(fh, loc, key)
+                        done.add(key)
+                        yield key, loc, raw
+                return
+            except StaleIndexError:
+                self.refresh()
+        raise StaleIndexError(self.path)
+
+    def get(self, key):
+        for _key, _loc, raw in self.records([key]):
+            return pickle.loads(raw)
+        return None
+
+    def items(self, keys=None):
+        """Yield (key, value bytes) in log order, one record at a time."""
+        for key, _loc, raw in self.records(keys):
+            yield key, raw
+
+    def _append(self, records, only_if_empty=False):
+        with self._lock, acquire_file_lock(self.lock_path, kill_holder=False, max_time=30):
+            self.refresh()
+            if only_if_empty and self._end:
+                return
+            with open(self.path, 'ab') as fh:
+                if fh.tell() > self._end:
+                    fh.truncate(self._end)  # drop a torn record left by a crashed writer
+                    fh.seek(self._end)
+                for op, key, value in records:
+                    kb = pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+                    vb = pickle.dumps(value, pickle.HIGHEST_PROTOCOL) if op == self._PUT else b''
+                    fh.write(self._header.pack(op, len(kb), len(vb), zlib.crc32(vb, zlib.crc32(kb))))
+                    fh.write(kb)
+                    fh.write(vb)
+            self.refresh()
+            if self._dead_bytes > self.compact_min_bytes and self._dead_bytes * 2 > self._end:
+                self._compact_locked()
+
+    def put_many(self, items: Dict, only_if_empty=False):
+        self._append([(self._PUT, k, v) for k, v in items.items()], only_if_empty=only_if_empty)
+
+    def delete(self, key):
+        self._append([(self._DEL, key, None)])
+
+    def compact(self):
+        with self._lock, acquire_file_lock(self.lock_path, kill_holder=False, max_time=60):
+            self.refresh()
+            self._compact_locked()
+
+    def _compact_locked(self):
+        tmp = self.path + '.compact'
+        index = {}
+        with open(self.path, 'rb') as src, open(tmp, 'wb') as dst:
+            for loc, key in sorted((loc, k) for k, loc in self._index.items()):
+                src.seek(loc[0])
+                index[key] = (dst.tell(), loc[1])
+                dst.write(src.read(loc[1]))
+            end = dst.tell()
+        os.replace(tmp, self.path)
+        logging.info('Compacted %s: %d -> %d bytes', self.path, self._end, end)
+        self._index, self._end, self._dead_bytes = index, end, 0
+        self._ino = self._stat()[0]
+        self._write_snapshot()
+
+
 class ObjectDatabase(Generic[K, T]):
+    """Keyed object store on top of a RecordLog (data/<name>.log).
+
+    `load_obj` unpickles just the requested record, `add`/`del_obj` append records, and `load`
+    unpickles everything for callers that want the whole dict. A legacy whole-dict `<name>.pkl`
+    is imported into the log on first use and renamed to `<name>.pkl.imported`.
+    """
+
     def __init__(self, name, key_func: Optional[Callable[[T], K]] = None):
         self._lib_path = os.path.realpath(os.path.dirname(__file__) + f'/../data/{name}.pkl')
         self._lck_path = self._lib_path + '.lock'
+        self._log = RecordLog(os.path.realpath(os.path.dirname(__file__) + f'/../data/{name}.log'), self._lck_path)
 
-        self._lib_mem: Optional[Dict[K, T]] = None
+        self._lib_mem: Optional[Dict[K, T]] = None  # complete dict, set by load()
+        self._obj_mem: Dict[K, Tuple[Tuple[int, int], T]] = {}  # lazily unpickled records by log location
         self._key_func = key_func
 
         self._buffer = WriteBuffer(self.add)
 
+    def _open(self):
+        if not self._log.exists() and os.path.exists(self._lib_path):
+            self._import_legacy()
+        self._log.refresh()
+
+    def _import_legacy(self):
+        try:
+            with open(self._lib_path, 'rb') as f:
+                lib = pickle.load(f)
+        except FileNotFoundError:
+            return  # another process imported (and renamed) it meanwhile
+        except (AttributeError, ModuleNotFoundError) as e:
+            # some types moved etc. create the (empty) log anyway, so this is attempted only once
+            logging.warning(f'Failed to unpickle {self._lib_path}, it is ignored from now on: %s', e)
+            self._log.put_many({}, only_if_empty=True)
+            return
+        logging.info('Importing %d records from %s into %s', len(lib), self._lib_path, self._log.path)
+        # another process might be importing concurrently
+        self._log.put_many(lib, only_if_empty=True)
+        # the log is the store now, don't leave a stale copy that looks current
+        try:
+            os.replace(self._lib_path, self._lib_path + '.imported')
+        except FileNotFoundError:
+            pass
+
+    def _unpickle(self, key, loc, raw):
+        try:
+            obj = pickle.loads(raw)
+        except (AttributeError, ModuleNotFoundError) as e:
+            logging.warning(f'Failed to unpickle {key} from {self._log.path}: %s', e)
+            # some types moved etc
+            return None
+        self._obj_mem[key] = (loc, obj)
+        return obj
+
     def load(self, reload=False) -> Dict[K, T]:
         if self._lib_mem and not reload:
             return self._lib_mem.copy()
 
-        with acquire_file_lock(self._lck_path, kill_holder=False, max_time=60):
-            if os.path.exists(self._lib_path):
-                with open(self._lib_path, 'rb') as f:
-                    try:
-                        self._lib_mem = pickle.load(f)
-                    except (AttributeError, ModuleNotFoundError) as e:
-                        logging.warning(f'Failed to unpickle {self._lib_path}: %s', e)
-                        # some types moved etc
-                        self._lib_mem = {}
-                    return self._lib_mem.copy()
-
-        if self._lib_mem is None:
-            self._lib_mem = {}
-
-        return {}
+        if reload:
+            self._obj_mem.clear()
+        self._open()
+        lib = {}
+        for key, loc, raw in self._log.records():
+            cached = self._obj_mem.get(key)
+            obj = cached[1] if cached and cached[0] == loc else self._unpickle(key, loc, raw)
+            if obj is not None:
+                lib[key] = obj
+        self._lib_mem = lib
+        return lib.copy()
 
     def keys(self):
-        return self._lib_mem.keys()
+        if self._lib_mem is not None:
+            return self._lib_mem.keys()
+        self._open()
+        return self._log.keys()
 
     def load_obj(self, key: K) -> T:
-        if not self._lib_mem:
-            self.load()
-        key = self._key_func(key)
-        return copy(self._lib_mem.get(key))
+        return self.get(self._key_func(key))
+
+    def get(self, key) -> Optional[T]:
+        """Like load_obj, but takes the stored key (e.g. (mfr, mpn)) instead of an object."""
+        if self._lib_mem:
+            return copy(self._lib_mem.get(key))
+        self._open()
+        loc = self._log.locate(key)
+        if loc is None:
+            return None
+        cached = self._obj_mem.get(key)
+        if cached and cached[0] == loc:
+            return copy(cached[1])
+        for _key, loc, raw in self._log.records([key]):
+            return copy(self._unpickle(key, loc, raw))
+        return None
 
     def del_obj(self, key: K, ignore_missing=False):
-        self.load()
+        self._open()
         key = self._key_func(key)
-        if ignore_missing and key not in self._lib_mem:
+        if ignore_missing and key not in self._log:
             return False
-        del self._lib_mem[key]
-        self._write()
+        if key not in self._log:
+            raise KeyError(key)
+        self._log.delete(key)
+        self._obj_mem.pop(key, None)
+        if self._lib_mem is not None:
+            self._lib_mem.pop(key, None)
         return True
 
     def _items_to_dict(self, items):
@@ -115,27 +401,35 @@ class ObjectDatabase(Generic[K, T]):
             assert self._key_func is None
         return items
 
-    def _write(self):
-        with acquire_file_lock(self._lck_path, kill_holder=False, max_time=30):
-            with open(self._lib_path, 'wb') as f:
-                pickle.dump(self._lib_mem, f)
-
     def add(self, new_arts: Union[Dict[K, T], List[T]], overwrite=True):
-        self.load()
+        self._open()
 
         new_arts = self._items_to_dict(new_arts)
 
-        for k, part in new_arts.items():
-            assert overwrite or k not in self._lib_mem
-            self._lib_mem[k] = part
+        for k in new_arts.keys():
+            assert overwrite or k not in self._log
 
-        self._write()
+        self._log.put_many(new_arts)
+        for k, part in new_arts.items():
+            self._obj_mem.pop(k, None)
+            if self._lib_mem is not None:
+                self._lib_mem[k] = part
 
     def add_background(self, items: Union[Dict[K, T], List[T]], overwrite=True):
         assert overwrite == True
         #items = self._items_to_dict(items)
         self._buffer.add(items)
 
+    def compact(self):
+        self._open()
+        self._log.compact()
+
+    def record_versions(self) -> Dict[K, Tuple[int, int, int]]:
+        """(log inode, offset, length) of every record. A record's version changes whenever it is
+        rewritten (or the log is compacted), which lets derived tables update incrementally."""
+        self._open()
+        return self._log.versions()
+
 
 Mfr = str
 Mpn = str
@@ -296,6 +590,9 @@ datasheets_db = ObjectDatabase[Tuple[Mfr, Mpn], DatasheetFields]('datasheets-lib
                                                                                                                'part') else (
                                                                  d.mfr, d.mpn))
 
+# per-part (fingerprint, DatasheetFields) written by main.read_parts_datasheets, see main.datasheet_fingerprint
+datasheets_manifest_db = ObjectDatabase[Tuple[Mfr, Mpn], Tuple[str, DatasheetFields]]('datasheets-manifest')
+
 if __name__ == '__main__':
     parts = load_parts()
     print('loaded', len(parts))
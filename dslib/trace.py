@@ -0,0 +1,233 @@
+"""
+Per-stage tracing of the datasheet parse pipeline.
+
+`datasheet_trace()` opens a trace for one datasheet, `trace_stage(name)` records wall time, CPU time
+(including waited-for child processes such as gs, ocrmypdf and java), disk_cache hits/misses and the
+number of output fields of one stage. Stages nest; cache events count towards the innermost stage, or
+towards the trace itself when no stage is open.
+Outside of a trace `trace_stage` only costs a context-var lookup.
+
+`TraceReport` aggregates the traces of a run: slowest PDFs, per-stage time percentiles, OCR fraction and
+the stages the parse planner skipped (`skip_stage`).
+
+    with datasheet_trace(('ti', 'CSD19503KCS'), path) as tr:
+        with trace_stage('read_sheet') as st:
+            fields = read_sheet(path).all_fields()
+            st.fields = len(fields)
+"""
+import contextvars
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterable, List, Optional
+
+import dslib.cache
+
+
+class StageRecord:
+    __slots__ = ('name', 'depth', 'wall', 'cpu', 'cache_hits', 'cache_misses', 'fields')
+
+    def __init__(self, name, depth=0):
+        self.name = name
+        self.depth = depth
+        self.wall = 0.
+        self.cpu = 0.
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.fields: Optional[int] = None
+
+    def as_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return 'StageRecord(%s %.3fs cpu=%.3fs cache=%d/%d fields=%s)' % (
+            self.name, self.wall, self.cpu, self.cache_hits, self.cache_hits + self.cache_misses, self.fields)
+
+
+class DatasheetTrace:
+    def __init__(self, key: Hashable = None, path: str = None):
+        self.key = key
+        self.path = path
+        self.stages: List[StageRecord] = []
+        self.skipped: List[str] = []
+        self.ocr = False
+        self.wall = 0.
+        self.cpu = 0.
+        self.error: Optional[str] = None
+        # disk_cache reads outside of any stage
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._stack: List[StageRecord] = []
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_stack'] = []
+        return state
+
+    def as_dict(self):
+        return dict(key=list(self.key) if isinstance(self.key, tuple) else self.key, path=self.path,
+                    wall=self.wall, cpu=self.cpu, ocr=self.ocr, error=self.error,
+                    cache_hits=self.cache_hits, cache_misses=self.cache_misses,
+                    stages=[s.as_dict() for s in self.stages], skipped=self.skipped)
+
+    def __repr__(self):
+        return 'DatasheetTrace(%s %.2fs %d stages%s)' % (self.key, self.wall, len(self.stages),
+                                                        ' ocr' if self.ocr else '')
+
+
+_current: contextvars.ContextVar[Optional[DatasheetTrace]] = contextvars.ContextVar('dslib_trace', default=None)
+
+
+def _cpu_time():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def current_trace() -> Optional[DatasheetTrace]:
+    return _current.get()
+
+
+@contextmanager
+def datasheet_trace(key: Hashable = None, path: str = None):
+    tr = DatasheetTrace(key, path)
+    token = _current.set(tr)
+    t0, c0 = time.perf_counter(), _cpu_time()
+    try:
+        yield tr
+    except BaseException as e:
+        tr.error = '%s %s' % (type(e).__name__, e)
+        raise
+    finally:
+        tr.wall = time.perf_counter() - t0
+        tr.cpu = _cpu_time() - c0
+        _current.reset(token)
+
+
+@contextmanager
+def trace_stage(name: str, ocr=False):
+    """
+    Record stage `name` of the current trace. Set `.fields` of the yielded record to the number of
+    output fields. `ocr=True` marks the datasheet as OCR-triggered.
+    """
+    tr = _current.get()
+    if tr is None:
+        yield StageRecord(name)
+        return
+
+    st = StageRecord(name, depth=len(tr._stack))
+    tr.stages.append(st)
+    tr._stack.append(st)
+    if ocr:
+        tr.ocr = True
+    t0, c0 = time.perf_counter(), _cpu_time()
+    try:
+        yield st
+    finally:
+        st.wall = time.perf_counter() - t0
+        st.cpu = _cpu_time() - c0
+        tr._stack.pop()
+
+
+def skip_stage(name: str):
+    """Note that stage `name` was not needed for the current datasheet (parse planner)."""
+    tr = _current.get()
+    if tr is not None:
+        tr.skipped.append(name)
+
+
+def _on_disk_cache_read(hit: bool):
+    tr = _current.get()
+    if tr is not None:
+        st = tr._stack[-1] if tr._stack else tr
+        if hit:
+            st.cache_hits += 1
+        else:
+            st.cache_misses += 1
+
+
+dslib.cache.disk_cache_read_hook = _on_disk_cache_read
+
+
+def traced_call(key: Hashable, fn, *args):
+    """Run `fn(*args)` in a `datasheet_trace(key)`, returns (result, trace). Use as a worker pool job."""
+    with datasheet_trace(key) as tr:
+        ret = fn(*args)
+    return ret, tr
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))]
+
+
+class TraceReport:
+    def __init__(self, traces: Iterable[DatasheetTrace]):
+        self.traces = [t for t in traces if t is not None]
+
+    @property
+    def ocr_fraction(self):
+        return sum(t.ocr for t in self.traces) / len(self.traces) if self.traces else float('nan')
+
+    def slowest(self, n=10) -> List[DatasheetTrace]:
+        return sorted(self.traces, key=lambda t: t.wall, reverse=True)[:n]
+
+    def stage_stats(self) -> Dict[str, dict]:
+        """stage name -> count, wall time total and percentiles, cpu total, cache hits/misses, fields"""
+        by_name: Dict[str, List[StageRecord]] = {}
+        for t in self.traces:
+            for st in t.stages:
+                by_name.setdefault(st.name, []).append(st)
+
+        stats = {}
+        for name, recs in by_name.items():
+            wall = sorted(r.wall for r in recs)
+            stats[name] = dict(
+                n=len(recs), total=sum(wall), p50=_percentile(wall, 50), p90=_percentile(wall, 90),
+                p99=_percentile(wall, 99), max=wall[-1], cpu=sum(r.cpu for r in recs),
+                cache_hits=sum(r.cache_hits for r in recs), cache_misses=sum(r.cache_misses for r in recs),
+                fields=sum(r.fields or 0 for r in recs),
+            )
+        return stats
+
+    def format(self, top=10) -> str:
+        total = sum(t.wall for t in self.traces)
+        lines = ['Parse profile: %d datasheets, %.1fs summed wall time, %.0f%% OCR-triggered, %d errors' % (
+            len(self.traces), total, self.ocr_fraction * 100, sum(t.error is not None for t in self.traces))]
+
+        lines.append('%-32s %6s %9s %7s %7s %7s %7s %9s %11s %7s' % (
+            'stage', 'n', 'total', 'p50', 'p90', 'p99', 'max', 'cpu', 'cache hit', 'fields'))
+        for name, s in sorted(self.stage_stats().items(), key=lambda kv: kv[1]['total'], reverse=True):
+            n_cache = s['cache_hits'] + s['cache_misses']
+            lines.append('%-32s %6d %8.1fs %6.2fs %6.2fs %6.2fs %6.2fs %8.1fs %11s %7d' % (
+                name[:32], s['n'], s['total'], s['p50'], s['p90'], s['p99'], s['max'], s['cpu'],
+                '%d/%d' % (s['cache_hits'], n_cache) if n_cache else '-', s['fields']))
+        hits = sum(t.cache_hits for t in self.traces)
+        n_cache = hits + sum(t.cache_misses for t in self.traces)
+        if n_cache:
+            lines.append('%-32s %6s %9s %7s %7s %7s %7s %9s %11s' % (
+                '(outside stages)', '', '', '', '', '', '', '', '%d/%d' % (hits, n_cache)))
+
+        skipped: Dict[str, int] = {}
+        for t in self.traces:
+            for name in t.skipped:
+                skipped[name] = skipped.get(name, 0) + 1
+        if skipped:
+            lines.append('skipped (needed symbols resolved): ' + ', '.join(
+                '%s %d' % kv for kv in sorted(skipped.items(), key=lambda kv: -kv[1])))
+
+        lines.append('slowest:')
+        for t in self.slowest(top):
+            # stages are in start order, a stage is a leaf unless the next one is nested in it
+            leaves = [s for s, nxt in zip(t.stages, t.stages[1:] + [None]) if nxt is None or nxt.depth <= s.depth]
+            st = max(leaves, key=lambda s: s.wall, default=None)
+            lines.append('  %7.2fs %s%s%s' % (t.wall, t.path or t.key, ' (ocr)' if t.ocr else '',
+                                              ', mostly %s %.2fs' % (st.name, st.wall) if st else ''))
+        return '\n'.join(lines)
+
+    def write_jsonl(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as fh:
+            for t in self.traces:
+                fh.write(json.dumps(t.as_dict()) + '\n')
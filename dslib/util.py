@@ -59,11 +59,19 @@ def run_serial(jobs):
 
 
 def run_parallel(jobs, max_concurrency=256,
-                 backend: Literal['threading', 'multiprocessing'] = 'multiprocessing',
+                 backend: Literal['threading', 'multiprocessing', 'pool'] = 'multiprocessing',
                  verbose=100, **kwargs):
+    """
+    backend='pool' dispatches to the long-lived, pre-warmed `dslib.workers.shared_worker_pool()`
+    instead of spawning a new joblib pool.
+    """
     if max_concurrency == 1:
         return run_serial(jobs)
 
+    if backend == 'pool':
+        from dslib.workers import shared_worker_pool
+        return shared_worker_pool(min(num_cores(), max_concurrency)).map_jobs(jobs)
+
     from joblib import Parallel, delayed
     with tqdm_joblib(tqdm(desc="Run Progress:", total=len(jobs))) as progress_bar:
         results = Parallel(n_jobs=min(num_cores() + 1, max_concurrency, len(jobs)), verbose=verbose, backend=backend,
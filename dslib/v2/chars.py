@@ -1,8 +1,9 @@
 """
 Character extraction and word/row grouping from a PDF.
 
-Self-contained — talks to pdfminer.six directly. Does not rely on dslib.pdf.tree
-or dslib.pdf.ascii so the v2 pipeline can evolve independently.
+Self-contained — reads pdfminer.six chars from the shared per-PDF layout cache
+(dslib.pdf.layout). Does not rely on dslib.pdf.tree or dslib.pdf.ascii so the v2
+pipeline can evolve independently.
 """
 from __future__ import annotations
 
@@ -10,9 +11,9 @@ import math
 from dataclasses import dataclass, field
 from typing import Iterator, List, Optional, Tuple
 
-from pdfminer.high_level import extract_pages
-from pdfminer.layout import LAParams, LTChar, LTPage, LTTextLine
+from pdfminer.layout import LTChar, LTPage
 
+from dslib.pdf.layout import get_char_layout
 from dslib.pdf.pdf2txt import normalize_text
 
 
@@ -324,24 +325,13 @@ def extract_pages_with_rows(pdf_path: str,
     Pages with no extracted characters are returned with ``char_count=0`` so
     callers can detect scanned pages.
     """
-    laparams = LAParams(line_overlap=line_overlap,
-                        char_margin=char_margin,
-                        line_margin=0.5,
-                        all_texts=True)
-
     pages: List[Page] = []
-    iter_pages = extract_pages(pdf_path,
-                               maxpages=max_pages,
-                               laparams=laparams)
-
-    for page_num, layout in enumerate(iter_pages):
-        chars = list(_iter_chars(layout))
-        rows = _build_rows(chars)
-        mb = BBox(*layout.mediabox) if hasattr(layout, "mediabox") else BBox(0, 0, 612, 792)
-        pages.append(Page(page_num=page_num,
-                          mediabox=mb,
+    for cp in get_char_layout(pdf_path, max_pages, char_margin, line_overlap):
+        rows = _build_rows(cp.chars())
+        pages.append(Page(page_num=cp.number,
+                          mediabox=BBox(*cp.mediabox),
                           rows=rows,
-                          char_count=len(chars)))
+                          char_count=len(cp)))
     return pages
 
 
@@ -15,11 +15,15 @@ def main():
                    help='run OCR (dslib.pdf.parse.ocr_pdf) on scanned PDFs')
     args = p.parse_args()
 
-    for path in args.pdfs:
+    if len(args.pdfs) > 1:
+        from dslib.viz.batch import find_in_pdfs
+        found = find_in_pdfs(args.pdfs, enable_raster=not args.no_raster, enable_ocr=args.ocr)
+    else:
+        found = {path: find_in_pdf(path, enable_raster=not args.no_raster, enable_ocr=args.ocr)
+                 for path in args.pdfs}
+
+    for path, results in found.items():
         print(path)
-        results = find_in_pdf(path,
-                              enable_raster=not args.no_raster,
-                              enable_ocr=args.ocr)
         if not results:
             print('  no gate-charge chart found')
             continue
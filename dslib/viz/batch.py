@@ -0,0 +1,88 @@
+"""
+Gate-charge chart extraction over many datasheets.
+
+`find_in_pdf` walks the pages of one PDF serially. `find_in_pdfs` selects the pages that mention gate
+charge from the shared layout cache (`dslib.pdf.layout`), fans the (pdf, page) jobs out over the worker
+pool and regroups the results per PDF in page order, so the output equals `find_in_pdf` for each file:
+
+    res = find_in_pdfs(paths)               # path -> [(ChartLocation, hit, source), ...]
+    vpls = find_vpls(paths)                 # path -> Vpl or None
+
+Per-page results are disk-cached (`curve_extract.find_on_page`), a re-run over the same datasheets
+only reads the cache. PDFs without any plateau hit go through the OCR fallback of `find_in_pdf`
+when `enable_ocr` is set, also in the pool. Errors are logged and leave the PDF (or page) without
+charts, one broken datasheet does not abort the batch.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from dslib import get_logger
+from dslib.pdf.layout import get_layout
+from dslib.viz.chart_finder import ChartLocation
+from dslib.viz.curve_extract import _mentions_gate_charge, best_vpl, find_in_pdf, find_on_page
+
+logger = get_logger()
+
+ChartResult = Tuple[ChartLocation, Optional[object], Optional[str]]
+
+
+def chart_pages(pdf_path: str) -> List[int]:
+    """Pages `find_in_pdf` looks at."""
+    return [pl.number for pl in get_layout(pdf_path) if _mentions_gate_charge(pl.text)]
+
+
+def find_in_pdfs(pdf_paths: Sequence[str], enable_raster: bool = True, enable_ocr: bool = False,
+                 pool=None, progress=False) -> Dict[str, List[ChartResult]]:
+    """
+    `find_in_pdf` for each path, with page-level fan-out.
+
+    :param pool: a `dslib.workers.WorkerPool`, defaults to the shared pool. Single-job batches run in
+        process.
+    :return: path -> list of (chart, plateau hit or None, source or None)
+    """
+    pdf_paths = list(dict.fromkeys(pdf_paths))
+    jobs = {}
+    for path in pdf_paths:
+        try:
+            pages = chart_pages(path)
+        except Exception as e:
+            logger.warning('viz: cannot lay out %s: %s: %s', path, type(e).__name__, e)
+            continue
+        for num in pages:
+            jobs[path, num] = (_guarded, find_on_page, path, num, enable_raster)
+    res = _run(jobs, pool, progress)
+
+    out: Dict[str, List[ChartResult]] = {path: [] for path in pdf_paths}
+    for path, num in jobs:  # in page order
+        out[path].extend(res[path, num])
+
+    if enable_ocr:
+        retry = {path: (_guarded, find_in_pdf, path, enable_raster, True) for path, found in out.items()
+                 if not any(h is not None for _c, h, _s in found)}
+        out.update(_run(retry, pool, progress))
+    return out
+
+
+def find_vpls(pdf_paths: Sequence[str], enable_raster: bool = True, enable_ocr: bool = False,
+              pool=None, progress=False) -> Dict[str, Optional[float]]:
+    """`find_vpl` for each path, see `find_in_pdfs`."""
+    return {path: best_vpl(found) for path, found in
+            find_in_pdfs(pdf_paths, enable_raster=enable_raster, enable_ocr=enable_ocr,
+                         pool=pool, progress=progress).items()}
+
+
+def _guarded(fn, pdf_path, *args):
+    """A failing page or PDF yields no charts instead of aborting the batch."""
+    try:
+        return fn(pdf_path, *args)
+    except Exception as e:
+        logger.warning('viz: %s failed on %s%s: %s: %s', fn.__name__, pdf_path, args, type(e).__name__, e)
+        return []
+
+
+def _run(jobs, pool, progress):
+    if len(jobs) <= 1:
+        return {k: job[0](*job[1:]) for k, job in jobs.items()}
+    if pool is None:
+        from dslib.workers import shared_worker_pool
+        pool = shared_worker_pool()
+    return pool.map_jobs(jobs, progress=progress)
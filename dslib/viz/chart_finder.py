@@ -23,6 +23,8 @@ from typing import Iterable, List, Optional, Tuple
 
 import pymupdf
 
+from dslib.pdf.layout import page_drawings, page_text, page_words
+
 
 _NUM_RE = re.compile(r'^-?[0-9]+(?:\.[0-9]+)?$')
 _FIG_PREFIX_RE = re.compile(r'(?i)^(Fig|Figure|Diagram)\.?[0-9]*$')
@@ -76,7 +78,7 @@ class _Word:
 
 
 def _page_words(page: pymupdf.Page) -> List[_Word]:
-    raw = page.get_text('words')
+    raw = page_words(page)
     return [_Word(text=w[4], x0=w[0], y0=w[1], x1=w[2], y1=w[3]) for w in raw]
 
 
@@ -467,7 +469,7 @@ def _extend_bbox_to_drawings(page: pymupdf.Page,
     x_max = bbox.x1
     while True:
         grew = False
-        for d in page.get_drawings():
+        for d in page_drawings(page):
             r = d['rect']
             if r.y0 > y_band_hi + 2 or r.y1 < y_band_lo - 2:
                 continue
@@ -815,7 +817,7 @@ def _find_curve_top_y(page: pymupdf.Page,
     the apex, so isolated in-plot glyph strokes from labels like
     ``"VGS = 10 V"`` don't drag the anchor up to the legend region.
     """
-    drawings = page.get_drawings()
+    drawings = page_drawings(page)
     fx0, fy0, fx1, fy1 = plot_frame.x0, plot_frame.y0, plot_frame.x1, plot_frame.y1
     width = fx1 - fx0
     height = fy1 - fy0
@@ -925,7 +927,7 @@ def _find_chart_wireframe(page: pymupdf.Page,
     and tick marks; the inner stroke rect is the actual plot region (the
     one the curve coordinates are measured against).
     """
-    drawings = page.get_drawings()
+    drawings = page_drawings(page)
 
     # Collect every rectangle-shaped drawing. A rectangle drawing has a
     # single ``re`` or ``qu`` item, or its bbox is consistent with a
@@ -1561,7 +1563,7 @@ def find_in_pdf(pdf_path: str) -> List[ChartLocation]:
     doc = pymupdf.open(pdf_path)
     out: List[ChartLocation] = []
     for page in doc.pages():
-        text = page.get_text()
+        text = page_text(page)
         if 'gate charge' not in text.lower() and 'qg' not in text.lower():
             continue
         out.extend(find_gate_charge_charts(page))
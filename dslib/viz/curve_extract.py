@@ -15,12 +15,15 @@ pick it out of the page's vector drawings (pymupdf ``get_drawings``):
 """
 from __future__ import annotations
 
+import functools
 import math
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
 import pymupdf
 
+from dslib.cache import disk_cache
+from dslib.pdf.layout import page_drawings, page_text
 from dslib.viz.chart_finder import ChartLocation
 
 
@@ -247,7 +250,7 @@ def _segments_from_drawing_filtered(d: dict,
 
 def _drawings_in_bbox(page: pymupdf.Page, bbox: pymupdf.Rect) -> List[dict]:
     out = []
-    for d in page.get_drawings():
+    for d in page_drawings(page):
         r = d['rect']
         # accept drawings entirely contained in the chart bbox plus a small
         # tolerance for stroke width
@@ -757,15 +760,18 @@ def _chart_bboxes_overlap(a: pymupdf.Rect, b: pymupdf.Rect,
 
 def _vector_or_raster(page: pymupdf.Page,
                       chart: ChartLocation,
-                      enable_raster: bool):
-    """Try the vector pipeline first; on failure, fall back to raster."""
+                      enable_raster: bool,
+                      raster=None):
+    """Try the vector pipeline first; on failure, fall back to raster.
+    ``raster`` is an optional ``raster_extract.PageRaster`` shared by the
+    charts of the page."""
     hit = find_plateau(page, chart)
     if hit is not None:
         return hit, 'vector'
     if not enable_raster:
         return None, None
     from dslib.viz.raster_extract import find_plateau_raster
-    rhit = find_plateau_raster(page, chart)
+    rhit = find_plateau_raster(page, chart, raster=raster)
     if rhit is None:
         return None, None
     return rhit, 'raster'
@@ -780,7 +786,7 @@ def _looks_scanned(doc: pymupdf.Document) -> bool:
     back to OCR.
     """
     for page in doc.pages():
-        text = page.get_text().strip()
+        text = page_text(page).strip()
         if len(text) > 80:
             return False
     # at least one page must carry an image, otherwise OCR is pointless
@@ -801,6 +807,106 @@ def _has_custom_font_encoding(pdf_path: str) -> bool:
         return False
 
 
+def _mentions_gate_charge(text: str) -> bool:
+    """Page-text cue for a gate-charge chart."""
+    # Toshiba TPH/XPN/XPQR datasheets caption the V_GS-vs-Q_g plot
+    # "Dynamic Input/Output Characteristics" and don't mention "gate
+    # charge" anywhere on the page.
+    tl = text.lower()
+    return ('gate charge' in tl or 'gate-charge' in tl or 'qg' in tl
+            or 'dynamic input/output' in tl
+            or 'dynamic input / output' in tl)
+
+
+def _find_on_page(page: pymupdf.Page, enable_raster: bool = True
+                  ) -> List[Tuple[ChartLocation, Optional[object], Optional[str]]]:
+    """The charts of one page with their plateau hits (see ``find_in_pdf``)."""
+    from dslib.viz.chart_finder import (find_gate_charge_charts,
+                                        _find_infineon_raster_charts)
+    std_charts = list(find_gate_charge_charts(page))
+    title_charts = list(_find_infineon_raster_charts(page))
+    raster = None
+    if enable_raster:
+        from dslib.viz.raster_extract import page_raster
+        raster = page_raster(page, std_charts + title_charts)
+    # Try the standard charts first; only fall back to title-
+    # anchored charts when none of the standard ones yielded a
+    # **vector** plateau hit. A standard chart that succeeds only
+    # via the raster fallback is much less reliable (raster can
+    # latch onto V=0 gridlines on flat-line plots), so we still try
+    # the title-anchored chart in parallel and let ``find_vpl``
+    # pick the higher-scoring candidate. This also recovers charts
+    # the standard finder missed entirely (or returned a too-narrow
+    # bbox for, leaving the trace's vertical span too small to
+    # clear the ``find_plateau_raster`` sanity check).
+    page_results = []
+    any_vector_hit = False
+    std_vector_hit_charts: List[ChartLocation] = []
+    std_plausible_charts: List[ChartLocation] = []
+    for chart in std_charts:
+        hit, source = _vector_or_raster(page, chart, enable_raster, raster)
+        page_results.append((chart, hit, source))
+        if hit is not None:
+            if source == 'vector':
+                std_vector_hit_charts.append(chart)
+                any_vector_hit = True
+            # A raster hit landing inside the canonical Miller-
+            # plateau range (≈ 1.5..7 V) is much more trustworthy
+            # than the wider-bbox title-anchored finder's hit on
+            # the same chart, which tends to latch onto the
+            # curve's high-V endpoint when the bbox includes the
+            # x-axis title and gridlines outside the plot frame.
+            # Treat these as "plausible" and use them to suppress
+            # overlapping title-anchored alternates.
+            v = getattr(hit, 'v_pl', None)
+            if v is not None and 1.5 < v < 7.5:
+                std_plausible_charts.append(chart)
+    if not any_vector_hit and title_charts:
+        for chart in title_charts:
+            # Skip the title chart when it overlaps a std chart
+            # that already produced a trustworthy hit (vector, or
+            # raster in the typical Miller-plateau voltage range).
+            # An unreliable std-raster hit (e.g. V≈0 from a flat
+            # mis-anchored chart) doesn't suppress the title-
+            # anchored fallback — that's what saves SIJ482DP /
+            # SUP85N15-style cases where std mis-anchors.
+            if any(_chart_bboxes_overlap(chart.bbox, s.bbox)
+                   for s in std_vector_hit_charts):
+                continue
+            if any(_chart_bboxes_overlap(chart.bbox, s.bbox)
+                   for s in std_plausible_charts):
+                continue
+            hit, source = _vector_or_raster(page, chart, enable_raster, raster)
+            page_results.append((chart, hit, source))
+    return page_results
+
+
+_SALT_MODULES = ('chart_finder.py', 'curve_extract.py', 'raster_extract.py', '../pdf/layout.py')
+
+
+@functools.lru_cache(maxsize=None)
+def viz_source_salt() -> str:
+    """sha1 over the source of the modules `_find_on_page` runs, so an edit to any of them
+    invalidates `find_on_page` entries. Callable, resolved by disk_cache at call time."""
+    import hashlib
+    import os
+    h = hashlib.sha1()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for fn in _SALT_MODULES:
+        with open(os.path.join(here, fn), 'rb') as fh:
+            h.update(fh.read())
+    return h.hexdigest()
+
+
+@disk_cache(ttl='90d', file_dependencies=[0], salt=(viz_source_salt, 'v02'))
+def find_on_page(pdf_path: str, page_num: int, enable_raster: bool = True
+                 ) -> List[Tuple[ChartLocation, Optional[object], Optional[str]]]:
+    """``_find_on_page`` for a page of a PDF file, persisted on disk so a
+    re-run over the same datasheets costs nothing."""
+    with pymupdf.open(pdf_path) as doc:
+        return _find_on_page(doc[page_num], enable_raster)
+
+
 def find_in_pdf(pdf_path: str,
                 enable_raster: bool = True,
                 enable_ocr: bool = False,
@@ -828,74 +934,11 @@ def find_in_pdf(pdf_path: str,
     and re-OCR — that pipeline produces a clean text layer with
     correct "Gate Charge"/"VGS" labels and chart-region tick values.
     """
-    from dslib.viz.chart_finder import (find_gate_charge_charts,
-                                        _find_infineon_raster_charts)
     doc = pymupdf.open(pdf_path)
     out = []
     for page in doc.pages():
-        text = page.get_text()
-        text_lower = text.lower()
-        # Toshiba TPH/XPN/XPQR datasheets caption the V_GS-vs-Q_g plot
-        # "Dynamic Input/Output Characteristics" and don't mention "gate
-        # charge" anywhere on the page.
-        if ('gate charge' not in text_lower
-                and 'gate-charge' not in text_lower
-                and 'qg' not in text_lower
-                and 'dynamic input/output' not in text_lower
-                and 'dynamic input / output' not in text_lower):
-            continue
-        std_charts = list(find_gate_charge_charts(page))
-        title_charts = list(_find_infineon_raster_charts(page))
-        # Try the standard charts first; only fall back to title-
-        # anchored charts when none of the standard ones yielded a
-        # **vector** plateau hit. A standard chart that succeeds only
-        # via the raster fallback is much less reliable (raster can
-        # latch onto V=0 gridlines on flat-line plots), so we still try
-        # the title-anchored chart in parallel and let ``find_vpl``
-        # pick the higher-scoring candidate. This also recovers charts
-        # the standard finder missed entirely (or returned a too-narrow
-        # bbox for, leaving the trace's vertical span too small to
-        # clear the ``find_plateau_raster`` sanity check).
-        page_results = []
-        any_vector_hit = False
-        std_vector_hit_charts: List[ChartLocation] = []
-        std_plausible_charts: List[ChartLocation] = []
-        for chart in std_charts:
-            hit, source = _vector_or_raster(page, chart, enable_raster)
-            page_results.append((chart, hit, source))
-            if hit is not None:
-                if source == 'vector':
-                    std_vector_hit_charts.append(chart)
-                    any_vector_hit = True
-                # A raster hit landing inside the canonical Miller-
-                # plateau range (≈ 1.5..7 V) is much more trustworthy
-                # than the wider-bbox title-anchored finder's hit on
-                # the same chart, which tends to latch onto the
-                # curve's high-V endpoint when the bbox includes the
-                # x-axis title and gridlines outside the plot frame.
-                # Treat these as "plausible" and use them to suppress
-                # overlapping title-anchored alternates.
-                v = getattr(hit, 'v_pl', None)
-                if v is not None and 1.5 < v < 7.5:
-                    std_plausible_charts.append(chart)
-        if not any_vector_hit and title_charts:
-            for chart in title_charts:
-                # Skip the title chart when it overlaps a std chart
-                # that already produced a trustworthy hit (vector, or
-                # raster in the typical Miller-plateau voltage range).
-                # An unreliable std-raster hit (e.g. V≈0 from a flat
-                # mis-anchored chart) doesn't suppress the title-
-                # anchored fallback — that's what saves SIJ482DP /
-                # SUP85N15-style cases where std mis-anchors.
-                if any(_chart_bboxes_overlap(chart.bbox, s.bbox)
-                       for s in std_vector_hit_charts):
-                    continue
-                if any(_chart_bboxes_overlap(chart.bbox, s.bbox)
-                       for s in std_plausible_charts):
-                    continue
-                hit, source = _vector_or_raster(page, chart, enable_raster)
-                page_results.append((chart, hit, source))
-        out.extend(page_results)
+        if _mentions_gate_charge(page_text(page)):
+            out.extend(find_on_page(pdf_path, page.number, enable_raster))
 
     # ``out`` may contain entries with hit=None (chart located but no
     # plateau extracted); fall through to OCR in that case too, because
@@ -925,15 +968,7 @@ def find_in_pdf(pdf_path: str,
         # keyword we found is on the front-page summary). OCR'ing the
         # image pages can surface the chart's tick labels and unblock
         # the title-anchored finder.
-        has_keyword = False
-        for page in doc.pages():
-            tl = page.get_text().lower()
-            if ('gate charge' in tl or 'gate-charge' in tl or 'qg' in tl
-                    or 'dynamic input/output' in tl
-                    or 'dynamic input / output' in tl):
-                has_keyword = True
-                break
-        if has_keyword:
+        if any(_mentions_gate_charge(page_text(page)) for page in doc.pages()):
             return out
 
     import os
@@ -995,13 +1030,14 @@ def find_vpl(pdf_path: str,
     so out-of-range hits are still accepted as a fallback when no in-
     range candidate exists.
     """
-    cands = []
-    for _chart, hit, _src in find_in_pdf(pdf_path,
-                                         enable_raster=enable_raster,
-                                         enable_ocr=enable_ocr):
-        if hit is None:
-            continue
-        cands.append(hit)
+    return best_vpl(find_in_pdf(pdf_path,
+                                enable_raster=enable_raster,
+                                enable_ocr=enable_ocr))
+
+
+def best_vpl(results) -> Optional[float]:
+    """The ``find_vpl`` pick among ``find_in_pdf`` results."""
+    cands = [hit for _chart, hit, _src in results if hit is not None]
     if not cands:
         return None
     cands.sort(key=lambda h: (0 if 1.5 < h.v_pl < 7.5 else 1, -h.score))
@@ -23,6 +23,7 @@ from typing import List, Optional, Tuple
 import numpy as np
 import pymupdf
 
+from dslib.pdf.layout import page_words
 from dslib.viz.chart_finder import ChartLocation
 
 
@@ -34,13 +35,66 @@ class RasterPlateauHit:
     plateau_run: Tuple[int, int]  # (x_pixel_start, x_pixel_end)
 
 
+class PageRaster:
+    """One grayscale render of a page region, shared by the raster
+    candidates on that page.
+
+    pymupdf aligns the pixels of a clipped render to the page origin, so
+    a crop of one render of the union of the candidate bboxes has exactly
+    the pixels of rendering each bbox on its own. The render happens on
+    the first ``crop``.
+    """
+
+    def __init__(self, page: pymupdf.Page, bboxes, dpi: int = 300):
+        self.page = page
+        self.dpi = dpi
+        self.clip: Optional[pymupdf.Rect] = None
+        for bb in bboxes:
+            self.clip = pymupdf.Rect(bb) if self.clip is None else self.clip | bb
+        if self.clip is not None:
+            self.clip &= page.rect
+        self._arr: Optional[np.ndarray] = None
+        self._origin = (0, 0)
+
+    def covers(self, bbox: pymupdf.Rect, dpi: int) -> bool:
+        if dpi != self.dpi or self.clip is None:
+            return False
+        inter = bbox & self.page.rect
+        return not inter.is_empty and self.clip.contains(inter)
+
+    def crop(self, bbox: pymupdf.Rect) -> np.ndarray:
+        zoom = self.dpi / 72.0
+        mat = pymupdf.Matrix(zoom, zoom)
+        if self._arr is None:
+            pix = self.page.get_pixmap(matrix=mat, clip=self.clip, colorspace=pymupdf.csGRAY)
+            self._arr = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+            self._origin = (pix.x, pix.y)
+        ir = ((bbox & self.page.rect) * mat).irect
+        x, y = self._origin
+        return self._arr[ir.y0 - y:ir.y1 - y, ir.x0 - x:ir.x1 - x]
+
+
+def page_raster(page: pymupdf.Page, charts: List[ChartLocation],
+                dpi: int = 300) -> Optional[PageRaster]:
+    """Shared render for the calibrated charts of a page, None when there
+    are fewer than two (a single clip render is cheaper)."""
+    bboxes = [_plot_interior_bbox(c) for c in charts if c.has_calibration()]
+    if len(bboxes) < 2:
+        return None
+    return PageRaster(page, bboxes, dpi=dpi)
+
+
 def _render_chart(page: pymupdf.Page,
                   bbox: pymupdf.Rect,
-                  dpi: int = 300) -> Tuple[np.ndarray, float, float]:
+                  dpi: int = 300,
+                  raster: Optional[PageRaster] = None) -> Tuple[np.ndarray, float, float]:
     """Render the chart bbox region. Returns (grayscale array, scale_x,
-    scale_y) where scale_X is pixels-per-pdf-point.
+    scale_y) where scale_X is pixels-per-pdf-point. Crops ``raster``
+    instead when it covers the bbox.
     """
     zoom = dpi / 72.0
+    if raster is not None and raster.covers(bbox, dpi):
+        return raster.crop(bbox), zoom, zoom
     mat = pymupdf.Matrix(zoom, zoom)
     pix = page.get_pixmap(matrix=mat, clip=bbox, colorspace=pymupdf.csGRAY)
     arr = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
@@ -405,7 +459,7 @@ def _mask_inchart_text(page: pymupdf.Page,
     if _doc_is_ocred(page):
         return arr
     try:
-        words = page.get_text('words')
+        words = page_words(page)
     except Exception:
         return arr
     arr = arr.copy()
@@ -571,14 +625,16 @@ def _title_is_dual_axis(title: Optional[str]) -> bool:
 
 def find_plateau_raster(page: pymupdf.Page,
                         chart: ChartLocation,
-                        dpi: int = 300) -> Optional[RasterPlateauHit]:
+                        dpi: int = 300,
+                        raster: Optional[PageRaster] = None) -> Optional[RasterPlateauHit]:
     """Image-based fallback when ``viz.curve_extract.find_plateau`` finds
-    no vector strokes inside the chart."""
+    no vector strokes inside the chart. ``raster`` is an optional shared
+    render of the page (see ``page_raster``)."""
     if not chart.has_calibration():
         return None
 
     bbox = _plot_interior_bbox(chart)
-    arr, sx, sy = _render_chart(page, bbox, dpi=dpi)
+    arr, sx, sy = _render_chart(page, bbox, dpi=dpi, raster=raster)
     # Wipe out in-chart text (curve labels like "20 V"/"40 V") before the
     # plateau scan — labels sit right on top of the curves and would pull
     # the per-column trace away from the actual line.
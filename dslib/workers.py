@@ -0,0 +1,154 @@
+"""
+Long-lived process pool for the datasheet pipeline.
+
+`run_parallel(..., 'multiprocessing')` spawns a fresh joblib pool per call, and each of its workers
+imports pymupdf/pdfminer/pandas and compiles the dslib.pdf.expr regex tables again. `WorkerPool`
+forks its workers from a forkserver that preloaded those modules (`dslib.pdf.warm`), keeps them
+across calls and recycles each worker after `max_tasks_per_child` tasks to cap memory growth.
+
+Use `shared_worker_pool()` (or `run_parallel(..., backend='pool')`) to share one pool per process.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Hashable, Optional, Sequence
+
+from dslib import get_logger
+
+logger = get_logger()
+
+DEFAULT_PRELOAD = ('dslib.pdf.warm',)
+
+
+def _timed_call(fn, args):
+    t0 = time.perf_counter()
+    ret = fn(*args)
+    return ret, time.perf_counter() - t0
+
+
+class PoolStats:
+    """Task latencies (measured inside the workers) and wall time of the `map_jobs` calls."""
+
+    def __init__(self):
+        self.latencies = []
+        self.wall_time = 0.
+
+    @property
+    def n_tasks(self):
+        return len(self.latencies)
+
+    @property
+    def throughput(self):
+        """Tasks per second of wall time."""
+        return self.n_tasks / self.wall_time if self.wall_time > 0 else 0.
+
+    def percentile(self, q):
+        if not self.latencies:
+            return float('nan')
+        lat = sorted(self.latencies)
+        return lat[min(len(lat) - 1, int(round(q / 100 * (len(lat) - 1))))]
+
+    def __str__(self):
+        return '%d tasks in %.1fs (%.2f/s), latency p50=%.2fs p90=%.2fs max=%.2fs' % (
+            self.n_tasks, self.wall_time, self.throughput,
+            self.percentile(50), self.percentile(90), max(self.latencies, default=float('nan')))
+
+
+class WorkerPool:
+    def __init__(self, max_workers: Optional[int] = None, max_tasks_per_child: Optional[int] = 200,
+                 preload: Sequence[str] = DEFAULT_PRELOAD):
+        """
+        :param max_workers: defaults to the number of cores
+        :param max_tasks_per_child: recycle a worker after this many tasks, None to never recycle
+        :param preload: modules imported once in the forkserver, inherited by all workers
+        """
+        from dslib.util import num_cores
+        self.max_workers = max_workers or num_cores()
+        self.max_tasks_per_child = max_tasks_per_child
+        self.preload = list(preload)
+        self.stats = PoolStats()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _context(self):
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context('forkserver')
+            ctx.set_forkserver_preload(self.preload)
+            return ctx
+        return multiprocessing.get_context('spawn')
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context(),
+                                                     max_tasks_per_child=self.max_tasks_per_child)
+            return self._executor
+
+    def map_jobs(self, jobs: Dict[Hashable, tuple], progress=True) -> Dict:
+        """
+        Run `jobs` (key -> callable or (fn, *args), as in `dslib.util.run_parallel`) and return key -> result.
+        Raises the first exception of a failed task.
+        """
+        if not jobs:
+            return {}
+        executor = self._get_executor()
+        t0 = time.perf_counter()
+        futures = {}
+        for key, job in jobs.items():
+            fn, args = (job, ()) if callable(job) else (job[0], job[1:])
+            futures[executor.submit(_timed_call, fn, args)] = key
+
+        results = {}
+        bar = None
+        if progress:
+            from tqdm import tqdm
+            bar = tqdm(desc="Run Progress:", total=len(jobs))
+        try:
+            for fut in as_completed(futures):
+                ret, dt = fut.result()
+                results[futures[fut]] = ret
+                self.stats.latencies.append(dt)
+                if bar is not None:
+                    bar.update()
+        except BaseException:
+            for fut in futures:
+                fut.cancel()
+            raise
+        finally:
+            if bar is not None:
+                bar.close()
+            self.stats.wall_time += time.perf_counter() - t0
+
+        logger.info('WorkerPool: %s', self.stats)
+        return {k: results[k] for k in jobs.keys()}
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+_shared_pool: Optional[WorkerPool] = None
+
+
+def shared_worker_pool(max_workers: Optional[int] = None) -> WorkerPool:
+    """The process-wide pool, created on first use. A different `max_workers` replaces it."""
+    global _shared_pool
+    if _shared_pool is not None and max_workers and _shared_pool.max_workers != max_workers:
+        _shared_pool.shutdown()
+        _shared_pool = None
+    if _shared_pool is None:
+        tasks = os.environ.get('DSLIB_POOL_MAX_TASKS_PER_CHILD')
+        _shared_pool = WorkerPool(max_workers=max_workers, max_tasks_per_child=int(tasks) if tasks else 200)
+        atexit.register(_shared_pool.shutdown)
+    return _shared_pool
@@ -1,6 +1,8 @@
 import os.path
 from math import nan
-from typing import Callable, Literal
+from typing import Callable, List, Literal, Tuple, Union
+
+import numpy as np
 
 from dslib.cache import mem_cache
 
@@ -19,21 +21,40 @@ class MagneticCoreMaterialSpecs:
         self.dc_bias = dc_bias
         self.dc_magnetization = dc_magnetization
 
-    def permeability_dc_bias(self, H, no_raise=False):
-        H_oe = H / .7958e2
+    def dc_bias_ratio(self, H) -> Tuple[Union[float, np.ndarray], Union[bool, np.ndarray]]:
+        """
+        %µi / 100 at the dc magnetizing force H (A/m) and whether the core is saturated there (ratio outside
+        [0.25, 1], where `permeability_dc_bias` raises). H can be a scalar or an array.
+        """
+        H_oe = _model_in(H) / .7958e2
         dc_bias = self.dc_bias(H_oe=H_oe)
+        with np.errstate(invalid='ignore'):
+            saturated = np.logical_not((0.25 <= dc_bias) & (dc_bias <= 1))
+        return dc_bias, (bool(saturated) if np.ndim(saturated) == 0 else saturated)
+
+    def permeability_dc_bias(self, H, no_raise=False):
+        dc_bias, saturated = self.dc_bias_ratio(H)
         if not no_raise:
-            assert 0.25 <= dc_bias <= 1, "dc bias core saturation too high, %%µi = %.0f%%" % (dc_bias * 100)
+            assert not np.any(saturated), "dc bias core saturation too high, %%µi = %.0f%%" % (np.min(dc_bias) * 100)
         # too much DC bias inductivity drop
         return dc_bias * self.mu_r
 
 
+def _model_in(x):
+    """
+    Model input: scalars pass through unchanged (same float arithmetic as ever), sequences become float arrays.
+    On arrays a zero H or B evaluates to B = 0 / loss = 0 instead of raising ZeroDivisionError.
+    """
+    return x if np.ndim(x) == 0 else np.asarray(x, dtype=float)
+
+
 def micrometals_core_loss_model(a, b, c, d):
     def core_loss(Bpk_tesla, f_khz):
-        Bpk = Bpk_tesla * 1e4
-        f = f_khz * 1e3
-        denominator = a / Bpk ** 3 + b / Bpk ** 2.3 + c / Bpk ** 1.65
-        return f / denominator + d * Bpk ** 2 * f ** 2
+        Bpk = _model_in(Bpk_tesla) * 1e4
+        f = _model_in(f_khz) * 1e3
+        with np.errstate(divide='ignore'):
+            denominator = a / Bpk ** 3 + b / Bpk ** 2.3 + c / Bpk ** 1.65
+            return f / denominator + d * Bpk ** 2 * f ** 2
 
     return core_loss
 
@@ -42,9 +63,10 @@ def micrometals_dc_mag_model(µi, a, b, c, d, e):
     # Initial BH Curve or Initial Magnetization Curve,
 
     def flux_density_tesla(H_oe):
-        H = H_oe
-        denominator = 1 / (H + a * H ** b) + 1 / (c * H ** d) + 1 / e
-        Bpk_gauss = µi / denominator
+        H = _model_in(H_oe)
+        with np.errstate(divide='ignore'):
+            denominator = 1 / (H + a * H ** b) + 1 / (c * H ** d) + 1 / e
+            Bpk_gauss = µi / denominator
         return Bpk_gauss * 1e-4
 
     return flux_density_tesla
@@ -52,7 +74,7 @@ def micrometals_dc_mag_model(µi, a, b, c, d, e):
 
 def maginc_dc_magnetization_model(a, b, c, d, e, x):
     def flux_density_tesla(H_oe):
-        H = H_oe
+        H = _model_in(H_oe)
         B_tesla = ((a + b * H + c * H ** 2) / (1 + d * H + e * H ** 2)) ** x
         return B_tesla
 
@@ -61,7 +83,11 @@ def maginc_dc_magnetization_model(a, b, c, d, e, x):
 
 def micrometals_dc_bias_model(a, b, c, d):
     # dc saturation, "Percent Perm vs. H"
-    return lambda H_oe: 0.01 / (a + b * H_oe ** c) + d
+    def dc_bias(H_oe):
+        H = _model_in(H_oe)
+        return 0.01 / (a + b * H ** c) + d
+
+    return dc_bias
 
 
 # https://semic.cz/!old/files/pdf_www/Ljf_KDM.pdf
@@ -144,6 +170,16 @@ def micrometals_material(mat: MicroMetalsMatLiteral, shape: Literal['B', 'E', 'E
     )
 
 
+@mem_cache(ttl='1h')
+def micrometals_materials(shape: Literal['B', 'E', 'EQ', 'PQ', 'T'] = 'T') -> List[MagneticCoreMaterialSpecs]:
+    """
+    All catalog materials available for a part type (e.g. every toroid material), in catalog order.
+    """
+    df = load_micrometals_materials()
+    rows = df[df.iloc[:, 1] == shape]
+    return [micrometals_material(mat, shape, int(ui)) for mat, ui in zip(rows.iloc[:, 0], rows.iloc[:, 2])]
+
+
 # https://www.micrometals.com/products/materials/ms/
 Micrometals_MS_T_060u = micrometals_material('MS', 'T', 60)
 Micrometals_MS_T_090u = micrometals_material('MS', 'T', 90)
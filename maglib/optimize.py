@@ -0,0 +1,234 @@
+"""
+Inductor design-space search for a buck converter coil.
+
+Enumerates core material × toroid shape × stack count × turns × wire gauge × strands and evaluates every
+combination with the same models as `dclib.powerloss.dcdc_buck_coil` (dc bias `Ldc`, ripple current,
+core loss via mag-inc's method 2, DCR and Micrometals skin/proximity ACR), but on numpy arrays:
+
+    front = optimize_inductor(DcDcLoadParams(72, 27, f=39e3, io=30, ripple_factor=.3))
+    front[['core', 'turns', 'awg', 'strands', 'Ldc', 'P_total', 'volume', 'cost']]
+
+Designs are pruned as early as possible: saturated cores (`MagneticCoreMaterialSpecs.dc_bias_ratio`, or dc
+bias below a stricter `min_dc_bias`), DCM / excessive ripple, windings that do not fit the
+toroid window and wire options that are dominated (more loss and more copper) for the same core and turns.
+The result is the Pareto front of total loss vs. core envelope volume vs. cost.
+
+Cost is a relative figure: `core_cost` and `copper_cost` per cm³ of core and copper.
+"""
+import math
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from maglib import µ0
+from maglib.cores import MagneticCoreSpecs, MicrometalsToroidShapes, ToroidShape
+from maglib.materials import MagneticCoreMaterialSpecs, micrometals_materials
+from maglib.wire import MaterialResistivity, acr_factor_micrometals, awg2d, dc_resistance
+
+
+def _core_table(dc, materials, shapes, stacks, turns, min_dc_bias, max_ripple_ratio):
+    """Core-level quantities of all (material, shape, stack, turns) that neither saturate nor go DCM."""
+    n = np.asarray(turns, dtype=float)
+    rows = []
+    for si, shape in enumerate(shapes):
+        tpl = n / shape.l_e
+        Hdc = tpl * dc.Io
+        for mi, mat in enumerate(materials):
+            with np.errstate(all='ignore'):
+                bias, saturated = mat.dc_bias_ratio(Hdc)
+            for k in stacks:
+                A_e = shape.A_e * k
+                A_L = µ0 * mat.mu_r * A_e / shape.l_e
+                L0 = n ** 2 * A_L
+                Ldc = L0 * bias
+                with np.errstate(all='ignore'):
+                    Iripple = dc.Vo / (dc.f * Ldc) * (1 - dc.Vo / dc.Vi)
+                    ok = (~saturated & (bias >= min_dc_bias) & (Iripple < max_ripple_ratio * dc.Io)
+                          & (Iripple > 0.01 * dc.Io))
+                if not ok.any():
+                    continue
+                bias_k, Irip = bias[ok], Iripple[ok]
+                Bpk = .5 * µ0 * mat.mu_r * bias_k * tpl[ok] * Irip
+                with np.errstate(all='ignore'):
+                    cld = np.asarray(mat.core_loss_density(Bpk_tesla=Bpk, f_khz=dc.f * 1e-3), dtype=float)
+                P_core = cld * A_e * shape.l_e * 1e-3 * 1e6
+                fin = np.isfinite(P_core)
+                if not fin.any():
+                    continue
+                m = len(Irip[fin])
+                rows.append(dict(
+                    mi=np.full(m, mi), si=np.full(m, si), stack=np.full(m, k), ti=np.flatnonzero(ok)[fin],
+                    L0=L0[ok][fin], Ldc=Ldc[ok][fin], dc_bias=bias_k[fin], Iripple=Irip[fin],
+                    Bpk=Bpk[fin], P_core=P_core[fin],
+                ))
+    if not rows:
+        return None
+    return {c: np.concatenate([r[c] for r in rows]) for c in rows[0]}
+
+
+def _winding_table(dc, shape: ToroidShape, stack, turns, awgs, strands, resistivity, max_fill):
+    """Per (turns, wire) arrays of shape (len(turns), len(awgs) * len(strands)): Rdc, F_ac, copper volume."""
+    n = np.asarray(turns, dtype=float)[:, None]
+    d = np.repeat(awg2d(np.asarray(awgs, dtype=float)), len(strands))[None, :]
+    st = np.tile(np.asarray(strands, dtype=float), len(awgs))[None, :]
+    ht = shape.HT if math.isfinite(shape.HT) else shape.A_e / ((shape.OD - shape.ID) / 2)
+    bundle_d = d * st ** .5
+    mlt = (shape.OD - shape.ID) + 2 * ht * stack + math.pi * bundle_d  # wire centerline around the section
+    length = n * mlt
+    Rdc = dc_resistance(resistivity, length, d) / st
+    F_se, F_pe = acr_factor_micrometals(resistivity, d, dc.f, st, n, id=shape.ID, od=shape.OD)
+    fill = n * st * d ** 2 / shape.ID ** 2  # copper area / window area
+    cu_vol = length * st * math.pi * (d / 2) ** 2
+    Rdc = np.where(fill <= max_fill, Rdc, np.inf)
+    return Rdc, 1 + F_se + F_pe, cu_vol, fill
+
+
+def inductor_designs(dc, materials: Optional[Sequence[MagneticCoreMaterialSpecs]] = None,
+                     shapes: Optional[Sequence[ToroidShape]] = None,
+                     stacks: Iterable[int] = (1, 2, 3),
+                     turns: Iterable[int] = range(1, 101),
+                     awgs: Iterable[int] = range(8, 25),
+                     strands: Iterable[int] = range(1, 9),
+                     min_dc_bias=0.25,
+                     max_ripple_ratio=2.0,
+                     max_fill=0.4,
+                     resistivity=MaterialResistivity.CopperAnnealed.value,
+                     core_cost=1.0,
+                     copper_cost=1.0) -> pd.DataFrame:
+    """
+    Evaluate the design space for the operating point `dc` (uses Vi, Vo, f and Io; the ripple follows
+    from each design's Ldc).
+
+    :param materials: defaults to every Micrometals toroid material
+    :param shapes: defaults to the Micrometals toroid shapes with known dimensions
+    :param max_ripple_ratio: max. peak-to-peak ripple / Io (2 is the CCM boundary)
+    :param max_fill: max. copper area / toroid window area
+    :return: feasible designs that are not dominated by another wire option on the same core and turns
+    """
+    materials = list(materials if materials is not None else micrometals_materials('T'))
+    shapes = list(shapes if shapes is not None else MicrometalsToroidShapes.values())
+    stacks, turns, awgs, strands = list(stacks), list(turns), list(awgs), list(strands)
+
+    core = _core_table(dc, materials, shapes, stacks, turns, min_dc_bias, max_ripple_ratio)
+    if core is None:
+        return pd.DataFrame()
+
+    I_ms = dc.Io ** 2 + core['Iripple'] ** 2 / 12
+    I_ac2 = (core['Iripple'] / 2) ** 2 / 3
+    wire_awg = np.repeat(awgs, len(strands))
+    wire_strands = np.tile(strands, len(awgs))
+
+    parts = []
+    for si, shape in enumerate(shapes):
+        for k in stacks:
+            sel = np.flatnonzero((core['si'] == si) & (core['stack'] == k))
+            if not len(sel):
+                continue
+            Rdc, F_ac, cu_vol, fill = _winding_table(dc, shape, k, turns, awgs, strands, resistivity, max_fill)
+            ti = core['ti'][sel]
+            Rdc, F_ac, cu_vol, fill = Rdc[ti], F_ac[ti], cu_vol[ti], fill[ti]
+            P_dcr = I_ms[sel, None] * Rdc
+            P_acr = I_ac2[sel, None] * F_ac * Rdc
+            P_wire = P_dcr + P_acr
+            cost_cu = cu_vol * 1e6 * copper_cost
+
+            # per core & turns: keep the wire options not dominated in (loss, copper)
+            order = np.argsort(P_wire, axis=1, kind='stable')
+            c_sorted = np.take_along_axis(cost_cu, order, axis=1)
+            prev_min = np.minimum.accumulate(np.concatenate(
+                [np.full((len(sel), 1), np.inf), c_sorted[:, :-1]], axis=1), axis=1)
+            keep = np.zeros_like(P_wire, dtype=bool)
+            np.put_along_axis(keep, order, c_sorted < prev_min, axis=1)
+            keep &= np.isfinite(P_wire)
+            r, w = np.nonzero(keep)
+            if not len(r):
+                continue
+
+            env = math.pi / 4 * shape.OD ** 2 * shape.HT * k if math.isfinite(shape.HT) else shape.Vol * k
+            c = sel[r]
+            parts.append(pd.DataFrame(dict(
+                material=[materials[i].mpn for i in core['mi'][c]],
+                shape=shape.name,
+                stack=k,
+                turns=np.asarray(turns)[core['ti'][c]],
+                awg=wire_awg[w],
+                strands=wire_strands[w],
+                L0=core['L0'][c],
+                Ldc=core['Ldc'][c],
+                dc_bias=core['dc_bias'][c],
+                Iripple=core['Iripple'][c],
+                Bpk=core['Bpk'][c],
+                Rdc=Rdc[r, w],
+                fill=fill[r, w],
+                P_dcr=P_dcr[r, w],
+                P_acr=P_acr[r, w],
+                P_core=core['P_core'][c],
+                volume=env,
+                cost=shape.Vol * k * 1e6 * core_cost + cost_cu[r, w],
+            )))
+    if not parts:
+        return pd.DataFrame()
+    df = pd.concat(parts, ignore_index=True)
+    df['P_total'] = df.P_dcr + df.P_acr + df.P_core
+    df['core'] = [f'{m}-{s}' if k == 1 else f'{k}s({m}-{s})' for m, s, k in zip(df.material, df['shape'], df['stack'])]
+    df.attrs['materials'] = {m.mpn: m for m in materials}
+    df.attrs['shapes'] = {s.name: s for s in shapes}
+    return df
+
+
+def pareto_mask(values: np.ndarray) -> np.ndarray:
+    """
+    Rows of `values` (n, k) not dominated by another row, all objectives minimized. Of equal rows only the
+    first is kept.
+    """
+    values = np.asarray(values, dtype=float)
+    n, k = values.shape
+    # cheap pre-pass: among rows with equal objectives 3.., only the (obj1, obj2) staircase can survive
+    _, group = np.unique(values[:, 2:], axis=0, return_inverse=True) if k > 2 else (None, np.zeros(n, int))
+    if k > 1:
+        order = np.lexsort((values[:, 1], values[:, 0], group.ravel()))
+        y = pd.Series(values[order, 1])
+        g = pd.Series(group.ravel()[order])
+        prev_min = y.groupby(g).cummin().groupby(g).shift(fill_value=np.inf)
+        cand = np.zeros(n, dtype=bool)
+        cand[order] = (y < prev_min).values
+    else:
+        cand = np.ones(n, dtype=bool)
+
+    idx = np.flatnonzero(cand)
+    sub = values[idx]
+    front = np.empty_like(sub)
+    n_front = 0
+    keep = np.zeros(n, dtype=bool)
+    # in lexicographic order every dominating row comes before the rows it dominates
+    for i in np.lexsort(sub.T[::-1]):
+        v = sub[i]
+        if n_front and (front[:n_front] <= v).all(axis=1).any():
+            continue
+        front[n_front] = v
+        n_front += 1
+        keep[idx[i]] = True
+    return keep
+
+
+def pareto_front(df: pd.DataFrame, objectives: List[str] = ('P_total', 'volume', 'cost')) -> pd.DataFrame:
+    if df.empty:
+        return df
+    return df[pareto_mask(df[list(objectives)].values)].sort_values(list(objectives))
+
+
+def optimize_inductor(dc, objectives: List[str] = ('P_total', 'volume', 'cost'), **kwargs) -> pd.DataFrame:
+    """Pareto front of `inductor_designs(dc, **kwargs)`, sorted by loss."""
+    return pareto_front(inductor_designs(dc, **kwargs), objectives)
+
+
+def design_coil(design, designs: pd.DataFrame):
+    """`dclib.powerloss.CoilSpecs` of a row of `inductor_designs()` (e.g. to feed `dcdc_buck_coil`)."""
+    from dclib.powerloss import CoilSpecs
+
+    mat = designs.attrs['materials'][design.material]
+    shape = designs.attrs['shapes'][design['shape']]
+    core = MagneticCoreSpecs(f'{mat.mpn}-{shape.name}', mat, shape=shape).stack(int(design['stack']))
+    return CoilSpecs(Rdc=design.Rdc, turns=int(design.turns), wire_awg=int(design.awg),
+                     wire_strands=int(design.strands), core=core)
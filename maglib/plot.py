@@ -1,6 +1,8 @@
+import math
 import warnings
 from typing import List, Union
 
+import numpy as np
 import pandas as pd
 from matplotlib import pyplot as plt
 
@@ -8,6 +10,11 @@ from maglib import oe2Apm, µ0
 from maglib.materials import MagneticCoreMaterialSpecs
 
 
+def _geom_steps(start, stop, factor=1.3) -> np.ndarray:
+    """start, start * factor, ... below stop (the sweep grid of the curves below)."""
+    return start * factor ** np.arange(math.ceil(math.log(stop / start, factor)))
+
+
 # TODO
 """
 - this file needs some cleanup
@@ -22,16 +29,8 @@ def plot_dc_bias_curve(mat: Union[List[MagneticCoreMaterialSpecs], MagneticCoreM
         mat = [mat]
 
     for m in mat:
-        H_oe = 1
-
-        points = dict()
-
-        while H_oe < 2000:
-            ui_pct = m.dc_bias(H_oe=H_oe) * 100
-            points[H_oe] = ui_pct
-            H_oe *= 1.3
-
-        s = pd.Series(points)
+        H_oe = _geom_steps(1, 2000)
+        s = pd.Series(m.dc_bias(H_oe=H_oe) * 100, index=H_oe)
 
         if len(mat) == 1:
             s.plot()
@@ -56,16 +55,8 @@ def plot_dc_bias_curve(mat: Union[List[MagneticCoreMaterialSpecs], MagneticCoreM
 
 def dc_bias_curves(mats: List[MagneticCoreMaterialSpecs]):
     for mat in mats:
-        H_oe = 1
-
-        points = dict()
-
-        while H_oe < 2000:
-            ui_pct = mat.dc_bias(H_oe=H_oe) * 100
-            points[H_oe] = ui_pct
-            H_oe *= 1.3
-
-        s = pd.Series(points)
+        H_oe = _geom_steps(1, 2000)
+        s = pd.Series(mat.dc_bias(H_oe=H_oe) * 100, index=H_oe)
         s.plot(label='%s %s %dµ' % (mat.mfr, mat.mpn, mat.mu_r))
     plt.title('DC Bias curve')
     plt.semilogx()
@@ -79,17 +70,8 @@ def dc_bias_curves(mats: List[MagneticCoreMaterialSpecs]):
 def plot_dc_magnetization_curve_BH(mat: MagneticCoreMaterialSpecs):
     warnings.warn("this curve is non-standard plot")
 
-    H_oe = 1
-
-    points = dict()
-
-    while H_oe < 1000:
-        H = oe2Apm(H_oe)
-        B_tesla = µ0 * mat.mu_r * mat.dc_bias(H_oe=H_oe) * H
-        points[H_oe] = B_tesla
-        H_oe *= 1.3
-
-    s = pd.Series(points)
+    H_oe = _geom_steps(1, 1000)
+    s = pd.Series(µ0 * mat.mu_r * mat.dc_bias(H_oe=H_oe) * oe2Apm(H_oe), index=H_oe)
     s.plot()
     plt.title('DC Bias curve %s %s µi=%d' % (mat.mfr, mat.mpn, mat.mu_r))
     plt.semilogx()
@@ -101,16 +83,8 @@ def plot_dc_magnetization_curve_BH(mat: MagneticCoreMaterialSpecs):
 
 
 def plot_dc_magnetization_curve(mat: MagneticCoreMaterialSpecs):
-    H_oe = 1
-
-    points = dict()
-
-    while H_oe < 1000:
-        B_tesla = mat.dc_magnetization(H_oe=H_oe)
-        points[H_oe] = B_tesla
-        H_oe *= 1.3
-
-    s = pd.Series(points)
+    H_oe = _geom_steps(1, 1000)
+    s = pd.Series(mat.dc_magnetization(H_oe=H_oe), index=H_oe)
     s.plot()
     plt.title('DC Magnetization curve %s %s %dµ' % (mat.mfr, mat.mpn, mat.mu_r))
     plt.semilogx()
@@ -123,16 +97,8 @@ def plot_dc_magnetization_curve(mat: MagneticCoreMaterialSpecs):
 
 def dc_magnetization_curves(mats: List[MagneticCoreMaterialSpecs]):
     for mat in mats:
-        H_oe = 1
-
-        points = dict()
-
-        while H_oe < 1000:
-            B_tesla = mat.dc_magnetization(H_oe=H_oe)
-            points[H_oe] = B_tesla
-            H_oe *= 1.3
-
-        s = pd.Series(points)
+        H_oe = _geom_steps(1, 1000)
+        s = pd.Series(mat.dc_magnetization(H_oe=H_oe), index=H_oe)
         s.plot(label='%s %s %dµ' % (mat.mfr, mat.mpn, mat.mu_r))
 
     plt.title('DC Magnetization curve')
@@ -145,18 +111,12 @@ def dc_magnetization_curves(mats: List[MagneticCoreMaterialSpecs]):
 
 
 def plot_core_loss_density_curve(mat: Union[MagneticCoreMaterialSpecs, List[MagneticCoreMaterialSpecs]], f_khz):
-    Bpk_tesla = 10e-4
-
     if isinstance(mat, MagneticCoreMaterialSpecs):
         mat = [mat]
 
     for m in mat:
-        points = dict()
-        while Bpk_tesla < 1:
-            points[Bpk_tesla * 1e4] = m.core_loss_density(Bpk_tesla=Bpk_tesla, f_khz=f_khz)
-            Bpk_tesla *= 1.3
-
-        s = pd.Series(points)
+        Bpk_tesla = _geom_steps(10e-4, 1)
+        s = pd.Series(m.core_loss_density(Bpk_tesla=Bpk_tesla, f_khz=f_khz), index=Bpk_tesla * 1e4)
         s.plot(label='%d kHz' % f_khz)
 
     plt.title('Core Loss vs Bpk - %s %s %dµ' % (mat.mfr, mat.mpn, mat.mu_r))
@@ -176,13 +136,8 @@ def core_loss_density_curves(mat: List[MagneticCoreMaterialSpecs], f_khz):
         mat = [mat]
 
     for m in mat:
-        points = dict()
-        Bpk_tesla = 10e-4
-        while Bpk_tesla < 1:
-            points[Bpk_tesla * 1e4] = m.core_loss_density(Bpk_tesla=Bpk_tesla, f_khz=f_khz)
-            Bpk_tesla *= 1.3
-
-        s = pd.Series(points)
+        Bpk_tesla = _geom_steps(10e-4, 1)
+        s = pd.Series(m.core_loss_density(Bpk_tesla=Bpk_tesla, f_khz=f_khz), index=Bpk_tesla * 1e4)
         s.plot(label='%s %s %uµ' % (m.mfr, m.mpn, m.mu_r))
 
     plt.title('Core Loss vs Bpk @%d kHz' % (f_khz))
@@ -1,3 +1,8 @@
+from typing import Literal
+
+import numpy as np
+
+from dslib import dotdict
 from maglib import H2oe, µ0
 from maglib.cores import MagneticCoreSpecs
 from dclib.powerloss import CoilSpecs
@@ -137,3 +142,104 @@ def core_loss_from_dc_bias(dc: DcDcLoadParams, coil: CoilSpecs):
 
     return core_hysteresis_loss(Bpk, core=coil.core, f=dc.f)
 
+
+
+_GL_NODES, _GL_WEIGHTS = np.polynomial.legendre.leggauss(8)
+
+
+def coil_operating_point(coil: CoilSpecs, vi, vo, io, f, inductance: Literal['average', 'peak'] = 'average',
+                         rtol=1e-9, max_iter=60):
+    """
+    Self-consistent ripple current of a dc biased buck inductor.
+
+    `CoilSpecs.Ldc(Io)` ignores that the coil current swings around Io: L(i) keeps dropping towards the peak
+    current, the ripple depends on L over the whole swing, and the swing depends on the ripple. This
+    solves the coupled problem per load point with a bracketed Newton iteration, starting at the Ldc(Io)
+    ripple ΔI0 (the uncoupled estimate `BuckConverter.powerloss` used so far):
+
+    - 'average': volt-second balance ∫ L(i) di over [Io - ΔI/2, Io + ΔI/2] = Vo(1-D)/f, i.e. the ripple
+        follows the inductance averaged over the swing (exact for the dc bias curve as incremental L)
+    - 'peak': ΔI L(Io + ΔI/2) = Vo(1-D)/f, the conservative L(H_pk) fixed point
+
+    Core loss is evaluated at the converged point with mag-inc's method 2 (`Bpk_dc_bias`), using the
+    permeability of the effective inductance instead of µ(Io). Note that µ_eff ΔH (the flux swing) stays
+    ~ Vo(1-D)/(f N A_e), the extra ripple mostly shows up in peak current and copper loss.
+
+    All of vi, vo, io, f can be arrays (broadcast), e.g. a whole efficiency curve in one call:
+
+        op = coil_operating_point(coil, 72, 27, np.linspace(1, 30, 60), 40e3)
+        op.Iripple, op.Ipk, op.P_core, op.converged
+
+    :param coil:
+    :param inductance: 'average' or 'peak', see above
+    :param rtol: convergence criterion on the volt-second residual, relative to Vo(1-D)/f
+    :return: dotdict of arrays (scalars for scalar inputs):
+        L (effective inductance, Iripple = Vo(1-D)/(f L)), Ldc (uncoupled L at Io), Iripple, Ipk, Imin,
+        Bpk, P_core, cld (core loss density mW/cm³), saturated (dc bias at Ipk beyond the material range),
+        ccm, converged, iterations and residual (relative)
+    """
+    if inductance not in ('average', 'peak'):
+        raise ValueError(inductance)
+    vi, vo, io, f = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (vi, vo, io, f)))
+    shape = vi.shape
+    vi, vo, io, f = (v.ravel() for v in (vi, vo, io, f))
+
+    mat = coil.core.mat
+    tpl = (coil.turns / coil.core.l_e)
+    λ = vo * (1 - vo / vi) / f  # volt-seconds of the on (and the off) interval
+
+    def L(i):
+        with np.errstate(all='ignore'):
+            return coil.L0 * mat.dc_bias_ratio(tpl * np.abs(i))[0]
+
+    def residual(x):
+        if inductance == 'average':
+            i = io[:, None] + x[:, None] / 2 * _GL_NODES
+            flux = x / 2 * (L(i) @ _GL_WEIGHTS)
+            return flux - λ, (L(io + x / 2) + L(io - x / 2)) / 2
+        ipk = io + x / 2
+        h = 1e-6 * np.abs(ipk) + 1e-9
+        L_pk = L(ipk)
+        return x * L_pk - λ, L_pk + x / 2 * (L(ipk + h) - L(ipk - h)) / (2 * h)
+
+    Ldc = L(io)
+    with np.errstate(all='ignore'):
+        x = λ / Ldc
+    lo = np.zeros_like(x)
+    hi = np.full_like(x, np.inf)
+    iterations = np.zeros(x.shape, dtype=int)
+    converged = np.zeros(x.shape, dtype=bool)
+
+    for _ in range(max_iter):
+        g, dg = residual(x)
+        converged = np.abs(g) <= rtol * λ
+        active = ~converged & np.isfinite(x)
+        if not active.any():
+            break
+        iterations += active
+        lo = np.where(active & (g < 0), x, lo)
+        hi = np.where(active & (g > 0), x, hi)
+        with np.errstate(all='ignore'):
+            step = x - g / dg
+        # fall back to bisection (or bracket expansion) when Newton leaves the bracket
+        fallback = np.where(np.isfinite(hi), (lo + hi) / 2, 2 * x)
+        x = np.where(active, np.where((step > lo) & (step < hi), step, fallback), x)
+    else:
+        g, dg = residual(x)
+        converged = np.abs(g) <= rtol * λ
+
+    with np.errstate(all='ignore'):
+        L_eff = λ / x
+        Bpk = .5 * µ0 * mat.mu_r * (L_eff / coil.L0) * tpl * x
+        P_core, Bpk, cld = core_hysteresis_loss(Bpk, coil.core, f)
+    ipk = io + x / 2
+
+    def out(v):
+        return np.reshape(v, shape)[()]
+
+    return dotdict(
+        L=out(L_eff), Ldc=out(Ldc), Iripple=out(x), Ipk=out(ipk), Imin=out(io - x / 2),
+        Bpk=out(Bpk), P_core=out(P_core), cld=out(cld),
+        saturated=out(mat.dc_bias_ratio(tpl * np.abs(ipk))[1]), ccm=out(x < 2 * io),
+        converged=out(converged), iterations=out(iterations), residual=out(np.abs(g) / λ),
+    )
@@ -117,3 +117,98 @@ def test_wire():
             a = ac_resistance_factor(23e-9, d, f)[0]
             b = acr_factor_micrometals(23e-9, d, f, 1, 32, 14.1e-3, 27.69e-3)[0]
             assert abs(rel_err(a, b)) < 0.07
+
+
+def test_inductor_optimizer():
+    import numpy as np
+
+    from dclib.powerloss import dcdc_buck_coil
+    from maglib.materials import micrometals_material
+    from maglib.optimize import design_coil, inductor_designs, pareto_front, pareto_mask
+
+    dc = DcDcLoadParams(72, 27, f=39e3, io=30, ripple_factor=.3)
+    mats = [micrometals_material('MS', 'T', 60), micrometals_material('OE', 'T', 90)]
+    df = inductor_designs(dc, materials=mats, turns=range(5, 40), awgs=range(10, 18), strands=range(1, 5))
+    assert len(df) and (df.dc_bias >= .25).all() and (df.Iripple < 2 * dc.Io).all() and (df.fill <= .4).all()
+
+    # the vectorized models agree with the scalar dcdc_buck_coil
+    for _, row in df.sample(10, random_state=1).iterrows():
+        coil = design_coil(row, df)
+        p = dcdc_buck_coil(DcDcLoadParams(72, 27, f=39e3, io=30, L=coil.Ldc(30)), coil)
+        for k in ('P_dcr', 'P_acr', 'P_core'):
+            assert abs(rel_err(row[k], p[k])) < 0.01, (k, row[k], p[k])
+
+    # no design dominates a front member
+    front = pareto_front(df)
+    obj = df[['P_total', 'volume', 'cost']].values
+    for f in front[['P_total', 'volume', 'cost']].values:
+        assert not ((obj <= f).all(axis=1) & (obj < f).any(axis=1)).any()
+    assert pareto_mask(np.array([[1, 2], [2, 1], [2, 2], [1, 2]])).tolist() == [True, True, False, False]
+
+
+def test_mat_arrays():
+    import numpy as np
+
+    from maglib.materials import Micrometals_MS_T_060u
+
+    for mat in (Micrometals_Sendust_60u, Micrometals_MS_T_060u, MagInc_KoolMu_60, KDM_SendustKS_60):
+        H_oe = np.geomspace(1, 2000, 500)
+        Bpk = np.geomspace(1e-3, 1, 500)
+        np.testing.assert_allclose(mat.dc_bias(H_oe=H_oe), [mat.dc_bias(H_oe=h) for h in H_oe], rtol=1e-14)
+        np.testing.assert_allclose(mat.dc_magnetization(H_oe=H_oe), [mat.dc_magnetization(H_oe=h) for h in H_oe],
+                                   rtol=1e-14)
+        np.testing.assert_allclose(mat.core_loss_density(Bpk_tesla=Bpk, f_khz=50),
+                                   [mat.core_loss_density(Bpk_tesla=b, f_khz=50) for b in Bpk], rtol=1e-14)
+
+    # saturation is a mask on arrays, an assertion only on the scalar path
+    H = np.array([10., 100., 1e4, 1e6]) * 79.58
+    ratio, saturated = Micrometals_Sendust_60u.dc_bias_ratio(H)
+    assert saturated.tolist() == [False, False, True, True]
+    assert Micrometals_Sendust_60u.dc_bias_ratio(10 * 79.58)[1] is False
+    assert Micrometals_Sendust_60u.permeability_dc_bias(H, no_raise=True).shape == (4,)
+    try:
+        Micrometals_Sendust_60u.permeability_dc_bias(H)
+        assert False
+    except AssertionError as e:
+        assert 'saturation' in str(e)
+    assert Micrometals_Sendust_60u.dc_magnetization(H_oe=np.zeros(3)).tolist() == [0, 0, 0]
+
+
+def test_coil_operating_point():
+    import numpy as np
+
+    from dclib.powerloss import CoilSpecs, dcdc_buck_coil
+    from maglib.powerloss import coil_operating_point, core_loss_from_dc_bias
+
+    coil = CoilSpecs(Rdc=0, turns=20, core=cores.MagInc_106_KoolMu60)
+    io = np.linspace(4, 40, 25)
+    λ = 12 * (1 - 12 / 48) / 50e3
+
+    op = coil_operating_point(coil, 48, 12, io, 50e3)
+    assert op.converged.all() and op.residual.max() < 1e-9 and op.iterations.max() < 10
+    assert (np.diff(op.Iripple) > 0).all()
+    assert abs(rel_err(op.Iripple[0], λ / op.Ldc[0])) < 0.01  # ~ the Ldc(Io) estimate at light bias
+    for k in (0, 12, 24):
+        i = np.linspace(op.Imin[k], op.Ipk[k], 20001)
+        assert abs(rel_err(np.trapezoid(coil.Ldc(i, no_raise=True), i), λ)) < 1e-6  # volt-second balance
+
+    peak = coil_operating_point(coil, 48, 12, io, 50e3, inductance='peak')
+    assert peak.converged.all() and (peak.Iripple >= op.Iripple).all()
+    np.testing.assert_allclose(peak.Iripple * coil.Ldc(peak.Ipk, no_raise=True), λ, rtol=1e-8)
+
+    # batch == per point, scalars in -> scalars out
+    single = coil_operating_point(coil, 48, 12, io[12], 50e3)
+    assert np.ndim(single.Iripple) == 0 and abs(rel_err(single.Iripple, op.Iripple[12])) < 1e-12
+
+    dc0 = DcDcLoadParams(48, 12, f=50e3, io=io[12], L=coil.Ldc(io[12]))
+    assert abs(rel_err(op.P_core[12], core_loss_from_dc_bias(dc0, coil)[0])) < 0.01
+
+    # the converged point feeds dcdc_buck_coil
+    coil2 = CoilSpecs(Rdc=5e-3, turns=16, core=cores.Micrometals_MS_184_125, wire_awg=15, wire_strands=4)
+    op2 = coil_operating_point(coil2, 48, 12, 20, 50e3)
+    dc = DcDcLoadParams(48, 12, f=50e3, io=20, L=op2.L)
+    assert abs(rel_err(dc.Iripple, op2.Iripple)) < 1e-9
+    assert abs(rel_err(dcdc_buck_coil(dc, coil2, Bpk=op2.Bpk).P_core, op2.P_core)) < 1e-12
+
+    heavy = coil_operating_point(coil, 48, 12, [10, 400], 50e3)
+    assert heavy.saturated.tolist() == [False, True]
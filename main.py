@@ -1,6 +1,9 @@
 import argparse
 import asyncio
 import datetime
+import glob
+import hashlib
+import inspect
 import logging
 import math
 import os.path
@@ -9,22 +12,26 @@ import sys
 import traceback
 from typing import List, Dict, Literal, Tuple, Optional, Union
 
+import numpy as np
 import pandas as pd
 
 import dslib.manual_fields
 from dclib.powerloss import dcdc_buck_hs, dcdc_buck_ls
+from dclib.powerloss_batch import LoadGrid, MosfetArrays, dcdc_buck_hs_batch, dcdc_buck_ls_batch, weighted
 from discover_parts import discover_mosfets
 from dslib import write_csv, dotdict
-from dslib.cache import disk_cache
+from dslib.cache import file_sha256
 from dslib.discovery import DiscoveredPart, Substrate
+from dslib.downloader import download_datasheets
 from dslib.fetch import fetch_datasheet
 from dslib.field import Field, DatasheetFields
 from dslib.mosfet import GateDrive
 from dslib.pdf.fonts import fontforge_bin
 from dslib.pdf.parse import parse_datasheet, subsctract_needed_symbols, NoTabularData, TooManyPages
-from dslib.pdf.tabular import tabula_is_running
+from dslib.pdf.tabular import tabula_available
 from dslib.spec_models import DcDcLoadParams
 from dslib.store import Part
+from dslib.trace import TraceReport, current_trace, trace_stage, traced_call
 from dslib.util import run_parallel
 
 # MAX_PARALLEL = 2
@@ -92,6 +99,7 @@ def main_yaml():
                                            tDead=float(conf['gateDrive']['deadTime'])),
                        syncFet=SyncFetArgs(**conf['syncFet']),
                        inductor=InductorArgs(**conf['inductor']),
+                       thermal=ThermalArgs(**conf['thermal']) if conf.get('thermal') else None,
                    ),
                    loads=[
                        DcdcLoadPoint(weight=p['pointWeight'], vIn=p['vIn'], vOut=p['vOut'], pIn=p['pIn'],
@@ -99,6 +107,7 @@ def main_yaml():
                        for p in conf['loadPoints']
                    ],
                    q=cargs.q,
+                   sweepFormat=conf.get('sweepFormat', 'csv'),
                 )
     run(args, cargs, os.path.basename(cargs.config_file).split('.yaml')[0])
 
@@ -163,13 +172,36 @@ class InductorArgs():
         self.rippleFactor = rippleFactor
 
 
+class ThermalArgs():
+    """
+    Rank at the steady-state junction temperature (dclib.thermal) instead of the flat Tj assumption.
+    Rth(j-a) is `rthJa` for all parts, or estimated from the package (with a heatsink of `rthSa` K/W).
+    """
+
+    def __init__(self, ambient: float = 40, rthJa: Optional[float] = None, rthSa: Optional[float] = None):
+        assert -40 <= ambient <= 150
+        assert rthJa is None or rthJa > 0
+        assert rthSa is None or rthSa >= 0
+        self.ambient = float(ambient)
+        self.rthJa = rthJa
+        self.rthSa = rthSa
+
+    def rth(self, packages: List[Optional[str]]):
+        if self.rthJa is not None:
+            return np.full(len(packages), float(self.rthJa))
+        from dclib.thermal import package_rth
+        return package_rth(packages, rth_sa=self.rthSa)
+
+
 class DcdcArgs():
 
-    def __init__(self, controlFet: ControlFetArgs, gateDrive: GateDrive, syncFet: SyncFetArgs, inductor: InductorArgs):
+    def __init__(self, controlFet: ControlFetArgs, gateDrive: GateDrive, syncFet: SyncFetArgs, inductor: InductorArgs,
+                 thermal: Optional[ThermalArgs] = None):
         self.controlFet = controlFet
         self.gateDrive = gateDrive
         self.syncFet = syncFet
         self.inductor = inductor
+        self.thermal = thermal
 
 
 class DcdcLoadPoint():
@@ -190,6 +222,7 @@ class RunArgs():
                  loads: List[DcdcLoadPoint],
                  includeObsolete: bool = False,
                  q: Optional[str] = None,
+                 sweepFormat: Literal['csv', 'parquet'] = 'csv',
                  ):
         assert topology == 'buck'
         self.topology = topology
@@ -207,9 +240,15 @@ class RunArgs():
 
         self.vdsRange = vdsRange
         self.dcdc = dcdc
+        # the weighted sweep (generate_weighted_power_loss_csv) ranks single and n-parallel parts only,
+        # it has no switcher/conductor pairing
+        assert len(loads) <= 1 or not dcdc.controlFet.stagedSwitching, \
+            'controlFet.stagedSwitching is not supported with multiple loadPoints'
         self.loads = loads
         self.includeObsolete = includeObsolete
         self.q = q
+        assert sweepFormat in {'csv', 'parquet'}, sweepFormat
+        self.sweepFormat = sweepFormat
 
 
 def run(args: RunArgs, cargs, name):
@@ -259,14 +298,21 @@ def run(args: RunArgs, cargs, name):
     n_pre_select = len(parts)
     # if not args.no_pre_select:
 
-    assert len(args.loads) == 1
-    assert args.loads[0].weight == 1
-    l = args.loads[0]
-    dcdc = DcDcLoadParams(l.vIn, l.vOut, l.f, tDead=args.dcdc.gateDrive.tDead, pin=l.pIn,
-                          ripple_factor=args.dcdc.inductor.rippleFactor)
-
-    parts = dcdc.select_mosfets(parts,
-                                max_parallel=IDP_ID_RATIO if args.dcdc.controlFet.stagedSwitching else args.dcdc.controlFet.maxParallel)
+    # with multiple load points (e.g. an efficiency profile) all points are evaluated in one sweep,
+    # ranked by weighted loss. datasheets are read only once.
+    assert args.loads
+    sweep = len(args.loads) > 1
+    if not sweep:
+        assert args.loads[0].weight == 1
+    dcdcs = [DcDcLoadParams(l.vIn, l.vOut, l.f, tDead=args.dcdc.gateDrive.tDead, pin=l.pIn,
+                            ripple_factor=args.dcdc.inductor.rippleFactor)
+             for l in args.loads]
+    dcdc = dcdcs[0]
+
+    # a part must be suitable for every load point
+    for d in dcdcs:
+        parts = d.select_mosfets(parts,
+                                 max_parallel=IDP_ID_RATIO if args.dcdc.controlFet.stagedSwitching else args.dcdc.controlFet.maxParallel)
 
     print('Found       ', len(parts), 'out of', n_pre_select, 'parts are suitable for given DC-DC specs')
     print(set(p.mpn for p in parts))
@@ -285,10 +331,21 @@ def run(args: RunArgs, cargs, name):
         dslib.store.datasheets_db.add(dss)
 
         if not args.vdsRange:
-            dss = [ds for ds in dss if dcdc.vds_in_range(ds.get_max_or_min_or_typ('Vds'))]
+            dss = [ds for ds in dss if all(d.vds_in_range(ds.get_max_or_min_or_typ('Vds')) for d in dcdcs)]
         else:
             dss = [ds for ds in dss if ds.get_max_or_min_or_typ('Vds') >= args.vdsRange[0]]
 
+        if sweep:
+            generate_weighted_power_loss_csv(dss,
+                                             args=args.dcdc,
+                                             dcdcs=dcdcs,
+                                             weights=[l.weight for l in args.loads],
+                                             gd=args.dcdc.gateDrive,
+                                             name=name,
+                                             fmt=args.sweepFormat,
+                                             )
+            return
+
         generate_HS_power_loss_csv(dss,
                                    args=args.dcdc,
                                    dcdc=dcdc,
@@ -343,19 +400,27 @@ def compile_part_datasheet(part: DiscoveredPart, need_symbols, no_cache, no_ocr,
         if ld_keys:
             need_symbols = subsctract_needed_symbols(need_symbols, ld_keys, copy=True)
 
+    tr = current_trace()
+    if tr is not None:
+        tr.path = ds_path
+
     if not os.path.exists(ds_path) and not no_download:
-        asyncio.run(fetch_datasheet(ds_url, ds_path, mfr=mfr, mpn=mpn))
+        with trace_stage('download'):
+            asyncio.run(fetch_datasheet(ds_url, ds_path, mfr=mfr, mpn=mpn))
 
     # parse datasheet (tabula and pdf2txt):
     if ds_path in excludes:
         ds.errors.append('excluded')
     elif os.path.isfile(ds_path):
         try:
-            dsp = parse_datasheet(ds_path, mfr=mfr, mpn=mpn, need_symbols=need_symbols, no_ocr=no_ocr)
+            with trace_stage('parse_datasheet') as st:
+                dsp = parse_datasheet(ds_path, mfr=mfr, mpn=mpn, need_symbols=need_symbols, no_ocr=no_ocr)
+                dsp_fields = dsp.all_fields()
+                st.fields = len(dsp_fields)
             ds.timestamp = dsp.timestamp
             ds.date_from_meta = dsp.date_from_meta
             ds.date_from_text = dsp.date_from_text
-            ds.add_multiple(dsp.all_fields())
+            ds.add_multiple(dsp_fields)
         except (KeyError, AttributeError, NameError):  # Type, Timeout, TimeoutError,
             logging.error('Could not parse datasheet %s', ds_path)
             raise
@@ -473,27 +538,97 @@ def compute_part_powerloss(ds: DatasheetFields, dcdc: DcDcLoadParams, args) -> T
     return Part(specs=fet_specs, discovered=part), row
 
 
-@disk_cache(ttl='999d', salt=('13', excludes))
-def read_parts_datasheets(parts: List[DiscoveredPart], args):
-    need_symbols = {
-        'tRise', 'tFall',  # HS
-        'Qgd',  # HS
-        ('Qgs', 'Qg_th', 'Qgs2'),  # HS, need one of those.
-        'Vsd',  # LS
-        # if we would only specify Qgs, the OCR pipeline would brute-force rasterization
-        # until it wrongly finds Qgs (which actually was Qgs1)
-        # 'Qrr'  # LS # kl leave this, many DS dont have this
-    }
+# bump to re-parse all datasheets
+DATASHEETS_SALT = '14'
 
-    if not os.path.isdir('datasheets'):
-        try:
-            import subprocess
-            subprocess.run(['git', 'clone', 'https://github.com/open-pe/fet-datasheets', 'datasheets'])
-        except Exception as e:
-            print('git clone error:', e)
+# entry points of the datasheet extraction, `extractor_version` follows their imports
+EXTRACTION_MODULES = ('dslib.pdf.parse', 'dslib.field', 'dslib.manual_fields', 'dslib.mosfet')
+
+_extractor_version = None
+
+
+def _local_module_file(root, name) -> Optional[str]:
+    base = os.path.join(root, *name.split('.'))
+    for fn in (base + '.py', os.path.join(base, '__init__.py')):
+        if os.path.isfile(fn):
+            return fn
+    return None
 
-    if not tabula_is_running():
-        raise RuntimeError('tabula is not running')
+
+def local_import_closure(modules, root=None) -> List[str]:
+    """
+    Source files of `modules` and of every module of this repository they import, directly or
+    transitively, including imports inside functions (found by parsing the sources, not by importing).
+    """
+    import ast
+    root = root or os.path.dirname(os.path.abspath(__file__))
+    files = set()
+    todo = list(modules)
+    while todo:
+        name = todo.pop()
+        parts = name.split('.')
+        # importing a.b.c runs the __init__ of a and a.b too
+        for i in range(1, len(parts) + 1):
+            fn = _local_module_file(root, '.'.join(parts[:i]))
+            if fn is None or fn in files:
+                continue
+            files.add(fn)
+            pkg = parts[:i] if fn.endswith('__init__.py') else parts[:i - 1]
+            with open(fn, 'rb') as fh:
+                tree = ast.parse(fh.read(), fn)
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    todo += [a.name for a in node.names]
+                elif isinstance(node, ast.ImportFrom):
+                    base = pkg[:len(pkg) - node.level + 1] if node.level else []
+                    mod = '.'.join(base + (node.module.split('.') if node.module else []))
+                    todo += [mod] + [mod + '.' + a.name for a in node.names if a.name != '*']
+    return sorted(files)
+
+
+def extractor_version() -> str:
+    """Hash of the datasheet extraction sources (`EXTRACTION_MODULES` and their local imports, dslib/pdf)
+    and compile_part_datasheet."""
+    global _extractor_version
+    if _extractor_version is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha256(DATASHEETS_SALT.encode())
+        # dslib/pdf also holds files loaded by path (the ocrmypdf plugin)
+        files = set(local_import_closure(EXTRACTION_MODULES, root))
+        files.update(glob.glob(root + '/dslib/pdf/**/*.py', recursive=True))
+        for fn in sorted(files):
+            with open(fn, 'rb') as fh:
+                h.update(os.path.relpath(fn, root).encode())
+                h.update(fh.read())
+        h.update(inspect.getsource(compile_part_datasheet).encode())
+        _extractor_version = h.hexdigest()
+    return _extractor_version
+
+
+def datasheet_fingerprint(part: DiscoveredPart, need_symbols, no_ocr, man_fields) -> str:
+    """
+    Identifies the inputs of `compile_part_datasheet(part)`: pdf content, extractor sources,
+    manual fields, discovered specs and parse options.
+    The parts_db/datasheets_db lookups that narrow `need_symbols` are not part of it.
+    """
+    ds_path = part.get_ds_path()
+    key = (
+        extractor_version(),
+        ds_path,
+        file_sha256(ds_path) if os.path.isfile(ds_path) else None,
+        ds_path in excludes,
+        repr(man_fields.get(part.mfr, {}).get(part.mpn, [])),
+        repr(dslib.manual_fields.fallback_specs(part.mfr, part.mpn)),
+        repr(part.specs.fields()),
+        sorted(map(repr, need_symbols)),
+        bool(no_ocr),
+    )
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+def _check_parse_tools():
+    if not tabula_available():
+        raise RuntimeError('tabula is not available (no JPype/java and no tabula server running)')
 
     if not fontforge_bin():
         raise RuntimeError('fontforge not found')
@@ -520,19 +655,74 @@ def read_parts_datasheets(parts: List[DiscoveredPart], args):
     
     """
 
+
+def read_parts_datasheets(parts: List[DiscoveredPart], args):
+    """
+    Compile the DatasheetFields of all `parts`. Results are kept per part in `datasheets_manifest_db`
+    together with their `datasheet_fingerprint`; only parts whose fingerprint changed (or that are new)
+    are dispatched to the worker pool, the rest is taken from the manifest. Failed parts are recorded as
+    negative entries under the same fingerprint.
+    """
+    need_symbols = {
+        'tRise', 'tFall',  # HS
+        'Qgd',  # HS
+        ('Qgs', 'Qg_th', 'Qgs2'),  # HS, need one of those.
+        'Vsd',  # LS
+        # if we would only specify Qgs, the OCR pipeline would brute-force rasterization
+        # until it wrongly finds Qgs (which actually was Qgs1)
+        # 'Qrr'  # LS # kl leave this, many DS dont have this
+    }
+
+    if not os.path.isdir('datasheets'):
+        try:
+            import subprocess
+            subprocess.run(['git', 'clone', 'https://github.com/open-pe/fet-datasheets', 'datasheets'])
+        except Exception as e:
+            print('git clone error:', e)
+
     import pickle
 
     if os.path.isfile('fet-datasheets.pkl_'):
         with(open('fet-datasheets.pkl', 'rb')) as f:
             dss: List[DatasheetFields] = pickle.load(f)
     else:
-        parts_shuffled = list(parts)
-        random.shuffle(parts_shuffled)
-        jobs = {(p.mfr, p.mpn): (compile_part_datasheet, p, need_symbols, args.no_cache, args.no_ocr, args.no_download)
-                for p in
-                parts_shuffled}
-        results = run_parallel(jobs, int(args.j), 'multiprocessing', verbose=0)
-        dss: List[DatasheetFields] = list(results.values())
+        manifest = dslib.store.datasheets_manifest_db
+        man_fields = dslib.manual_fields.get_fields()
+
+        def _fingerprint(p):
+            return datasheet_fingerprint(p, need_symbols, args.no_ocr, man_fields)
+
+        results = {}
+        dirty = []
+        for p in parts:
+            entry = None if args.no_cache else manifest.get((p.mfr, p.mpn))
+            if entry is not None and entry[0] == _fingerprint(p):
+                results[(p.mfr, p.mpn)] = entry[1]
+            else:
+                dirty.append(p)
+
+        print('Datasheets: %d from manifest, %d to parse' % (len(results), len(dirty)))
+
+        if dirty:
+            _check_parse_tools()
+            if not args.no_download:
+                # one bulk async stage instead of a blocking download inside each worker
+                download_datasheets(dirty)
+            random.shuffle(dirty)
+            jobs = {(p.mfr, p.mpn): (traced_call, (p.mfr, p.mpn), compile_part_datasheet, p, need_symbols,
+                                     args.no_cache, args.no_ocr, True)
+                    for p in dirty}
+            traced = run_parallel(jobs, int(args.j), 'pool', verbose=0)
+            new = {k: ds for k, (ds, _) in traced.items()}
+            report_parse_profile(TraceReport(tr for _, tr in traced.values()))
+            # fingerprint after compiling, the pdf might have been downloaded meanwhile
+            by_key = {(p.mfr, p.mpn): p for p in dirty}
+            # failed parts, (None, None), are stored too so they are not dispatched again until their
+            # fingerprint changes (e.g. the pdf got downloaded)
+            manifest.add({k: (_fingerprint(by_key[k]), ds) for k, ds in new.items()})
+            results.update(new)
+
+        dss: List[DatasheetFields] = [results[(p.mfr, p.mpn)] for p in parts]
 
     dss = [d for d in dss if d != (None, None)]
 
@@ -543,6 +733,17 @@ def read_parts_datasheets(parts: List[DiscoveredPart], args):
     return dss
 
 
+def report_parse_profile(report: TraceReport):
+    """Print the per-stage parse profile of a `read_parts_datasheets` run and keep the traces in out/."""
+    if not report.traces:
+        return
+    print(report.format())
+    os.path.exists('out') or os.makedirs('out', exist_ok=True)
+    fn = f'out/parse-profile-{datetime.datetime.now():%Y-%m-%d-%H%M%S}.jsonl'
+    report.write_jsonl(fn)
+    print('parse traces written to', fn)
+
+
 def generate_parts_power_loss_csv(parts: List[DiscoveredPart], dcdc: DcDcLoadParams, args):
     assert parts, "No parts to generate"
 
@@ -855,6 +1056,151 @@ def generate_LS_power_loss_csv(dss: List[DatasheetFields], args: DcdcArgs, dcdc:
     # show_summary(dss)
 
 
+class _RowStream():
+    """
+    Appends row chunks to a CSV or Parquet file as they are computed, so an interrupted sweep
+    leaves its partial results behind.
+    """
+
+    def __init__(self, path: str, fmt: Literal['csv', 'parquet']):
+        self.path = path
+        self.fmt = fmt
+        self._writer = None
+        self._header = True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def write(self, rows: List[Dict]):
+        if not rows:
+            return
+        df = pd.DataFrame(rows)
+        if self.fmt == 'csv':
+            df.to_csv(self.path, mode='w' if self._header else 'a', header=self._header, index=False)
+            self._header = False
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self._writer is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            # columns that are all-None in the first chunk would be typed `null`
+            schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in schema])
+            self._writer = pq.ParquetWriter(self.path, schema)
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._writer.schema, preserve_index=False))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def generate_weighted_power_loss_csv(dss: List[DatasheetFields], args: DcdcArgs, dcdcs: List[DcDcLoadParams],
+                                     weights: List[float], gd: GateDrive, name,
+                                     fmt: Literal['csv', 'parquet'] = 'csv', chunk_size=500):
+    """
+    Rank HS and LS candidates by weighted loss across all load points, P_tot = sum(weight * P_tot(point)).
+    Losses are computed with the batch engine (dclib.powerloss_batch), `chunk_size` parts at a time.
+    Each chunk is streamed to a `-partial` file; the ranked HS and LS tables are written at the end.
+    A part (or n parallel parts) is ranked only if its Id is sufficient at every load point. Staged switching
+    (`controlFet.stagedSwitching`) is not supported here, `RunArgs` rejects it together with multiple loads.
+    With `args.thermal` the losses are evaluated at each part's steady-state Tj (dclib.thermal), parts that
+    run away thermally get NaN losses.
+    """
+    assert dss, "No parts to generate"
+    assert len(dcdcs) == len(weights)
+
+    candidates = []
+    for ds in dss:
+        fet_specs = get_fet_specs(ds)
+        if fet_specs is not None:
+            candidates.append((ds, fet_specs))
+
+    print('computing weighted power loss for %s parts at %s load points...' % (len(candidates), len(dcdcs)))
+
+    lg = LoadGrid(dcdcs)
+    point_cols = ['P_tot@' + d.fn_str('buck') for d in dcdcs]
+
+    dat = f'{datetime.datetime.now():%Y-%m-%d}'
+    out_fn = f'out/{name}/{dat}-buck-sweep{len(dcdcs)}-inp{len(dss)}'
+    stream = _RowStream(out_fn + '-partial.' + fmt, fmt)
+
+    sides = (
+        ('HS', dcdc_buck_hs_batch, 'buck_hs', args.controlFet.maxParallel),
+        ('LS', dcdc_buck_ls_batch, 'buck_ls', args.syncFet.maxParallel),
+    )
+    thermal = args.thermal
+    if thermal:
+        from dclib.thermal import dcdc_buck_hs_hot, dcdc_buck_ls_hot, lm_fits
+    result_rows = {side: [] for side, *_ in sides}
+
+    try:
+        for c in range(0, len(candidates), chunk_size):
+            chunk = candidates[c:c + chunk_size]
+            mfs = MosfetArrays.from_specs([mf for _, mf in chunk], isGaN=[ds.part.specs.isGaN for ds, _ in chunk])
+            ids = np.array([mf.Id for _, mf in chunk], dtype=float)
+            chunk_rows = []
+            if thermal:
+                rth = thermal.rth([ds.part.package for ds, _ in chunk])
+                fits = lm_fits([mf for _, mf in chunk], [f'{ds.part.mfr}:{ds.part.mpn}' for ds, _ in chunk])
+                hot_fns = dict(
+                    HS=lambda n: dcdc_buck_hs_hot(lg, mfs, gd, thermal.ambient, rth, n_parallel=n),
+                    LS=lambda n: dcdc_buck_ls_hot(lg, mfs, gd, thermal.ambient, rth, qrr_fits=fits, n_parallel=n),
+                )
+
+            for side, loss_fn, p_tot_fn, max_parallel in sides:
+                loss = None if thermal else loss_fn(lg, mfs, gd)
+                for i in range(1, max_parallel + 1):
+                    if thermal:
+                        hot = hot_fns[side](i)
+                        ls = hot.loss
+                    else:
+                        ls = loss.parallel(i)
+                    # see DcDcLoadParams.Id_in_range, nan Id passes
+                    id_ok = ~(ids[:, None] < lg.Io_max * 1.2 / i)
+                    p_points = getattr(ls, p_tot_fn)()
+                    lw = weighted(ls, weights)
+                    p_tot = getattr(lw, p_tot_fn)()
+
+                    for k, (ds, fet_specs) in enumerate(chunk):
+                        if not id_ok[k].all():
+                            continue
+                        if side == 'LS' and fet_specs.QgdQgsRatio > 1:
+                            continue  # mosfet might self turn-on
+                        if i > 1 and math.isnan(p_tot[k]):
+                            continue
+                        row = dict(
+                            side=side,
+                            mpn=ds.part.mfr[:3] + ' ' + (ds.part.mpn if i == 1 else f'{i}p {ds.part.mpn}'),
+                            housing=ds.part.package,
+                            Vds_max=ds.get_max_or_min_or_typ('Vds', False),
+                            Rds_max=fet_specs.Rds_on * 1000 / i,
+                            Id=fet_specs.Id * i,
+                            errors=', '.join(ds.errors),
+                            P_cl=lw.P_cl[k],
+                            P_sw=lw.P_sw[k],
+                            P_gd=lw.P_gd[k],
+                            P_coss=lw.P_coss[k],
+                            P_rr=lw.P_rr[k],
+                            P_dt=lw.P_dt[k],
+                            P_tot=p_tot[k],
+                            **dict(zip(point_cols, p_points[k])),
+                            **(dict(Tj_max=np.max(hot.Tj[k])) if thermal else {}),
+                        )
+                        chunk_rows.append(row)
+                        result_rows[side].append(row)
+
+            stream.write(chunk_rows)
+    finally:
+        stream.close()
+
+    for side, rows in result_rows.items():
+        df = pd.DataFrame(rows)
+        fn = f'{out_fn}-{side}.csv'
+        write_csv(df, fn, power_value_digits=3, sort_by=['P_tot'])
+        print('\n>>>', fn)
+
+    show_summary(dss)
+
+
 def show_summary(dss: List[DatasheetFields]):
     print('totel num parts :    ', len(dss))
     dss = [d for d in dss if d != (None, None)]
@@ -0,0 +1,80 @@
+"""
+detect_fields (one alternation prefilter per line) vs. the sequential loop over all field regexes.
+
+Corpus: every string literal in test/*.py, split into lines and CSV cells, plus the text of datasheets
+in ./datasheets (pdf text, line by line) if present. Asserts identical detections, prints timings.
+
+    python test/benchmark_detect_fields.py [max_pdfs]
+"""
+import ast
+import glob
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from dslib.pdf.parse import detect_fields, _detect_fields_sequential  # noqa: E402
+
+MFRS = ('any', 'infineon', 'toshiba', 'onsemi', 'ti')
+
+
+def corpus(max_pdfs=20):
+    lines = []
+    for fn in sorted(glob.glob(os.path.join(REPO_ROOT, 'test', '*.py'))):
+        with open(fn, encoding='utf-8') as fh:
+            tree = ast.parse(fh.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str):
+                for line in node.value.split('\n'):
+                    lines.append(line)
+                    lines.extend(line.split(','))
+
+    pdfs = sorted(glob.glob(os.path.join(REPO_ROOT, 'datasheets', '*', '*.pdf')))[:max_pdfs]
+    if pdfs:
+        import pymupdf
+        for fn in pdfs:
+            try:
+                with pymupdf.open(fn) as doc:
+                    for page in doc:
+                        lines.extend(page.get_text().split('\n'))
+            except Exception as e:
+                print('skip', fn, e)
+    return [l for l in lines if l.strip()]
+
+
+def _key(d):
+    return d.index, d.symbol, d.match and d.match.span()
+
+
+def main():
+    lines = corpus(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
+    print(len(lines), 'lines')
+
+    for mfr in MFRS:
+        detect_fields(mfr, ['warm-up'])
+        _detect_fields_sequential(mfr, ['warm-up'])
+
+        t0 = time.perf_counter()
+        ref = [_key(_detect_fields_sequential(mfr, [l])) for l in lines]
+        t_ref = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        new = [_key(detect_fields(mfr, [l])) for l in lines]
+        t_new = time.perf_counter() - t0
+
+        assert new == ref, mfr
+        n_det = sum(k[1] is not None for k in new)
+        print('%-10s %d detected  sequential %.3fs  combined %.3fs  (%.1fx)' % (
+            mfr, n_det, t_ref, t_new, t_ref / t_new))
+
+        multi_ref = [list(map(_key, _detect_fields_sequential(mfr, lines[i:i + 8], multi=True)))
+                     for i in range(0, len(lines), 8)]
+        multi_new = [list(map(_key, detect_fields(mfr, lines[i:i + 8], multi=True)))
+                     for i in range(0, len(lines), 8)]
+        assert multi_new == multi_ref, mfr
+
+
+if __name__ == '__main__':
+    main()
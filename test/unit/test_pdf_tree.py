@@ -42,3 +42,42 @@ def test_bbox2():
 
 
 
+
+
+def test_bbox_slots():
+    import pickle
+    from dslib.pdf.tree import Bbox
+
+    b = Bbox(0, 0, 10, 10)
+    assert not hasattr(b, '__dict__')
+    assert b['x2'] == b[2] == 10
+    assert b.t == (0, 0, 10, 10)
+
+    b.extend(Bbox(5, 5, 20, 15))
+    assert b.t == (0, 0, 20, 15)
+    assert b.area == 300
+
+    b2 = pickle.loads(pickle.dumps(b))
+    assert b2 == b and b2.area == 300
+
+
+def test_layout_primitives_pickle_and_copy():
+    import pickle
+    from copy import copy
+    from dslib.pdf.ascii import Row
+    from dslib.pdf.tree import Page, Word
+
+    page = Page(0, (0, 0, 612, 792), (0, 0, 612, 792))
+    words = {0: Word((0, 0, 0), (10, 700, 30, 710), 'Qg'), 5: Word((0, 0, 1), (60, 700, 80, 710), '52')}
+    row = Row('Qg   52', words, page)
+
+    w = copy(words[5])
+    w.line_offset = 5
+    assert words[5].line_offset == 0 and w.bbox is words[5].bbox
+
+    rows = pickle.loads(pickle.dumps({0: [row, row]}))
+    r = rows[0][0]
+    assert rows[0][1] is r
+    assert r.text == 'Qg   52' and r.page.mediabox == page.mediabox
+    assert repr(r.elements) == repr(words) and r.bbox == row.bbox
+    assert [str(p) for p in r.to_phrases()] == ['Qg', '52']
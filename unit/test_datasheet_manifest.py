@@ -0,0 +1,112 @@
+"""Incremental datasheet parsing (main.read_parts_datasheets): only parts whose fingerprint changed
+(pdf content, manual fields, discovered specs, extractor sources) are dispatched again."""
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import dslib.store
+import main
+from dslib import dotdict
+from dslib.field import DatasheetFields, Field
+from dslib.store import ObjectDatabase, RecordLog
+
+
+class _Specs:
+    def __init__(self, vds):
+        self.vds = vds
+
+    def fields(self):
+        return [Field('Vds', math.nan, math.nan, self.vds, 'V')]
+
+
+class _Part:
+    def __init__(self, tmp, mpn, vds=100):
+        self.mfr, self.mpn = 'ti', mpn
+        self.specs = _Specs(vds)
+        self._path = os.path.join(tmp, mpn + '.pdf')
+
+    def get_ds_path(self):
+        return self._path
+
+
+def _compile(part, need_symbols, no_cache, no_ocr, no_download=False):
+    if part.mpn.startswith('BAD'):
+        return None, None
+    return DatasheetFields(part=part)
+
+
+class DatasheetManifestTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        tmp = self._tmp.name
+        db = ObjectDatabase('datasheets-manifest')
+        db._lib_path = os.path.join(tmp, 'datasheets-manifest.pkl')
+        db._lck_path = db._lib_path + '.lock'
+        db._log = RecordLog(os.path.join(tmp, 'datasheets-manifest.log'), db._lck_path)
+        main.extractor_version()  # hashes the source of the unpatched compile_part_datasheet
+        self._patches = [
+            mock.patch.object(dslib.store, 'datasheets_manifest_db', db),
+            mock.patch.object(main, 'compile_part_datasheet', wraps=_compile),
+            mock.patch.object(main, '_check_parse_tools'),
+            mock.patch.object(main, 'report_parse_profile'),
+            mock.patch.object(main.os.path, 'isdir', return_value=True),
+        ]
+        for p in self._patches:
+            p.start()
+        self.args = dotdict(j=1, no_cache=False, no_ocr=False, no_download=True)
+        self.parts = [_Part(tmp, 'CSD%d' % i) for i in range(3)]
+        for p in self.parts:
+            self._write_pdf(p, b'%PDF-1.4 ' + p.mpn.encode())
+
+    def tearDown(self):
+        for p in reversed(self._patches):
+            p.stop()
+        self._tmp.cleanup()
+
+    @staticmethod
+    def _write_pdf(part, data):
+        with open(part.get_ds_path(), 'wb') as fh:
+            fh.write(data)
+
+    def _read(self, parts):
+        main.compile_part_datasheet.reset_mock()
+        dss = main.read_parts_datasheets(parts, self.args)
+        self.assertEqual([ds.part.mpn for ds in dss], [p.mpn for p in parts if not p.mpn.startswith('BAD')])
+        return sorted(c.args[0].mpn for c in main.compile_part_datasheet.call_args_list)
+
+    def test_only_dirty_parts_are_parsed(self):
+        self.assertEqual(self._read(self.parts), ['CSD0', 'CSD1', 'CSD2'])
+        self.assertEqual(self._read(self.parts), [])
+
+        self._write_pdf(self.parts[1], b'%PDF-1.4 revised')
+        new = _Part(self._tmp.name, 'CSD9')
+        self._write_pdf(new, b'%PDF-1.4 new')
+        self.assertEqual(self._read(self.parts + [new]), ['CSD1', 'CSD9'])
+
+        self.parts[2].specs = _Specs(150)
+        self.assertEqual(self._read(self.parts), ['CSD2'])
+
+    def test_failed_parts_are_recorded(self):
+        bad = _Part(self._tmp.name, 'BAD1')
+        self.assertEqual(self._read(self.parts + [bad]), ['BAD1', 'CSD0', 'CSD1', 'CSD2'])
+        self.assertEqual(self._read(self.parts + [bad]), [])
+        self._write_pdf(bad, b'%PDF-1.4 downloaded')
+        self.assertEqual(self._read([bad]), ['BAD1'])
+
+    def test_extractor_version_covers_imported_modules(self):
+        files = {os.path.relpath(fn, main.os.path.dirname(main.__file__))
+                 for fn in main.local_import_closure(main.EXTRACTION_MODULES)}
+        for fn in ('dslib/viz/curve_extract.py', 'apps/vpl_from_chart.py', 'dslib/manual_fields.py',
+                   'dslib/mosfet.py', 'dslib/field.py'):
+            self.assertIn(fn, files)
+
+    def test_no_cache_parses_all(self):
+        self._read(self.parts)
+        self.args.no_cache = True
+        self.assertEqual(self._read(self.parts), ['CSD0', 'CSD1', 'CSD2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+"""detect_fields with the per-manufacturer prefilter (dslib.pdf.expr.FieldDetector) finds the same symbols,
+at the same string index and span, as the sequential loop over all field regexes."""
+import unittest
+
+from dslib.pdf.expr import _detect_alternatives, get_field_detector
+from dslib.pdf.parse import _detect_fields_sequential, detect_fields
+
+LINES = [
+    'Drain-to-Source On Resistance', 'RDS(on)', 'R DS(on) VGS = 10 V', 'Static Drain-Source On-State Resistance',
+    'ID', 'I D @ 25C', 'Continuous drain current', 'IDP', 'gfs', '|Yfs|', 'Forward Transfer Admittance',
+    'td(on)', 'Turn-On Delay Time', 'tr', 'tf', 'Rise time', 'Fall time', 'trr', 'Reverse recovery time',
+    'Qrr', 'Peak reverse recovery charge', 'Reverse recovered charge', 'QRM', 'Qfr',
+    'Coss(TR)', 'Coss eff.(ER)', 'Effective output capacitance, energy related', 'Coss', 'Output capacitance',
+    'Ciss', 'Crss', 'Rg', 'RG(int)', 'Rg = 3 Ohm', 'RGEN = 2.2', 'Gate resistance',
+    'Qgs', 'Qgs1', 'Qgs2', 'Qg(th)', 'Qg(th-pl)', 'Gate charge at Vth', 'Pre-Vth Gate-to-Source Charge',
+    'Total gate charge sync.', 'Qsync', 'Qgd', 'Gate-to-Drain ("Miller") Charge', 'Qsw', 'Qoss', 'Output charge',
+    'Qg', 'Qg(tot)', 'Total Gate Charge', 'V(plateau)', 'Gate plateau voltage', 'VSD', 'Vsd IF',
+    'Diode forward voltage', 'VDSF', 'V(BR)DSS', 'Drain-Source Breakdown Voltage', 'VDSX',
+    'Breakdown voltage temperature coefficient', 'VGS(th)', 'Gate Threshold Voltage', 'Vth',
+    'Thermal resistance junction-case', '', 'nan', 1.5, 'x' * 90 + ' Qg',
+    'Operating junction temperature', 'Gate-source voltage', 'VGS = 10 V, ID = 50 A',
+]
+
+
+class DetectFieldsTests(unittest.TestCase):
+    def _key(self, d):
+        return d.index, d.symbol, d.match and d.match.span()
+
+    def test_same_as_sequential(self):
+        for mfr in ('any', 'infineon', 'toshiba'):
+            for line in LINES:
+                self.assertEqual(self._key(detect_fields(mfr, [line])),
+                                 self._key(_detect_fields_sequential(mfr, [line])), (mfr, line))
+            for i in range(0, len(LINES), 5):
+                chunk = LINES[i:i + 5]
+                self.assertEqual(list(map(self._key, detect_fields(mfr, chunk, multi=True))),
+                                 list(map(self._key, _detect_fields_sequential(mfr, chunk, multi=True))), chunk)
+                self.assertEqual(self._key(detect_fields(mfr, chunk)),
+                                 self._key(_detect_fields_sequential(mfr, chunk)), chunk)
+
+    def test_prefilter_rejects_unrelated(self):
+        det = get_field_detector('any')
+        self.assertFalse(det.any_field('operating junction temperature'))
+        self.assertTrue(det.any_field('qg(tot)'))
+
+    def test_alternatives(self):
+        self.assertEqual(_detect_alternatives('(?P<detect>(a|^b))'), ['a', '^b'])
+        self.assertEqual(_detect_alternatives('(?P<detect>(a)x(b|c))'), ['(a)x(b|c)'])
+        self.assertEqual(_detect_alternatives(r'(?P<detect>(\|?[a|b]|c))'), [r'\|?[a|b]', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
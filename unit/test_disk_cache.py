@@ -0,0 +1,187 @@
+"""disk_cache file-dependency keys (mtime vs content-hash mode) and the SqliteStore backend.
+
+Content-hash mode must survive a `touch` (clone, rsync) and still invalidate on a content
+change; the persistent hash index must hash a file only once per stat signature.
+SqliteStore must be a drop-in for PickleFileStore and evict by age and by size.
+"""
+import datetime
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import dslib.cache
+from dslib.cache import FileHashIndex, SqliteStore, disk_cache
+
+
+class DiskCacheContentHashTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patch = mock.patch.object(dslib.cache, 'cache_dir', self._tmp.name + '/cache')
+        self._patch.start()
+        self._index = mock.patch.object(dslib.cache, '_file_hash_index', FileHashIndex())
+        self._index.start()
+        self._enabled = mock.patch.object(dslib.cache, '_disk_cache_disabled', False)
+        self._enabled.start()
+        self.pdf = os.path.join(self._tmp.name, 'part.pdf')
+        with open(self.pdf, 'wb') as fh:
+            fh.write(b'%PDF-1.4 one')
+        self.calls = 0
+
+    def tearDown(self):
+        self._enabled.stop()
+        self._index.stop()
+        self._patch.stop()
+        self._tmp.cleanup()
+
+    def _decorated(self, content_hash):
+        @disk_cache(ttl='1d', file_dependencies=[0], content_hash=content_hash)
+        def parse(path):
+            self.calls += 1
+            with open(path, 'rb') as fh:
+                return fh.read()
+
+        return parse
+
+    def _bump_mtime(self):
+        st = os.stat(self.pdf)
+        os.utime(self.pdf, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+    def test_mtime_mode_invalidates_on_touch(self):
+        parse = self._decorated(content_hash=False)
+        parse(self.pdf)
+        self._bump_mtime()
+        parse(self.pdf)
+        self.assertEqual(self.calls, 2)
+
+    def test_content_hash_survives_touch(self):
+        parse = self._decorated(content_hash=True)
+        self.assertEqual(parse(self.pdf), b'%PDF-1.4 one')
+        self._bump_mtime()
+        self.assertEqual(parse(self.pdf), b'%PDF-1.4 one')
+        self.assertEqual(self.calls, 1)
+
+    def test_content_hash_invalidates_on_change(self):
+        parse = self._decorated(content_hash=True)
+        parse(self.pdf)
+        with open(self.pdf, 'wb') as fh:
+            fh.write(b'%PDF-1.4 two')
+        self.assertEqual(parse(self.pdf), b'%PDF-1.4 two')
+        self.assertEqual(self.calls, 2)
+
+    def test_index_hashes_once_and_persists(self):
+        index = FileHashIndex()
+        with mock.patch.object(FileHashIndex, '_hash_file', wraps=FileHashIndex._hash_file) as hf:
+            h = index.sha256(self.pdf)
+            self.assertEqual(index.sha256(self.pdf), h)
+            # a fresh process reads the persisted entry instead of hashing again
+            self.assertEqual(FileHashIndex().sha256(self.pdf), h)
+            self.assertEqual(hf.call_count, 1)
+            self._bump_mtime()
+            self.assertEqual(index.sha256(self.pdf), h)
+            self.assertEqual(hf.call_count, 2)
+
+    def test_content_hash_key_independent_of_checkout_location(self):
+        def parse(path):
+            pass
+
+        keys = []
+        for root in ('/home/a/fetlib', '/srv/clone'):
+            mod = mock.Mock(__file__=root + '/dslib/pdf/parse.py')
+            with mock.patch.object(dslib.cache, '_repo_root', root):
+                keys.append(dslib.cache.disk_cache_key(mod, parse, set(), ('datasheets/x.pdf',), {},
+                                                       repo_relative=True))
+        self.assertEqual(keys[0], keys[1])
+        self.assertTrue(keys[0].startswith('dslib/pdf/parse.py/'))
+
+    def test_index_appends_and_compacts(self):
+        files = []
+        for i in range(5):
+            files.append(os.path.join(self._tmp.name, 'p%d.pdf' % i))
+            with open(files[-1], 'wb') as fh:
+                fh.write(b'%d' % i)
+        a, b = FileHashIndex(compact_every=3), FileHashIndex(compact_every=3)
+        digests = [(a if i % 2 else b).sha256(fn) for i, fn in enumerate(files)]
+        log_size = os.path.getsize(a._log_path())
+        self.assertLess(log_size, 500)  # compacted after 3 entries, 2 left in the log
+        with mock.patch.object(FileHashIndex, '_hash_file', side_effect=AssertionError('not indexed')):
+            self.assertEqual([FileHashIndex().sha256(fn) for fn in files], digests)
+            self.assertEqual([a.sha256(fn) for fn in files], digests)
+
+    def test_index_drops_superseded_entries(self):
+        gone = os.path.join(self._tmp.name, 'gone.pdf')
+        with open(gone, 'wb') as fh:
+            fh.write(b'x')
+        index = FileHashIndex()
+        index.sha256(gone)
+        os.remove(gone)
+        for _ in range(300):  # every touch appends an entry for the same path
+            self._bump_mtime()
+            index.sha256(self.pdf)
+        self.assertLess(index._log_n, 130)
+        self.assertLess(os.path.getsize(index._log_path()), 130 * 200)
+        fresh = FileHashIndex()
+        fresh.sha256(self.pdf)
+        self.assertEqual(list(fresh._index), [self.pdf])  # the deleted file was pruned
+
+
+class SqliteStoreTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = SqliteStore(path=self._tmp.name, shards=3)
+        self._enabled = mock.patch.object(dslib.cache, '_disk_cache_disabled', False)
+        self._enabled.start()
+
+    def tearDown(self):
+        self._enabled.stop()
+        self._tmp.cleanup()
+
+    def test_roundtrip_and_delete(self):
+        self.assertIsNone(self.store.read('missing'))
+        self.store.write('a/b', {'x': [1, 2]})
+        self.assertEqual(self.store.read('a/b'), {'x': [1, 2]})
+        self.assertIn('a/b', self.store)
+        self.store.delete('a/b')
+        self.assertIsNone(self.store.read('a/b'))
+
+    def test_batched_read_write_and_stats(self):
+        items = {'k%03d' % i: i for i in range(50)}
+        self.store.write_many(items)
+        got = self.store.read_many(list(items) + ['nope'])
+        self.assertEqual(got, items)
+        self.assertEqual(self.store.stats()['entries'], 50)
+        self.assertGreater(self.store.size_bytes(), 0)
+
+    def test_evict_lru_by_size(self):
+        store = SqliteStore(path=self._tmp.name, shards=1)
+        for i in range(10):
+            store.write('k%d' % i, b'x' * 1000)
+            time.sleep(0.002)
+        store.read('k0')  # refresh, k1 is now the least recently used
+        store.evict(max_bytes=5 * 1100)
+        self.assertIsNotNone(store.read('k0'))
+        self.assertIsNone(store.read('k1'))
+        self.assertLessEqual(store.size_bytes(), 5 * 1100)
+
+    def test_evict_by_age(self):
+        self.store.write('old', 1)
+        self.assertEqual(self.store.evict(max_age=datetime.timedelta(seconds=0)), 1)
+        self.assertIsNone(self.store.read('old'))
+
+    def test_disk_cache_with_store(self):
+        calls = []
+
+        @disk_cache(ttl='1d', store=self.store)
+        def square(x):
+            calls.append(x)
+            return x * x
+
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(3), 9)
+        self.assertEqual(calls, [3])
+        self.assertEqual(self.store.stats()['entries'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+"""Bulk datasheet downloader (dslib/downloader.py) against a local HTTP stand-in: per-host concurrency
+limit, ETag skip, Range resume of a partial file, 404 -> next url, and the browser fallback only for
+URLs that do not serve a PDF."""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import dslib.fetch
+from dslib.downloader import BulkDownloader, DownloadJob
+
+PDF = b'%PDF-1.4\n' + bytes(range(256)) * 100
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'stand-in'
+
+    def log_message(self, *args):
+        pass
+
+    def _send_pdf(self, head):
+        srv = self.server
+        data = PDF
+        rng = self.headers.get('Range')
+        if rng and self.headers.get('If-Range', srv.etag) == srv.etag:
+            start = int(rng.split('=')[1].rstrip('-'))
+            self.send_response(206)
+            data = PDF[start:]
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('ETag', srv.etag)
+        self.end_headers()
+        if not head:
+            if self.path.startswith('/trickle'):
+                n = len(data) // 5 + 1
+                for i in range(0, len(data), n):
+                    self.wfile.write(data[i:i + n])
+                    self.wfile.flush()
+                    time.sleep(0.15)
+            else:
+                self.wfile.write(data)
+
+    def _handle(self, head):
+        srv = self.server
+        with srv.lock:
+            srv.requests.append((self.command, self.path, self.headers.get('Range')))
+            srv.active += 1
+            srv.max_active = max(srv.max_active, srv.active)
+        try:
+            if self.path.startswith('/slow'):
+                time.sleep(0.1)
+            if self.path.endswith('.pdf'):
+                self._send_pdf(head)
+            elif self.path == '/page.html':
+                body = b'<html>click to download</html>'
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if not head:
+                    self.wfile.write(body)
+            else:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+        finally:
+            with srv.lock:
+                srv.active -= 1
+
+    def do_GET(self):
+        self._handle(head=False)
+
+    def do_HEAD(self):
+        self._handle(head=True)
+
+
+class BulkDownloaderTests(unittest.TestCase):
+    def setUp(self):
+        self.srv = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.srv.lock = threading.Lock()
+        self.srv.requests = []
+        self.srv.active = self.srv.max_active = 0
+        self.srv.etag = '"v1"'
+        threading.Thread(target=self.srv.serve_forever, daemon=True).start()
+        self.base = 'http://127.0.0.1:%d' % self.srv.server_address[1]
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.srv.shutdown()
+        self.srv.server_close()
+        self._tmp.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self._tmp.name, 'ti', name + '.pdf')
+
+    def _gets(self):
+        return [r for r in self.srv.requests if r[0] == 'GET']
+
+    def test_concurrency_limit_and_etag_skip(self):
+        jobs = [DownloadJob(self._path('P%d' % i), [self.base + '/slow/P%d.pdf' % i]) for i in range(6)]
+        res = asyncio.run(BulkDownloader(per_host=2, browser_fallback=False).download_all(jobs))
+        self.assertEqual({r.status for r in res.values()}, {'downloaded'})
+        self.assertLessEqual(self.srv.max_active, 2)
+        with open(jobs[0].path, 'rb') as fh:
+            self.assertEqual(fh.read(), PDF)
+
+        n_get = len(self._gets())
+        res = asyncio.run(BulkDownloader(revalidate=True, browser_fallback=False).download_all(jobs))
+        self.assertEqual({r.status for r in res.values()}, {'unchanged'})
+        self.assertEqual(len(self._gets()), n_get)
+
+        self.srv.etag = '"v2"'
+        res = asyncio.run(BulkDownloader(revalidate=True, browser_fallback=False).download_all(jobs[:1]))
+        self.assertEqual(res[jobs[0].path].status, 'downloaded')
+
+    def test_resume_partial_file(self):
+        job = DownloadJob(self._path('R'), [self.base + '/R.pdf'])
+        os.makedirs(os.path.dirname(job.path))
+        with open(job.path + '.part', 'wb') as fh:
+            fh.write(PDF[:5000])
+        with open(job.path + '.part.meta.json', 'w') as fh:
+            fh.write('{"url": "%s", "etag": "\\"v1\\""}' % job.urls[0])
+
+        res = asyncio.run(BulkDownloader(browser_fallback=False).download_all([job]))
+        self.assertEqual(res[job.path].status, 'resumed')
+        self.assertEqual(self._gets()[-1][2], 'bytes=5000-')
+        with open(job.path, 'rb') as fh:
+            self.assertEqual(fh.read(), PDF)
+        self.assertFalse(os.path.exists(job.path + '.part'))
+
+    def test_slow_transfer_is_not_cut_off(self):
+        job = DownloadJob(self._path('S'), [self.base + '/trickle/S.pdf'])
+        res = asyncio.run(BulkDownloader(timeout=0.5, browser_fallback=False).download_all([job]))
+        self.assertEqual(res[job.path].status, 'downloaded')  # ~0.75s in total, no stall over 0.5s
+        with open(job.path, 'rb') as fh:
+            self.assertEqual(fh.read(), PDF)
+
+    def test_browser_fallback_only_for_non_pdf_urls(self):
+        job = DownloadJob(self._path('F'), [self.base + '/gone.pdf.missing', self.base + '/page.html'])
+        os.makedirs(os.path.dirname(job.path))
+        with open(job.path + '.part', 'wb') as fh:  # left by an earlier, interrupted download
+            fh.write(PDF[:5000])
+        with open(job.path + '.part.meta.json', 'w') as fh:
+            fh.write('{"url": "%s/F.pdf"}' % self.base)
+
+        async def _chromium(url, filename, **kwargs):
+            with open(filename, 'wb') as fh:
+                fh.write(PDF)
+
+        with mock.patch.object(dslib.fetch, 'download_with_chromium', side_effect=_chromium) as dl:
+            res = asyncio.run(BulkDownloader().download_all([job]))
+        self.assertEqual([c.args[0] for c in dl.call_args_list], [self.base + '/page.html'])
+        self.assertEqual(res[job.path].status, 'browser')
+
+        self.assertFalse(os.path.exists(job.path + '.part'))
+        self.assertFalse(os.path.exists(job.path + '.part.meta.json'))
+
+        job2 = DownloadJob(self._path('G'), [self.base + '/page.html'])
+        res = asyncio.run(BulkDownloader(browser_fallback=False).download_all([job2]))
+        self.assertEqual(res[job2.path].status, 'failed')
+        self.assertFalse(os.path.exists(job2.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Bounded ManagedMemCache (entries / estimated bytes, lru and lfu eviction) and the mem_cache
+decorator's negative-result caching and per-function hit/miss/eviction counters."""
+import datetime
+import threading
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import dslib.cache
+from dslib.cache import ManagedMemCache, mem_cache, mem_cache_stats
+
+TTL = datetime.timedelta(minutes=1)
+
+
+class ManagedMemCacheLimitTests(unittest.TestCase):
+    def test_lru_max_entries(self):
+        c = ManagedMemCache(max_entries=3)
+        for k in 'abc':
+            c.set(k, k.upper(), ttl=TTL)
+        self.assertEqual(c.get('a'), 'A')  # a is now most recently used
+        c.set('d', 'D', ttl=TTL)
+        self.assertIsNone(c.get('b'))
+        self.assertEqual([c.get(k) for k in 'acd'], ['A', 'C', 'D'])
+        self.assertEqual(c.stats()['evictions'], 1)
+
+    def test_lfu(self):
+        c = ManagedMemCache(max_entries=2, policy='lfu')
+        c.set('a', 1, ttl=TTL)
+        c.set('b', 2, ttl=TTL)
+        for _ in range(3):
+            c.get('a')
+        c.get('b')
+        c.set('c', 3, ttl=TTL)
+        self.assertEqual((c.get('a'), c.get('b'), c.get('c')), (1, None, 3))
+
+    def test_max_bytes(self):
+        c = ManagedMemCache(max_bytes='100KB')
+        for i in range(5):
+            c.set(i, np.zeros(4000), ttl=TTL)  # 32kB each
+        st = c.stats()
+        self.assertEqual(st['entries'], 3)
+        self.assertLessEqual(st['bytes'], 100 * 1024)
+        self.assertEqual(sorted(c.cache), [2, 3, 4])
+
+        c.set('big', np.zeros(20000), ttl=TTL)  # larger than the cache
+        self.assertNotIn('big', c)
+        c.set_limits(max_entries=1)
+        self.assertEqual(len(c), 1)
+        self.assertIsNone(c.stats()['bytes'])
+
+    def test_expired(self):
+        c = ManagedMemCache(max_entries=2)
+        c.set('a', 1, ttl=datetime.timedelta(seconds=-1))
+        self.assertIsNone(c.get('a'))
+        self.assertEqual(len(c), 0)
+
+
+class MemCacheDecoratorTests(unittest.TestCase):
+    def test_cache_none_and_stats(self):
+        storage = ManagedMemCache(max_entries=2)
+        calls = []
+
+        @mem_cache(ttl='1min', cache_storage=storage, cache_none=True)
+        def lookup(k):
+            calls.append(k)
+            return None if k == 'missing' else k * 2
+
+        for _ in range(3):
+            self.assertIsNone(lookup('missing'))
+        self.assertEqual(calls, ['missing'])
+
+        lookup("x"), lookup("y"), lookup("z")  # evicts "missing" and "x"
+        lookup('missing')
+        st = lookup.cache_stats
+        self.assertIs(mem_cache_stats()[st.name], st)
+        self.assertEqual((st.hits, st.misses, st.evictions), (2, 5, 3))
+
+    def test_none_not_cached_by_default(self):
+        calls = []
+
+        @mem_cache(ttl='1min', cache_storage=ManagedMemCache())
+        def lookup(k):
+            calls.append(k)
+
+        lookup(1), lookup(1)
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(lookup.cache_stats.hits, 0)
+
+    def test_synchronized_key_lock_survives_eviction(self):
+        tiny = ManagedMemCache(max_entries=1)
+        entered, release = threading.Event(), threading.Event()
+        calls = []
+
+        with mock.patch.object(dslib.cache, 'shared_managed_mem_cache', return_value=tiny):
+            @mem_cache(ttl='1min', cache_storage=tiny, synchronized=True)
+            def slow(k):
+                calls.append(k)
+                entered.set()
+                release.wait(5)
+                return k
+
+        threads = [threading.Thread(target=slow, args=('a',)) for _ in range(2)]
+        threads[0].start()
+        entered.wait(5)
+        tiny.set('other', 1, ttl=TTL)  # evicts whatever else the bounded cache holds
+        threads[1].start()
+        time.sleep(.05)
+        release.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(calls, ['a'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Page-selective OCR (dslib/pdf/pipeline.py): only image-only pages are rasterized and OCRed, the OCR
+output is spliced back in place and the text pages are kept as they are."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pymupdf
+
+import dslib.cache
+import dslib.pdf.pipeline as pipeline
+from dslib.pdf.pipeline import pages_needing_ocr, rasterize_ocrmypdf_pages, select_ocr_method
+
+TEXT = 'Electrical Characteristics Tj = 25 C unless otherwise noted, Qg Total Gate Charge 52 nC'
+
+
+def _write_pdf(path, image_pages):
+    doc = pymupdf.open()
+    for i in range(4):
+        page = doc.new_page()
+        if i in image_pages:
+            pix = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 40, 40), 0)
+            pix.clear_with(200)
+            page.insert_image(pymupdf.Rect(50, 50, 500, 700), pixmap=pix)
+        else:
+            page.insert_text((50, 80), '%s page %d' % (TEXT, i), fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def _fake_ocr(in_path, out_path, dpi):
+    with pymupdf.open(in_path) as doc:
+        for page in doc:
+            page.insert_text((50, 80), 'OCR %d' % page.number, fontsize=8)
+        doc.save(out_path)
+
+
+class PageOcrTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patch = mock.patch.object(dslib.cache, 'cache_dir', self._tmp.name + '/cache')
+        self._patch.start()
+        self.pdf = os.path.join(self._tmp.name, 'part.pdf')
+
+    def tearDown(self):
+        self._patch.stop()
+        self._tmp.cleanup()
+
+    def test_flags_image_only_pages(self):
+        _write_pdf(self.pdf, image_pages={1, 3})
+        self.assertEqual(pages_needing_ocr(self.pdf), [1, 3])
+        self.assertEqual(select_ocr_method(self.pdf), 'r600_pages_ocrmypdf')
+
+        _write_pdf(self.pdf, image_pages={0, 1, 2, 3})
+        self.assertEqual(select_ocr_method(self.pdf), 'r600_ocrmypdf')
+
+    def test_splices_ocr_pages_in_place(self):
+        _write_pdf(self.pdf, image_pages={1, 3})
+        out = self.pdf + '.r600_pages_ocrmypdf.pdf'
+        with mock.patch.object(pipeline, 'rasterize_ocrmypdf', side_effect=_fake_ocr) as ocr:
+            pipeline.pdf2pdf(self.pdf, out, 'r600_pages_ocrmypdf')
+        with pymupdf.open(ocr.call_args.args[0]) as sub:
+            self.assertEqual(len(sub), 2)  # only the flagged pages were OCRed
+
+        with pymupdf.open(out) as doc:
+            texts = [p.get_text() for p in doc]
+        self.assertEqual(len(texts), 4)
+        self.assertIn('page 0', texts[0])
+        self.assertIn('OCR 0', texts[1])
+        self.assertIn('page 2', texts[2])
+        self.assertIn('OCR 1', texts[3])
+
+    def test_all_pages_flagged_uses_whole_document(self):
+        _write_pdf(self.pdf, image_pages={0, 1, 2, 3})
+        out = self.pdf + '.ocr.pdf'
+        with mock.patch.object(pipeline, 'rasterize_ocrmypdf') as ocr:
+            rasterize_ocrmypdf_pages(self.pdf, out, 600)
+        ocr.assert_called_once_with(self.pdf, out, 600)
+
+
+if __name__ == '__main__':
+    unittest.main()
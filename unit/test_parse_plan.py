@@ -0,0 +1,101 @@
+"""parse_datasheet stage planner: cheap stages first, tabula / OCR only while needed symbols are missing,
+fields still merged in the old priority order (read_sheet before tabula before text)."""
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import dslib.cache
+import dslib.pdf.parse as parse
+import dslib.pdf.sheet
+from dslib.field import DatasheetFields, Field
+from dslib.trace import datasheet_trace
+
+n = math.nan
+
+
+def _fields(**kw):
+    return [Field(sym, n, v, n) for sym, v in kw.items()]
+
+
+def _dsf(fields):
+    ds = DatasheetFields()
+    ds.add_multiple(fields)
+    return ds
+
+
+class ParsePlanTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.pdf = os.path.join(self._tmp.name, 'CSD1.pdf')
+        with open(self.pdf, 'wb') as fh:
+            fh.write(b'%PDF-1.4')
+        meta = parse.DataSheetFileMeta('', None, None)
+        self.text_fields = _fields(Qgd=5e-9, Vsd=0.9, Vpl=4.5)
+        self.sheet_fields = _fields(Qgd=4e-9, tRise=10e-9, tFall=8e-9)
+        self.tabula = mock.Mock(return_value=_dsf(_fields(Qgs=3e-9, Qrr=50e-9)))
+        self._patches = [
+            mock.patch.object(dslib.cache, '_disk_cache_disabled', True),
+            mock.patch.object(parse, 'extract_text', return_value=('CSD1 text', meta)),
+            mock.patch.object(parse, 'validate_datasheet_text', return_value=True),
+            mock.patch.object(parse, 'extract_fields_from_text', side_effect=lambda *a, **k: _dsf(self.text_fields)),
+            mock.patch.object(dslib.pdf.sheet, 'read_sheet',
+                              side_effect=lambda p: mock.Mock(all_fields=lambda: list(self.sheet_fields))),
+            mock.patch.object(parse, 'read_charts', return_value=[]),
+            mock.patch.object(parse, 'tabula_read', self.tabula),
+            mock.patch.object(parse, 'pdf2pdf'),
+        ]
+        for p in self._patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self._patches):
+            p.stop()
+        self._tmp.cleanup()
+
+    def _parse(self, need):
+        return parse.parse_datasheet(self.pdf, mfr='ti', mpn='CSD1', need_symbols=need)
+
+    def test_resolved_skips_tabula(self):
+        need = {'tRise', 'Qgd', 'Vsd'}
+        with datasheet_trace() as tr:
+            ds = self._parse(need)
+        self.tabula.assert_not_called()
+        self.assertEqual(tr.skipped, ['tabula_read'])
+        self.assertEqual(need, {'tRise', 'Qgd', 'Vsd'})  # caller's set is not mutated
+        self.assertEqual(ds.get_typ_or_max_or_min('Qgd'), 4e-9)  # read_sheet wins over text
+        self.assertEqual(set(ds.keys()), {'Qgd', 'tRise', 'tFall', 'Vsd', 'Vpl'})
+
+    def test_missing_runs_tabula_for_the_rest(self):
+        ds = self._parse({'tRise', ('Qgs', 'Qg_th'), 'Qrr'})
+        self.assertEqual(self.tabula.call_args.kwargs['need_symbols'], {('Qgs', 'Qg_th'), 'Qrr'})
+        self.assertIn('Qrr', ds.keys())
+
+    def test_text_fields_do_not_displace_higher_priority_stages(self):
+        parse.read_charts.return_value = _fields(Vpl=3.8)
+        ds = self._parse({'tRise', 'Vsd', 'Qrr'})
+        parse.read_charts.assert_called_once()
+        self.assertEqual(ds.get_typ_or_max_or_min('Vpl'), 3.8)  # chart wins over text
+        self.assertEqual(self.tabula.call_args.kwargs['need_symbols'], {'Vsd', 'Qrr'})
+
+    def test_no_need_runs_everything(self):
+        self._parse(None)
+        self.assertIsNone(self.tabula.call_args.kwargs['need_symbols'])
+
+    def test_sheet_ocr_fallback_only_when_needed(self):
+        self.sheet_fields = []
+        self._parse({'Vsd'})
+        parse.pdf2pdf.assert_not_called()
+        self._parse({'tRise'})
+        self.assertEqual(parse.pdf2pdf.call_args.args[2], 'r600_ocrmypdf')
+
+    def test_sheet_ocr_falls_back_to_whole_document(self):
+        self.sheet_fields = []
+        with mock.patch.object(parse, 'select_ocr_method', return_value='r600_pages_ocrmypdf'):
+            self._parse({'tRise'})
+        self.assertEqual([c.args[2] for c in parse.pdf2pdf.call_args_list], ['r600_pages_ocrmypdf', 'r600_ocrmypdf'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Shared per-PDF layout cache (dslib/pdf/layout.py): the page helpers return what pymupdf returns,
+the layout is computed once per file, the char layer feeds the v2 row builder unchanged."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import pymupdf
+
+import dslib.cache
+import dslib.pdf.layout as layout
+from dslib.pdf.layout import get_char_layout, page_drawings, page_spans, page_text, page_words
+from dslib.v2.chars import _build_rows, _iter_chars
+
+
+def _write_pdf(path, label='Gate Charge Qg (nC)'):
+    doc = pymupdf.open()
+    for i in range(2):
+        page = doc.new_page()
+        page.insert_text((72, 100), '%s %d' % (label, i), fontsize=11)
+        page.insert_text((72.3, 130.7), 'VGS = 10 V', fontsize=7.3)
+        page.draw_rect(pymupdf.Rect(100.25, 200.5, 300.1, 400.3))
+        page.draw_line((100, 300.3), (250.7, 220.1))
+    doc.save(path)
+    doc.close()
+
+
+class PdfLayoutTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patch = mock.patch.object(dslib.cache, 'cache_dir', self._tmp.name + '/cache')
+        self._patch.start()
+        self.pdf = os.path.join(self._tmp.name, 'part.pdf')
+        _write_pdf(self.pdf)
+
+    def tearDown(self):
+        self._patch.stop()
+        self._tmp.cleanup()
+
+    def test_page_helpers_match_pymupdf(self):
+        with pymupdf.open(self.pdf) as doc:
+            for page in doc:
+                self.assertEqual(page_words(page), page.get_text('words'))
+                self.assertEqual(page_text(page), page.get_text())
+                self.assertEqual(page_drawings(page), page.get_drawings())
+                self.assertEqual(page_spans(page), layout._page_spans(page))
+                self.assertIsNotNone(layout._cached_page(page))
+                self.assertEqual(layout._cached_page(page).words.dtype, 'float64')
+
+    def test_layout_computed_once(self):
+        with mock.patch.object(layout, '_page_layout', wraps=layout._page_layout) as pl:
+            with pymupdf.open(self.pdf) as doc:
+                for page in doc:
+                    page_words(page)
+                    page_drawings(page)
+                    page_text(page)
+            self.assertEqual(pl.call_count, 2)
+
+        # a rewritten file is laid out again
+        _write_pdf(self.pdf, label='Total Gate Charge')
+        st = os.stat(self.pdf)
+        os.utime(self.pdf, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        with pymupdf.open(self.pdf) as doc:
+            self.assertIn('Total Gate Charge 1', page_text(doc[1]))
+
+    def test_in_memory_doc_falls_back(self):
+        doc = pymupdf.open()
+        page = doc.new_page()
+        page.insert_text((72, 100), 'Qg', fontsize=11)
+        self.assertIsNone(layout._cached_page(page))
+        self.assertEqual(page_words(page), page.get_text('words'))
+
+    def test_layout_error_is_logged(self):
+        with mock.patch.object(layout, 'get_layout', side_effect=ValueError('broken')), \
+                self.assertLogs(layout.logger, 'WARNING') as logs, pymupdf.open(self.pdf) as doc:
+            self.assertEqual(page_words(doc[0]), doc[0].get_text('words'))
+        self.assertIn('broken', logs.output[0])
+
+    def test_char_layer_matches_pdfminer(self):
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LAParams
+
+        laparams = LAParams(line_overlap=0.3, char_margin=2.0, line_margin=0.5, all_texts=True)
+        ref = [_build_rows(list(_iter_chars(p))) for p in extract_pages(self.pdf, laparams=laparams)]
+        got = [_build_rows(cp.chars()) for cp in get_char_layout(self.pdf)]
+        self.assertEqual([[r.text for r in rows] for rows in got], [[r.text for r in rows] for rows in ref])
+        self.assertEqual([[r.bbox for r in rows] for rows in got], [[r.bbox for r in rows] for rows in ref])
+
+
+if __name__ == '__main__':
+    unittest.main()
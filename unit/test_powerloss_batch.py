@@ -0,0 +1,85 @@
+"""Batch loss engine (dclib/powerloss_batch.py) must agree with the scalar dcdc_buck_hs/ls for every
+part x load point, and yield NaN where the scalar model refuses a part."""
+import math
+import unittest
+import warnings
+
+import numpy as np
+
+from dclib.powerloss import dcdc_buck_hs, dcdc_buck_ls
+from dclib.powerloss_batch import LoadGrid, MosfetArrays, dcdc_buck_hs_batch, dcdc_buck_ls_batch, weighted
+from dslib.mosfet import GateDrive, MosfetSpecs
+from dslib.spec_models import DcDcLoadParams
+
+_TERMS = ('P_cl', 'P_sw', 'P_dt', 'P_rr', 'P_gd', 'P_coss')
+
+
+def _specs():
+    return [
+        MosfetSpecs(Vds_max=100, Rds_on=5e-3, Qg=40e-9, tRise=10e-9, tFall=8e-9, Qrr=50e-9, trr=40e-9,
+                    Qgd=10e-9, Qgs=12e-9, Qg_th=5e-9, Vpl=4.5, Vsd=0.9, Coss=800e-12, Rg=1.2),
+        MosfetSpecs(Vds_max=150, Rds_on=9e-3, Qg=60e-9, tRise=20e-9, tFall=12e-9, Qrr=120e-9, trr=60e-9,
+                    Qgd=14e-9, Qgs=20e-9, Coss=500e-12, Coss_Vds=75),
+        MosfetSpecs(Vds_max=80, Rds_on=3e-3, Qg=90e-9, tRise=5e-9, tFall=30e-9, Qrr=200e-9, trr=80e-9,
+                    Qgd=20e-9, Qgs=25e-9, Qgs2=9e-9, Vpl=3.8, Vsd=-1.1, Coss=1500e-12, Rg=3),
+    ]
+
+
+def _loads():
+    return [DcDcLoadParams(vi=72, vo=27, pin=800, f=40e3, ripple_factor=0.3, tDead=300e-9),
+            DcDcLoadParams(vi=48, vo=12, io=20, f=200e3, iripple=4, tDead=50e-9),
+            DcDcLoadParams(vi=60, vo=30, io=5, f=100e3, ripple_factor=1.2, tDead=100e-9)]
+
+
+class PowerLossBatchTests(unittest.TestCase):
+    def setUp(self):
+        self.specs = _specs()
+        self.loads = _loads()
+        self.gd = GateDrive(rg_total=2, rg_total_dis=1.5, Von=10, Voff=0, fallback_V_pl=5)
+        self.mfs = MosfetArrays.from_specs(self.specs)
+        self.lg = LoadGrid(self.loads)
+
+    def _assert_matches(self, batch, scalar_fn, **kwargs):
+        for i, mf in enumerate(self.specs):
+            for j, dc in enumerate(self.loads):
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    ref = scalar_fn(dc, mf, self.gd, **kwargs)
+                for k in _TERMS:
+                    self.assertAlmostEqual(getattr(batch, k)[i, j] / (getattr(ref, k) or 1),
+                                           1 if getattr(ref, k) else 0, places=12, msg=(k, i, j))
+                self.assertAlmostEqual(batch.buck_hs()[i, j] if scalar_fn is dcdc_buck_hs
+                                       else batch.buck_ls()[i, j],
+                                       ref.buck_hs() if scalar_fn is dcdc_buck_hs else ref.buck_ls(), places=12)
+
+    def test_hs_matches_scalar(self):
+        batch = dcdc_buck_hs_batch(self.lg, self.mfs, self.gd)
+        self.assertEqual(batch.P_sw.shape, (3, 3))
+        self._assert_matches(batch, dcdc_buck_hs)
+        self._assert_matches(dcdc_buck_hs_batch(self.lg, self.mfs, self.gd, use_datasheet_timings=True),
+                             dcdc_buck_hs, use_datasheet_timings=True)
+
+    def test_ls_matches_scalar(self):
+        self._assert_matches(dcdc_buck_ls_batch(self.lg, self.mfs, self.gd), dcdc_buck_ls)
+        self._assert_matches(dcdc_buck_ls_batch(self.lg, self.mfs, self.gd, Tj=25), dcdc_buck_ls, Tj=25)
+
+    def test_rejected_part_is_nan(self):
+        gd = GateDrive(rg_total=2, rg_total_dis=1.5, Von=5, fallback_V_pl=5)  # part 1: Vpl fallback >= Von
+        with self.assertRaises(AssertionError):
+            dcdc_buck_hs(self.loads[0], self.specs[1], gd)
+        batch = dcdc_buck_hs_batch(self.lg, self.mfs, gd)
+        self.assertTrue(np.all(np.isnan(batch.P_sw[1])))
+        self.assertFalse(np.any(np.isnan(batch.P_sw[[0, 2]])))
+        self.assertTrue(math.isfinite(batch.P_cl[1, 0]))
+
+    def test_weighted(self):
+        batch = dcdc_buck_ls_batch(self.lg, self.mfs, self.gd).parallel(2)
+        w = weighted(batch, [.2, .5, .3])
+        self.assertEqual(w.P_cl.shape, (3,))
+        ref = sum(wi * dcdc_buck_ls(dc, self.specs[2], self.gd).parallel(2).buck_ls()
+                  for wi, dc in zip([.2, .5, .3], self.loads))
+        self.assertAlmostEqual(w.buck_ls()[2] / ref, 1, places=12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""Tests for dslib/qrr_batch.py — the array Lauritzen-Ma fit/predict must reproduce the scalar
+dslib/qrr_model.py reference element by element, including which inputs fail and why."""
+import math
+import tempfile
+from unittest import mock
+
+import numpy as np
+
+import dslib.cache
+from dslib import qrr_batch, qrr_model
+
+from test_qrr_model import DS, IPP022_PTS, ISC320_PTS
+
+BAD = [dict(Qrr=242e-9, trr=5e-9, IF=100.0, didt=500e6),  # trr shorter than the current ramp
+       dict(Qrr=math.nan, trr=39e-9, IF=100.0, didt=500e6)]
+
+
+def _scalar(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except qrr_model.LMFitError as e:
+        return e
+
+
+def _close(a, b, rtol=1e-12):
+    return abs(a - b) <= rtol * abs(b)
+
+
+def test_fit_and_predict_match_scalar():
+    rows = list(DS.values()) + BAD
+    b = qrr_batch.fit_lm_batch(*([r[k] for r in rows] for k in ("Qrr", "trr", "IF", "didt")))
+    for i, r in enumerate(rows):
+        ref = _scalar(qrr_model.fit_lm, r["Qrr"], r["trr"], r["IF"], r["didt"])
+        if isinstance(ref, Exception):
+            assert b["error"][i] == str(ref) and math.isnan(b["tau"][i]), (i, b["error"][i])
+            continue
+        assert b["error"][i] is None
+        for k in ("tau", "TM", "irrm", "td", "ta"):
+            assert _close(b[k][i], ref[k]), (i, k, b[k][i], ref[k])
+
+    # (parts, operating points) grid in one call
+    IF, didt = np.array([5.0, 30.0, 100.0]), np.array([200e6, 1e9, 5e9])
+    p = qrr_batch.predict_batch(b["tau"][:, None], b["TM"][:, None], IF, didt)
+    assert p["Qrr"].shape == (len(rows), 3)
+    for i in range(len(DS)):
+        for j in range(3):
+            ref = qrr_model.predict(b["tau"][i], b["TM"][i], IF[j], didt[j])
+            for k in ("Qrr", "trr", "irrm"):
+                assert _close(p[k][i, j], ref[k]), (i, j, k)
+    assert np.isnan(p["Qrr"][len(DS):]).all()
+
+
+def test_best_lm_fits_match_scalar():
+    cond = dict(IF=50.0, didt=300e6, Tj=25.0)
+    items = [dict(Qrr=155.2e-9, trr=46.3e-9, cond=None, qrr_points=IPP022_PTS),
+             dict(Qrr=155.2e-9, trr=46.3e-9, cond=cond, qrr_points=ISC320_PTS, qoss_vr=267e-9),
+             dict(Qrr=155.2e-9, trr=46.3e-9, cond=cond, part="infineon:IPP022N12NM6"),
+             dict(Qrr=23.8e-9, trr=20.5e-9, cond=None, qrr_points=ISC320_PTS),
+             dict(Qrr=23.8e-9, trr=20.5e-9, cond=dict(IF=4.5, didt=300e6), qoss_vr=267e-9)]
+    fits = qrr_batch.best_lm_fits(items)
+    for it, fit in zip(items, fits):
+        ref = _scalar(qrr_model.best_lm_fit, it["Qrr"], it["trr"], it["cond"], qrr_points=it.get("qrr_points"),
+                      qoss_vr=it.get("qoss_vr"), part=it.get("part"))
+        assert type(fit) is type(ref)
+        if isinstance(ref, Exception):
+            assert str(fit) == str(ref)
+            continue
+        assert fit.keys() == ref.keys(), set(fit.keys()) ^ set(ref.keys())
+        for k, v in ref.items():
+            if isinstance(v, float) and v:
+                assert _close(fit[k], v, 1e-9), (k, fit[k], v)
+            else:
+                assert fit[k] == v, (k, fit[k], v)
+    assert [f["method"] for f in fits[:3]] == ["2pt", "1pt", "1pt"]
+
+    # hot prediction off the shared records, per part row
+    p = qrr_batch.predict_fits(fits, IF=[10.0, 30.0], didt=1e9, Tj=100.0)
+    assert p["Qrr"].shape == (5, 2) and np.isnan(p["Qrr"][3:]).all()
+    tau = qrr_model.tau_at_tj(fits[0]["tau0"], 100.0, n_tau=fits[0]["n_tau"])
+    assert _close(p["Qrr"][0, 1], qrr_model.predict(tau, fits[0]["TM"], 30.0, 1e9)["Qrr"])
+
+
+def test_fit_table_persists():
+    items = [dict(Qrr=r["Qrr"], trr=r["trr"], cond=dict(IF=r["IF"], didt=r["didt"], Tj=r["Tj"]))
+             for r in DS.values()] + [dict(Qrr=242e-9, trr=5e-9, cond=dict(IF=100.0, didt=500e6))]
+    with tempfile.TemporaryDirectory() as tmp, \
+            mock.patch.object(dslib.cache, 'cache_dir', tmp), \
+            mock.patch.object(dslib.cache, '_disk_cache_disabled', False):
+        first = qrr_batch.LMFitTable().fits(items)
+        items[0] = dict(items[0], part="infineon:IPP019N08NF2S")
+        with mock.patch.object(qrr_batch, 'best_lm_fits', side_effect=AssertionError('not cached')):
+            again = qrr_batch.LMFitTable().fits(items)
+    assert [f["tau"] for f in again[:-1]] == [f["tau"] for f in first[:-1]]
+    assert isinstance(again[-1], qrr_model.LMFitError) and str(again[-1]) == str(first[-1])
+    # the Tj exponent stamp follows the part, not the stored record
+    assert again[0]["n_tau"] == qrr_model.resolve_n_tau("infineon:IPP019N08NF2S")["n_tau"]
+
+
+def test_fit_key_follows_fit_code():
+    item = dict(Qrr=242e-9, trr=39e-9, cond=dict(IF=100.0, didt=500e6))
+    key = qrr_batch.fit_key(item)
+    with mock.patch.object(qrr_batch, 'fit_code_version', return_value='edited'):
+        assert qrr_batch.fit_key(item) != key
@@ -0,0 +1,24 @@
+"""Config validation of main.RunArgs: the weighted multi-point sweep has no staged (switcher / conductor)
+ranking, so that combination is rejected instead of silently ranking single parts."""
+import unittest
+
+import main
+
+
+def _args(staged, n_loads):
+    dcdc = main.DcdcArgs(controlFet=main.ControlFetArgs(maxParallel=2, stagedSwitching=staged),
+                         gateDrive=None, syncFet=None, inductor=None)
+    loads = [main.DcdcLoadPoint(weight=1 / n_loads, vIn=48, vOut=12, pIn=200, f=100e3) for _ in range(n_loads)]
+    return main.RunArgs(topology='buck', substrates='Si', packages=None, vdsRange=None, dcdc=dcdc, loads=loads)
+
+
+class RunArgsTests(unittest.TestCase):
+    def test_staged_switching_rejected_in_sweep(self):
+        _args(staged=True, n_loads=1)
+        _args(staged=False, n_loads=3)
+        with self.assertRaisesRegex(AssertionError, 'stagedSwitching'):
+            _args(staged=True, n_loads=3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Similarity index behind /api/similar (web/backend/similarity.py): same ranking and scores as the
+per-pair scalar scoring it replaced, required features exclude candidates, batch == single queries."""
+import math
+import random
+import unittest
+
+from web.backend.similarity import SimilarityIndex
+
+WEIGHTS = {"Vds_max": (3.0, 0.5), "Rds_on_max": (0.3, 2.0), "Qg": (1.0, 1.0), "Vsd": (0.3, 0.3)}
+REQUIRED = ("Vds_max", "Rds_on_max")
+
+
+def _ref_scores(rows, qi):
+    stats = {}
+    for f in WEIGHTS:
+        logs = [math.log(r[f]) for r in rows if r.get(f) is not None and r[f] > 0]
+        mu = sum(logs) / len(logs)
+        var = sum((x - mu) ** 2 for x in logs) / (len(logs) - 1)
+        stats[f] = math.sqrt(var) if var > 0 else 1.0
+    q = rows[qi]
+    out = []
+    for ci, c in enumerate(rows):
+        if ci == qi or any(not (q.get(f) or 0) > 0 or not (c.get(f) or 0) > 0 for f in REQUIRED):
+            continue
+        s = 0.
+        for f, (wu, wo) in WEIGHTS.items():
+            if not (q.get(f) or 0) > 0 or not (c.get(f) or 0) > 0:
+                continue
+            d = (math.log(c[f]) - math.log(q[f])) / stats[f]
+            s += (wu if d < 0 else wo) * d * d
+        out.append((s, ci))
+    return sorted(out)
+
+
+class SimilarityIndexTests(unittest.TestCase):
+    def setUp(self):
+        rnd = random.Random(1)
+        self.rows = []
+        for i in range(200):
+            self.rows.append(dict(mfr="m%d" % (i % 3), mpn="P%d" % i,
+                                  Vds_max=rnd.choice([40, 60, 80, 100, 150, None]),
+                                  Rds_on_max=rnd.choice([rnd.uniform(1e-3, 20e-3), 0, None]),
+                                  Qg=rnd.choice([rnd.uniform(5e-9, 100e-9), None]),
+                                  Vsd=rnd.uniform(0.6, 1.2)))
+        self.index = SimilarityIndex(self.rows, WEIGHTS, REQUIRED)
+
+    def test_matches_scalar_reference(self):
+        for qi in range(0, 200, 7):
+            key = (self.rows[qi]["mfr"], self.rows[qi]["mpn"])
+            ref = _ref_scores(self.rows, qi)[:15]
+            hits = self.index.top_k(key, 15)
+            self.assertEqual(len(hits), len(ref))
+            for (ci, s), (rs, _) in zip(hits, ref):
+                self.assertAlmostEqual(s, rs, places=9)
+            self.assertNotIn(qi, [ci for ci, _ in hits])
+
+    def test_batch_and_unknown(self):
+        keys = [(r["mfr"], r["mpn"]) for r in self.rows[:70]] + [("nope", "X")]
+        batch = self.index.top_k_many(keys, 5)
+        self.assertIsNone(batch[-1])
+        self.assertIsNone(self.index.top_k(("nope", "X"), 5))
+        for key, hits in zip(keys[:-1], batch):
+            self.assertEqual(hits, self.index.top_k(key, 5))
+
+
+if __name__ == "__main__":
+    unittest.main()
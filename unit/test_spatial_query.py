@@ -0,0 +1,82 @@
+"""SpatialQuery packed-array index (dslib/pdf/sheet/spatial.py): cast and ray return the same blocks in the
+same order as the pandas-Series implementation it replaced, including blocks with equal edges."""
+import random
+import unittest
+
+import pandas as pd
+
+from dslib.pdf.sheet.spatial import SpatialQuery, take
+from dslib.pdf.tree import Bbox, GraphicBlock
+
+
+class _PandasSpatialQuery:
+    """The previous implementation, reference for the tests."""
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.by_bbox_edge = {}
+        for dir in ('x1', 'x2', 'y1', 'y2'):
+            s = pd.Series(list(blocks), index=[b.bbox[dir] for b in blocks])
+            s.sort_index(inplace=True)
+            self.by_bbox_edge[dir] = s
+
+    def cast(self, dir, start, end):
+        if start <= end:
+            v = self.by_bbox_edge[dir][start:end]
+        else:
+            v = self.by_bbox_edge[dir][end:start].iloc[::-1]
+        return list(v)
+
+    def ray(self, dir, bbox, length, min_overlap, limit=10, start_from_bbox_center=False):
+        d = int(dir[1])
+        start = bbox[dir[0] + str(1 + (d % 2))]
+        if start_from_bbox_center:
+            start = (start + bbox[dir]) * .5
+        els = self.cast(dir, start, start + length * (3 - 2 * d))
+        ol_fn = getattr(bbox, 'v_overlap_rel' if dir[0] == 'x' else 'h_overlap_rel')
+        return take(filter(lambda el: ol_fn(el.bbox) > min_overlap, els), limit)
+
+
+def _blocks(n, seed=1):
+    rnd = random.Random(seed)
+    blocks = []
+    for i in range(n):
+        # float edges like pdfminer (an all-int pandas index would slice positionally), rounded for ties
+        x1, y1 = float(round(rnd.uniform(0, 600))), round(rnd.uniform(0, 800), 1)
+        w, h = rnd.choice([0, 2, 10, 40, 120]), rnd.choice([0, 4, 8, 12])
+        blocks.append(GraphicBlock(i, (x1, y1, x1 + w, y1 + h), None, 'vector'))
+    return blocks
+
+
+class SpatialQueryTests(unittest.TestCase):
+    def setUp(self):
+        self.blocks = _blocks(400)
+        self.sq = SpatialQuery(self.blocks, graphic_max_area=1e9)
+        self.ref = _PandasSpatialQuery(self.blocks)
+
+    def test_cast_matches_reference(self):
+        rnd = random.Random(2)
+        for _ in range(300):
+            dir = rnd.choice(['x1', 'x2', 'y1', 'y2'])
+            a, b = round(rnd.uniform(-50, 850)), round(rnd.uniform(-50, 850))
+            self.assertEqual([e.index for e in self.sq.cast(dir, a, b)],
+                             [e.index for e in self.ref.cast(dir, a, b)])
+
+    def test_ray_matches_reference(self):
+        rnd = random.Random(3)
+        for _ in range(500):
+            src = rnd.choice(self.blocks).bbox
+            bbox = Bbox(src.x1, src.y1, src.x1 + rnd.choice([0, 5, 30]), src.y1 + rnd.choice([0, 6, 10]))
+            kw = dict(dir=rnd.choice(['x1', 'x2', 'y1', 'y2']), bbox=bbox, length=rnd.choice([60, 200, 600]),
+                      min_overlap=rnd.choice([0.1, 0.2, 0.5, 0.9]), limit=rnd.choice([10, 99]),
+                      start_from_bbox_center=rnd.random() < 0.3)
+            self.assertEqual([e.index for e in self.sq.ray(**kw)], [e.index for e in self.ref.ray(**kw)], kw)
+
+    def test_types_filter_and_empty(self):
+        bbox = Bbox(0, 0, 800, 800)
+        self.assertEqual(self.sq.ray('y2', bbox, 600, 0.0, limit=5, types=str), [])
+        self.assertEqual(SpatialQuery([]).ray('x1', bbox, 100, 0.1), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
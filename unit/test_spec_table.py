@@ -0,0 +1,87 @@
+"""Columnar spec table (dslib/spec_table.py): same scalars as the Part objects, regenerated
+incrementally from the parts_db record log."""
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import dslib.spec_table
+from dslib.mosfet import MosfetSpecs
+from dslib.spec_table import load_spec_table, update_spec_table
+from dslib.store import ObjectDatabase, Part, RecordLog
+
+
+def _specs(Rds_on=5e-3, Qg=40e-9):
+    return MosfetSpecs(Vds_max=100, Rds_on=Rds_on, Qg=Qg, tRise=10e-9, tFall=8e-9, Qrr=50e-9, trr=40e-9,
+                       Qgd=10e-9, Qgs=12e-9, Vsd=0.9, Coss=800e-12)
+
+
+class SpecTableTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db = ObjectDatabase('parts-lib', key_func=lambda p: (p.mfr, p.mpn))
+        self.db._lib_path = os.path.join(self._tmp.name, 'parts-lib.pkl')
+        self.db._lck_path = self.db._lib_path + '.lock'
+        self.db._log = RecordLog(os.path.join(self._tmp.name, 'parts-lib.log'), self.db._lck_path)
+        self.path = os.path.join(self._tmp.name, 'specs.arrow')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _rows(self):
+        return {(r['mfr'], r['mpn']): r for r in load_spec_table(self.path).to_pylist()}
+
+    def test_values_match_objects(self):
+        specs = _specs()
+        self.db.add([Part(mfr='ti', mpn='CSD1', specs=specs)])
+        update_spec_table(self.db, self.path)
+        row = self._rows()[('ti', 'CSD1')]
+        self.assertEqual(row['Rds_on'], specs.Rds_on)
+        self.assertEqual(row['Qsw'], specs.Qsw)
+        self.assertEqual(row['FoM'], specs.FoM)
+        self.assertTrue(math.isnan(row['Rg']))
+        self.assertTrue(math.isnan(row['basic_Vds_max']))  # no discovered part
+        self.assertIsNone(row['package'])
+
+    def test_incremental_update(self):
+        self.db.add([Part(mfr='ti', mpn='CSD%d' % i, specs=_specs()) for i in range(5)])
+        update_spec_table(self.db, self.path)
+
+        self.db.add([Part(mfr='ti', mpn='CSD1', specs=_specs(Rds_on=9e-3))])
+        self.db.del_obj(Part(mfr='ti', mpn='CSD4'))
+        with mock.patch.object(dslib.spec_table, 'spec_row', wraps=dslib.spec_table.spec_row) as sr:
+            update_spec_table(self.db, self.path)
+            self.assertEqual(sr.call_count, 1)
+            update_spec_table(self.db, self.path)
+            self.assertEqual(sr.call_count, 1)
+
+        rows = self._rows()
+        self.assertEqual(set(rows), {('ti', 'CSD%d' % i) for i in range(4)})
+        self.assertEqual(rows[('ti', 'CSD1')]['Rds_on'], 9e-3)
+        self.assertEqual(rows[('ti', 'CSD2')]['Rds_on'], 5e-3)
+
+    def test_parts_without_specs_are_not_reread(self):
+        self.db.add([Part(mfr='ti', mpn='CSD1', specs=_specs()), Part(mfr='ti', mpn='CSD2', specs=None)])
+        update_spec_table(self.db, self.path)
+        with mock.patch.object(self.db, 'get', wraps=self.db.get) as get:
+            update_spec_table(self.db, self.path)
+            get.assert_not_called()
+            self.db.add([Part(mfr='ti', mpn='CSD2', specs=_specs(Rds_on=7e-3))])
+            update_spec_table(self.db, self.path)
+            self.assertEqual([c.args[0] for c in get.call_args_list], [('ti', 'CSD2')])
+        self.assertEqual(self._rows()[('ti', 'CSD2')]['Rds_on'], 7e-3)
+
+    def test_code_change_forces_rebuild(self):
+        self.db.add([Part(mfr='ti', mpn='CSD%d' % i, specs=_specs()) for i in range(3)])
+        update_spec_table(self.db, self.path)
+        with mock.patch.object(dslib.spec_table, 'spec_table_version', return_value='edited'), \
+                mock.patch.object(dslib.spec_table, 'spec_row', wraps=dslib.spec_table.spec_row) as sr:
+            update_spec_table(self.db, self.path)
+            self.assertEqual(sr.call_count, 3)
+            update_spec_table(self.db, self.path)
+            self.assertEqual(sr.call_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
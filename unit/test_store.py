@@ -0,0 +1,142 @@
+"""Append-only parts store (dslib/store.py RecordLog + ObjectDatabase).
+
+Writes must append one record instead of rewriting the DB, a second process must see them by
+scanning only the tail, a torn tail record must be ignored and dropped by the next writer, and
+compaction must keep exactly the live records.
+"""
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+from dslib.store import ObjectDatabase, RecordLog
+
+
+class _Obj:
+    def __init__(self, mfr, mpn, v):
+        self.mfr, self.mpn, self.v = mfr, mpn, v
+
+
+def _db(tmp, name='parts-lib'):
+    db = ObjectDatabase(name, key_func=lambda p: (p.mfr, p.mpn))
+    db._lib_path = os.path.join(tmp, name + '.pkl')
+    db._lck_path = db._lib_path + '.lock'
+    db._log = RecordLog(os.path.join(tmp, name + '.log'), db._lck_path, compact_min_bytes=0)
+    return db
+
+
+class RecordLogTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, 'x.log')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _log(self, **kwargs):
+        return RecordLog(self.path, self.path + '.lock', **kwargs)
+
+    def test_add_appends_one_record(self):
+        log = self._log()
+        log.put_many({('a', str(i)): i for i in range(100)})
+        size = os.path.getsize(self.path)
+        log.put_many({('a', 'new'): 'x'})
+        grown = os.path.getsize(self.path) - size
+        self.assertLess(grown, 100)
+        self.assertEqual(log.get(('a', 'new')), 'x')
+
+    def test_other_instance_sees_tail(self):
+        a, b = self._log(), self._log()
+        a.put_many({'k1': 1})
+        b.refresh()
+        self.assertEqual(b.get('k1'), 1)
+        a.put_many({'k2': 2})
+        a.delete('k1')
+        b.refresh()
+        self.assertIsNone(b.get('k1'))
+        self.assertEqual(b.get('k2'), 2)
+
+    def test_snapshot_is_used(self):
+        a = self._log(snapshot_every=1)
+        a.put_many({'k%d' % i: i for i in range(10)})
+        self.assertTrue(os.path.exists(self.path + '.idx'))
+        b = self._log()
+        b.refresh()
+        self.assertEqual(sorted(b.keys()), sorted('k%d' % i for i in range(10)))
+
+    def test_torn_tail_is_ignored_and_truncated(self):
+        log = self._log()
+        log.put_many({'k1': 1})
+        with open(self.path, 'ab') as fh:
+            fh.write(b'P\x05\x00')
+        other = self._log()
+        other.refresh()
+        self.assertEqual(list(other.keys()), ['k1'])
+        other.put_many({'k2': 2})
+        fresh = self._log()
+        fresh.refresh()
+        self.assertEqual(fresh.get('k2'), 2)
+        self.assertEqual(len(fresh), 2)
+
+    def test_compaction_keeps_live_records(self):
+        log = self._log(compact_min_bytes=10 ** 9)
+        for i in range(20):
+            log.put_many({'k': 'v%d' % i, 'keep%d' % (i % 3): i})
+        size = os.path.getsize(self.path)
+        log.compact()
+        self.assertLess(os.path.getsize(self.path), size)
+        other = self._log()
+        other.refresh()
+        self.assertEqual(dict((k, pickle.loads(v)) for k, v in other.items()),
+                         {'k': 'v19', 'keep0': 18, 'keep1': 19, 'keep2': 17})
+
+    def test_reader_survives_other_process_compaction(self):
+        a, b = self._log(compact_min_bytes=10 ** 9), self._log()
+        a.put_many({'k%d' % i: 'old%d' % i for i in range(4)})
+        a.put_many({'k0': 'x' * 50, 'k1': 'new1'})
+        b.refresh()
+        a.compact()  # b's offsets now point into the rewritten file
+        self.assertEqual([b.get('k%d' % i) for i in range(4)], ['x' * 50, 'new1', 'old2', 'old3'])
+        self.assertEqual(sorted(k for k, _v in b.items()), ['k0', 'k1', 'k2', 'k3'])
+
+
+class ObjectDatabaseTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_add_load_obj_del(self):
+        db = _db(self._tmp.name)
+        db.add([_Obj('ti', 'CSD1', 1), _Obj('ti', 'CSD2', 2)])
+        db2 = _db(self._tmp.name)
+        self.assertEqual(db2.load_obj(_Obj('ti', 'CSD2', None)).v, 2)
+        self.assertTrue(db2.del_obj(_Obj('ti', 'CSD2', None)))
+        self.assertFalse(db2.del_obj(_Obj('ti', 'CSD2', None), ignore_missing=True))
+        self.assertEqual(set(_db(self._tmp.name).load().keys()), {('ti', 'CSD1')})
+
+    def test_legacy_pickle_is_imported(self):
+        with open(os.path.join(self._tmp.name, 'parts-lib.pkl'), 'wb') as fh:
+            pickle.dump({('nxp', 'PSMN1'): _Obj('nxp', 'PSMN1', 7)}, fh)
+        db = _db(self._tmp.name)
+        self.assertEqual(db.load_obj(_Obj('nxp', 'PSMN1', None)).v, 7)
+        db.add([_Obj('nxp', 'PSMN2', 8)])
+        self.assertEqual(set(_db(self._tmp.name).load()), {('nxp', 'PSMN1'), ('nxp', 'PSMN2')})
+        self.assertEqual(os.listdir(self._tmp.name).count('parts-lib.pkl'), 0)
+        self.assertIn('parts-lib.pkl.imported', os.listdir(self._tmp.name))
+
+    def test_unreadable_legacy_pickle_is_tried_once(self):
+        with open(os.path.join(self._tmp.name, 'parts-lib.pkl'), 'wb') as fh:
+            fh.write(b'cnomod\nX\n.')  # a class of a module that no longer exists
+        db = _db(self._tmp.name)
+        with mock.patch.object(pickle, 'load', wraps=pickle.load) as load, self.assertLogs(level='WARNING'):
+            self.assertEqual(db.load(), {})
+            db.add([_Obj('nxp', 'PSMN2', 8)])
+            self.assertEqual(set(_db(self._tmp.name).load()), {('nxp', 'PSMN2')})
+        self.assertEqual(load.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""In-process tabula backend (dslib/pdf/tabular.py): backend selection and the pool task / DataFrame
+plumbing. The JVM itself is faked, tabula-java needs a java runtime."""
+import os
+import unittest
+from unittest import mock
+
+import dslib.pdf.tabular as tabular
+
+
+class _FakeJvm:
+    def __init__(self):
+        self.calls = []
+
+    def extract(self, pdf_path, pages=None, areas=None, pad=2):
+        self.calls.append((pdf_path, pages, areas, pad))
+        if pdf_path == 'scan.pdf':
+            raise tabular.NoTextInPdfError('no text data is contained in ' + pdf_path)
+        return [('original', [['Qg', '52', 'nC']]), ('spreadsheet', [['Qg', '52'], ['Qgd', '9']])]
+
+
+class _InlinePool:
+    def map_jobs(self, jobs, progress=True):
+        return {k: job[0](*job[1:]) for k, job in jobs.items()}
+
+
+class TabulaJvmTests(unittest.TestCase):
+    def test_backend_selection(self):
+        with mock.patch.dict(os.environ, {'DSLIB_TABULA_BACKEND': 'web'}):
+            self.assertEqual(tabular.tabula_backend(), 'web')
+        with mock.patch.dict(os.environ, {'DSLIB_TABULA_BACKEND': ''}), \
+                mock.patch.object(tabular, 'jvm_available', return_value=True):
+            self.assertEqual(tabular.tabula_backend(), 'jvm')
+            with mock.patch.object(tabular, 'tabula_jvm', return_value=[]) as jvm:
+                tabular.tabula_tables('a.pdf')
+            jvm.assert_called_once_with('a.pdf', pad=2)
+
+    def test_batch_to_dataframes(self):
+        jvm = _FakeJvm()
+        with mock.patch.object(tabular, '_worker_jvm', jvm), \
+                mock.patch.object(tabular, 'tabula_jvm_pool', return_value=_InlinePool()):
+            res = tabular.tabula_jvm_many({'a': ('a.pdf', None, None), 'b': ('b.pdf', (2, 3), None)})
+            with self.assertRaises(tabular.NoTextInPdfError):
+                tabular.tabula_jvm_many({'s': ('scan.pdf', None, None)})
+
+        self.assertEqual(set(res), {'a', 'b'})
+        self.assertEqual([df.index.name for df in res['a']], ['tabula_web_original', 'tabula_web_spreadsheet'])
+        self.assertEqual(res['b'][1].values.tolist(), [['Qg', '52'], ['Qgd', '9']])
+        self.assertEqual(jvm.calls[1], ('b.pdf', (2, 3), None, 2))
+
+    def test_worker_process_uses_own_jvm(self):
+        jvm = _FakeJvm()
+        with mock.patch.object(tabular, '_worker_jvm', jvm), \
+                mock.patch('multiprocessing.parent_process', return_value=object()), \
+                mock.patch.object(tabular, 'tabula_jvm_pool', side_effect=AssertionError('nested pool')), \
+                mock.patch.object(tabular, 'acquire_file_lock') as lock:
+            res = tabular.tabula_jvm_many({'a': ('a.pdf', None, None)})
+        self.assertEqual(len(res['a']), 2)
+        self.assertRegex(lock.call_args.args[0], r'\.tabula_jvm_[1-4]\.lock$')
+
+    def test_free_jvm_slot_is_taken_without_waiting(self):
+        tried = []
+
+        def lock(fn, kill_holder, max_time):
+            tried.append(fn)
+            self.assertEqual(max_time, 0)
+            if not fn.endswith('_3.lock'):
+                raise TimeoutError(fn + ' locked by 1')
+            return mock.MagicMock()
+
+        with mock.patch.dict(os.environ, {'DSLIB_TABULA_WORKERS': '4'}), \
+                mock.patch.object(tabular, 'acquire_file_lock', side_effect=lock), \
+                mock.patch.object(tabular.time, 'sleep', side_effect=AssertionError('waited')):
+            tabular._jvm_slot()
+        self.assertTrue(tried[-1].endswith('_3.lock'))
+        self.assertEqual(len(set(tried)), len(tried))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Electro-thermal solver (dclib/thermal.py): the batch steady state satisfies Tj = Ta + Rth * P_die(Tj) and
+agrees with the scalar loss models evaluated at that Tj; hot Qrr follows the part's Lauritzen-Ma fit."""
+import math
+import tempfile
+import unittest
+import warnings
+from unittest import mock
+
+import numpy as np
+
+import dslib.cache
+from dclib.powerloss import dcdc_buck_hs, dcdc_buck_ls
+from dclib.powerloss_batch import LoadGrid, MosfetArrays, dcdc_buck_ls_batch
+from dclib.thermal import (HS_SELF_HEATING, LS_SELF_HEATING, dcdc_buck_hs_hot, dcdc_buck_ls_hot, die_power,
+                           lm_fits, package_rth, qrr_temp_factor)
+from dslib import qrr_batch
+from dslib.mosfet import GateDrive, MosfetSpecs
+from dslib.spec_models import DcDcLoadParams
+
+
+def _specs():
+    specs = [
+        MosfetSpecs(Vds_max=100, Rds_on=5e-3, Qg=40e-9, tRise=10e-9, tFall=8e-9, Qrr=242e-9, trr=39e-9,
+                    Qgd=10e-9, Qgs=12e-9, Qg_th=5e-9, Vpl=4.5, Vsd=0.9, Coss=800e-12, Rg=1.2),
+        MosfetSpecs(Vds_max=80, Rds_on=3e-3, Qg=90e-9, tRise=5e-9, tFall=30e-9, Qrr=200e-9, trr=80e-9,
+                    Qgd=20e-9, Qgs=25e-9, Qgs2=9e-9, Vpl=3.8, Vsd=-1.1, Coss=1500e-12, Rg=3),
+    ]
+    specs[0].qrr_cond = dict(IF=100.0, didt=500e6, Tj=25.0)  # IPP024N08NF2S datasheet point
+    return specs
+
+
+class ThermalTests(unittest.TestCase):
+    def setUp(self):
+        # lm_fits goes through the process-wide fit table, keep its SqliteStore out of the checkout
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patches = [mock.patch.object(dslib.cache, 'cache_dir', self._tmp.name),
+                         mock.patch.object(qrr_batch, '_shared_table', None)]
+        for p in self._patches:
+            p.start()
+        self.specs = _specs()
+        self.loads = [DcDcLoadParams(vi=72, vo=27, pin=800, f=40e3, ripple_factor=0.3, tDead=300e-9),
+                      DcDcLoadParams(vi=48, vo=12, io=20, f=200e3, iripple=4, tDead=50e-9)]
+        self.gd = GateDrive(rg_total=2, rg_total_dis=1.5, Von=10, Voff=0, fallback_V_pl=5)
+        self.mfs = MosfetArrays.from_specs(self.specs)
+        self.lg = LoadGrid(self.loads)
+
+    def tearDown(self):
+        for p in reversed(self._patches):
+            p.stop()
+        self._tmp.cleanup()
+
+    def test_steady_state_matches_scalar(self):
+        rth = np.array([5., 8.])
+        for n in (1, 2):
+            hs = dcdc_buck_hs_hot(self.lg, self.mfs, self.gd, Ta=40, rth=rth, n_parallel=n)
+            ls = dcdc_buck_ls_hot(self.lg, self.mfs, self.gd, Ta=40, rth=rth, n_parallel=n)
+            for res, heating, scalar_fn in ((hs, HS_SELF_HEATING, dcdc_buck_hs), (ls, LS_SELF_HEATING, dcdc_buck_ls)):
+                self.assertTrue(res.converged.all() and not res.runaway.any())
+                self.assertLess(res.iterations.max(), 8)
+                np.testing.assert_allclose(res.Tj, 40 + rth[:, None] * die_power(res.loss, heating, n), atol=0.01)
+                self.assertTrue((res.Tj > 42).all())
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    ref = scalar_fn(self.loads[1], self.specs[1], self.gd, Tj=res.Tj[1, 1]).parallel(n)
+                self.assertAlmostEqual(res.loss.P_cl[1, 1] / ref.P_cl, 1, places=12)
+
+        # hot LS books Qrr at Tj, conduction loss at Rds_on(Tj)
+        cold = dcdc_buck_ls_batch(self.lg, self.mfs, self.gd, Tj=25, Qrr_temp_rise=1).parallel(2)
+        self.assertTrue((ls.loss.P_rr > cold.P_rr).all() and (ls.loss.P_cl > cold.P_cl).all())
+
+    def test_zero_rth_and_runaway(self):
+        res = dcdc_buck_ls_hot(self.lg, self.mfs, self.gd, Ta=25, rth=0)
+        np.testing.assert_array_equal(res.Tj, 25)
+        np.testing.assert_allclose(res.loss.P_rr, dcdc_buck_ls_batch(self.lg, self.mfs, self.gd, Tj=25,
+                                                                      Qrr_temp_rise=1).P_rr, rtol=1e-9)
+        res = dcdc_buck_hs_hot(self.lg, self.mfs, self.gd, Ta=40, rth=np.array([20., 5000.]))
+        self.assertEqual(res.runaway.tolist(), [[False, False], [True, True]])
+        self.assertTrue(np.isnan(res.Tj[1]).all() and np.isnan(res.loss.P_cl[1]).all())
+
+    def test_qrr_temp_factor(self):
+        fits = lm_fits(self.specs, ['infineon:IPP024N08NF2S', 'x:unknown'])
+        self.assertEqual(fits[0]['method'], '1pt')
+        self.assertIsNone(fits[1])
+        f = qrr_temp_factor(fits, np.array([[25., 125.], [25., 75.]]))
+        self.assertAlmostEqual(f[0, 0], 1, places=9)
+        self.assertTrue(1.8 < f[0, 1] < 2.3, f)  # the model's Qrr ~doubles 25 -> 125°C
+        np.testing.assert_allclose(f[1], [1, 1.2])
+        self.assertTrue(math.isnan(qrr_temp_factor(fits, np.array([[math.nan], [math.nan]]))[0, 0]))
+
+    def test_package_rth(self):
+        np.testing.assert_array_equal(package_rth(['PG-TO220-3', 'TO-247', None]), [62, 40, 62])
+        self.assertEqual(package_rth(['PG-TDSON-8'], rth_sa=2)[0], 3.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""Parse tracing (dslib/trace.py): nested stage timing, disk_cache hit/miss attribution to the innermost
+stage, no-op outside a trace, and the aggregated report."""
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import dslib.cache
+from dslib.cache import FileHashIndex, disk_cache
+from dslib.trace import TraceReport, datasheet_trace, trace_stage, traced_call
+
+
+def _job(n):
+    with trace_stage('outer') as st:
+        with trace_stage('ocr', ocr=n == 1):
+            time.sleep(0.01 * n)
+        st.fields = n
+    return n * 2
+
+
+class TraceTests(unittest.TestCase):
+    def test_stages_and_cache_events(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(dslib.cache, 'cache_dir', tmp), \
+                mock.patch.object(dslib.cache, '_file_hash_index', FileHashIndex()), \
+                mock.patch.object(dslib.cache, '_disk_cache_disabled', False):
+            @disk_cache(ttl='1d')
+            def square(x):
+                return x * x
+
+            with datasheet_trace(('ti', 'X'), 'x.pdf') as tr:
+                with trace_stage('a') as st:
+                    square(3)
+                    with trace_stage('b'):
+                        square(3)
+                    st.fields = 4
+                square(3)  # outside of a stage
+
+        self.assertEqual([(s.name, s.depth) for s in tr.stages], [('a', 0), ('b', 1)])
+        a, b = tr.stages
+        self.assertEqual((a.cache_hits, a.cache_misses, a.fields), (0, 1, 4))
+        self.assertEqual((b.cache_hits, b.cache_misses), (1, 0))
+        self.assertEqual((tr.cache_hits, tr.cache_misses), (1, 0))
+        self.assertIn('(outside stages)', TraceReport([tr]).format())
+        self.assertGreaterEqual(tr.wall, a.wall)
+
+    def test_no_trace_is_noop(self):
+        with trace_stage('x') as st:
+            st.fields = 1
+
+    def test_report(self):
+        traces = [traced_call(n, _job, n)[1] for n in (1, 2, 3)]
+        self.assertEqual(traced_call('k', _job, 0)[0], 0)
+        rep = TraceReport(traces)
+        self.assertAlmostEqual(rep.ocr_fraction, 1 / 3)
+        self.assertEqual([t.key for t in rep.slowest(2)], [3, 2])
+        st = rep.stage_stats()
+        self.assertEqual((st['outer']['n'], st['outer']['fields']), (3, 6))
+        self.assertGreaterEqual(st['ocr']['max'], 0.03)
+        self.assertIn('outer', rep.format())
+        with tempfile.TemporaryDirectory() as tmp:
+            fn = os.path.join(tmp, 'p.jsonl')
+            rep.write_jsonl(fn)
+            with open(fn) as fh:
+                self.assertEqual(len(fh.readlines()), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+"""Batch chart extraction (dslib/viz/batch.py): the page fan-out returns what `find_in_pdf` returns per
+PDF, page results persist on disk, and the raster candidates of a page crop one shared render."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pymupdf
+
+import dslib.cache
+import dslib.viz.curve_extract as curve_extract
+from dslib.viz.batch import chart_pages, find_in_pdfs, find_vpls
+from dslib.viz.chart_finder import find_gate_charge_charts
+from dslib.viz.curve_extract import find_in_pdf
+from dslib.viz.raster_extract import _plot_interior_bbox, _render_chart, find_plateau_raster, page_raster
+
+
+def _chart(page, x0, y0, vpl, title='Gate Charge Characteristics', image=False, w=200, h=150):
+    """A VGS(Qg) chart with text tick labels, plot drawn as vectors or embedded as an image."""
+    page.insert_text((x0 + 30, y0 - 10), title, fontsize=8)
+    for i in range(6):
+        page.insert_text((x0 - 14, y0 + h - i * h / 5 + 2.5), str(2 * i), fontsize=7)
+    for i in range(5):
+        page.insert_text((x0 + i * w / 4 - 3, y0 + h + 10), str(10 * i), fontsize=7)
+    page.insert_text((x0 - 30, y0 + h / 2), 'VGS (V)', fontsize=7)
+    page.insert_text((x0 + w / 2 - 20, y0 + h + 22), 'Qg, Total Gate Charge (nC)', fontsize=7)
+
+    def y(v):
+        return y0 + h - v / 10 * h
+
+    rect = pymupdf.Rect(x0, y0, x0 + w, y0 + h)
+    pts = [(x0, y(0)), (x0 + .25 * w, y(vpl)), (x0 + .55 * w, y(vpl)), (x0 + w, y(10))]
+    canvas = pymupdf.open().new_page(width=page.rect.width, height=page.rect.height) if image else page
+    canvas.draw_rect(rect, width=.8)
+    for a, b in zip(pts, pts[1:]):
+        canvas.draw_line(a, b, width=1.2)
+    if image:
+        page.insert_image(rect, pixmap=canvas.get_pixmap(dpi=200, clip=rect))
+
+
+def _write_vector_pdf(path):
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((50, 50), 'Qg Total Gate Charge 52 nC', fontsize=9)
+    _chart(page, 80, 120, 4.5)
+    doc.new_page().insert_text((50, 50), 'Ordering information', fontsize=9)
+    _chart(doc.new_page(), 80, 420, 3.2)
+    doc.save(path)
+
+
+def _write_raster_pdf(path):
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.insert_text((50, 50), 'Qg Total Gate Charge', fontsize=9)
+    _chart(page, 80, 120, 4.5, image=True)
+    _chart(page, 340, 120, 6.0, title='Gate Charge', image=True)
+    _chart(page, 80, 450, 2.5, title='Gate Charge', image=True)
+    doc.save(path)
+
+
+class _InlinePool:
+    def map_jobs(self, jobs, progress=True):
+        return {k: job[0](*job[1:]) for k, job in jobs.items()}
+
+
+def _summary(results):
+    return [(c.page_num, tuple(c.bbox), round(h.v_pl, 2) if h else None, s) for c, h, s in results]
+
+
+class VizBatchTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._patch = mock.patch.object(dslib.cache, 'cache_dir', self._tmp.name + '/cache')
+        self._patch.start()
+        self._enabled = mock.patch.object(dslib.cache, '_disk_cache_disabled', False)
+        self._enabled.start()
+        self.vector = os.path.join(self._tmp.name, 'vector.pdf')
+        self.raster = os.path.join(self._tmp.name, 'raster.pdf')
+        _write_vector_pdf(self.vector)
+        _write_raster_pdf(self.raster)
+
+    def tearDown(self):
+        self._enabled.stop()
+        self._patch.stop()
+        self._tmp.cleanup()
+
+    def test_batch_matches_serial(self):
+        self.assertEqual(chart_pages(self.vector), [0, 2])
+        res = find_in_pdfs([self.vector, self.raster], pool=_InlinePool())
+        self.assertEqual(_summary(res[self.vector]), _summary(find_in_pdf(self.vector)))
+        self.assertEqual(_summary(res[self.raster]), _summary(find_in_pdf(self.raster)))
+        self.assertEqual([s for _p, _b, _v, s in _summary(res[self.raster])], ['raster'] * 3)
+        self.assertEqual(find_vpls([self.vector], pool=_InlinePool()), {self.vector: 4.49})
+
+    def test_page_results_persist(self):
+        first = find_in_pdfs([self.vector, self.raster], pool=_InlinePool())
+        with mock.patch.object(curve_extract, '_find_on_page', side_effect=AssertionError('not cached')):
+            again = find_in_pdfs([self.vector, self.raster], pool=_InlinePool())
+            self.assertEqual(_summary(find_in_pdf(self.raster)), _summary(first[self.raster]))
+        self.assertEqual({p: _summary(r) for p, r in again.items()}, {p: _summary(r) for p, r in first.items()})
+
+    def test_page_results_keyed_by_viz_source(self):
+        curve_extract.find_on_page(self.vector, 0)
+        self.addCleanup(curve_extract.viz_source_salt.cache_clear)
+        curve_extract.viz_source_salt.cache_clear()
+        with mock.patch.object(curve_extract, '_SALT_MODULES', curve_extract._SALT_MODULES[:1]), \
+                mock.patch.object(curve_extract, '_find_on_page', return_value=[]) as fp:
+            self.assertEqual(curve_extract.find_on_page(self.vector, 0), [])  # as if a module was edited
+        fp.assert_called_once()
+
+    def test_broken_pdf_does_not_abort_batch(self):
+        missing = os.path.join(self._tmp.name, 'missing.pdf')
+        res = find_in_pdfs([missing, self.vector], pool=_InlinePool())
+        self.assertEqual(res[missing], [])
+        self.assertEqual(len(res[self.vector]), 2)
+
+    def test_shared_page_raster(self):
+        with pymupdf.open(self.raster) as doc:
+            page = doc[0]
+            charts = list(find_gate_charge_charts(page))
+            raster = page_raster(page, charts)
+            self.assertIsNotNone(raster)
+            for chart in charts:
+                bbox = _plot_interior_bbox(chart)
+                self.assertTrue(raster.covers(bbox, 300))
+                np.testing.assert_array_equal(_render_chart(page, bbox, raster=raster)[0],
+                                              _render_chart(page, bbox)[0])
+                self.assertEqual(find_plateau_raster(page, chart, raster=raster), find_plateau_raster(page, chart))
+            self.assertIsNone(page_raster(page, charts[:1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+"""Persistent worker pool (dslib/workers.py): results keyed like run_parallel, workers are kept
+across calls and recycled after max_tasks_per_child, task errors propagate."""
+import os
+import time
+import unittest
+
+from dslib.workers import WorkerPool
+
+
+class WorkerPoolTests(unittest.TestCase):
+    def test_results_stats_and_reuse(self):
+        with WorkerPool(max_workers=2, max_tasks_per_child=None, preload=()) as pool:
+            res = pool.map_jobs({'a': (divmod, 7, 2), 'b': (time.sleep, 0.05)}, progress=False)
+            self.assertEqual(res, {'a': (3, 1), 'b': None})
+            pids = set(pool.map_jobs({i: (os.getpid,) for i in range(8)}, progress=False).values())
+            pids |= set(pool.map_jobs({i: (os.getpid,) for i in range(8)}, progress=False).values())
+            self.assertLessEqual(len(pids), 2)
+            self.assertNotIn(os.getpid(), pids)
+            self.assertEqual(pool.stats.n_tasks, 18)
+            self.assertGreaterEqual(pool.stats.percentile(100), 0.05)
+            self.assertGreater(pool.stats.throughput, 0)
+
+    def test_workers_are_recycled(self):
+        with WorkerPool(max_workers=1, max_tasks_per_child=2, preload=()) as pool:
+            pids = [pool.map_jobs({0: (os.getpid,)}, progress=False)[0] for _ in range(4)]
+            self.assertEqual(len(set(pids)), 2)
+
+    def test_error_propagates(self):
+        with WorkerPool(max_workers=1, preload=()) as pool:
+            with self.assertRaises(ValueError):
+                pool.map_jobs({'x': (int, 'nan?')}, progress=False)
+            self.assertEqual(pool.map_jobs({'y': (int, '3')}, progress=False), {'y': 3})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,10 +17,12 @@ if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
 
 from dslib import get_datasheets_path  # noqa: E402
+from dslib.spec_table import update_spec_table  # noqa: E402
 from dslib.store import parts_db  # noqa: E402
 
 from .housing import normalize as _normalize_housing  # noqa: E402
-from .schema import Bucket, Meta, Part, Range  # noqa: E402
+from .schema import Bucket, Meta, Part, Range, SimilarBatchRequest  # noqa: E402
+from .similarity import SimilarityIndex  # noqa: E402
 
 log = logging.getLogger("mosfet-web")
 
@@ -80,22 +82,21 @@ EXTRAS_SPECS = ("Qgd", "Qgs", "Qgs2", "Qg_th", "Qg_sync", "tRise", "tFall", "trr
 EXTRAS_BASIC = ("Vgs_th_min", "ID_25", "Rds_on_10v_max")
 
 
-def _extras(specs, basic) -> dict:
+def _extras(row: dict) -> dict:
     out: dict = {}
     for k in EXTRAS_SPECS:
-        v = _clean(_safe_attr(specs, k))
+        v = _clean(row.get(k))
         if v is not None:
             out[k] = v
-    if basic is not None:
-        for k in EXTRAS_BASIC:
-            v = _clean(_safe_attr(basic, k))
-            if v is not None:
-                out[k] = v
-        # MosfetBasicSpecs stores Qg in nC, not C — convert to SI for consistency.
-        for src, dst in (("Qg_typ_nC", "Qg_typ"), ("Qg_max_nC", "Qg_max")):
-            v = _clean(_safe_attr(basic, src))
-            if v is not None:
-                out[dst] = v * 1e-9
+    for k in EXTRAS_BASIC:
+        v = _clean(row.get("basic_" + k))
+        if v is not None:
+            out[k] = v
+    # MosfetBasicSpecs stores Qg in nC, not C — convert to SI for consistency.
+    for src, dst in (("Qg_typ_nC", "Qg_typ"), ("Qg_max_nC", "Qg_max")):
+        v = _clean(row.get("basic_" + src))
+        if v is not None:
+            out[dst] = v * 1e-9
     return out
 
 
@@ -113,13 +114,6 @@ def _clean(v: Any) -> Optional[float]:
     return f
 
 
-def _safe_attr(obj: Any, name: str) -> Any:
-    try:
-        return getattr(obj, name)
-    except Exception:
-        return None
-
-
 def _substrate(substrate: Optional[str]) -> str:
     if substrate == "GaN":
         return "GaN"
@@ -130,71 +124,54 @@ def _substrate(substrate: Optional[str]) -> str:
 
 
 
-def _serialize(part) -> dict:
-    specs = part.specs
-    disc = part.discovered
-    basic = getattr(disc, "specs", None) if disc is not None else None
-
-    substrate = getattr(basic, "substrate", None) if basic is not None else None
-    package = getattr(disc, "package", None) if disc is not None else None
-    release = getattr(disc, "release_data", None) if disc is not None else None
-    vgs_th = getattr(basic, "Vgs_th_max", None) if basic is not None else None
-    id_fallback = getattr(basic, "ID_25", None) if basic is not None else None
-
-    id_val = _clean(getattr(specs, "Id", None))
+def _serialize(row: dict) -> dict:
+    """API part from a dslib.spec_table row."""
+    id_val = _clean(row.get("Id"))
     if id_val is None:
-        id_val = _clean(id_fallback)
+        id_val = _clean(row.get("basic_ID_25"))
 
-    vsd_val = _clean(_safe_attr(specs, "Vsd"))
+    vsd_val = _clean(row.get("Vsd"))
     if vsd_val is not None:
         vsd_val = abs(vsd_val)
 
-    date_str = None
-    if release is not None:
-        try:
-            date_str = release.date().isoformat() if hasattr(release, "date") else release.isoformat()
-        except Exception:
-            date_str = str(release)
-
     return {
-        "mfr": part.mfr,
-        "mpn": part.mpn,
-        "substrate": _substrate(substrate),
-        "housing": _normalize_housing(package),
-        "Vds_max": _clean(_safe_attr(specs, "Vds")),
-        "Rds_on_max": _clean(_safe_attr(specs, "Rds_on")),
+        "mfr": row["mfr"],
+        "mpn": row["mpn"],
+        "substrate": _substrate(row.get("substrate")),
+        "housing": _normalize_housing(row.get("package")),
+        "Vds_max": _clean(row.get("Vds")),
+        "Rds_on_max": _clean(row.get("Rds_on")),
         "Id": id_val,
-        "Qsw": _clean(_safe_attr(specs, "Qsw")),
-        "Qg": _clean(_safe_attr(specs, "Qg")),
-        "Qrr": _clean(_safe_attr(specs, "Qrr")),
+        "Qsw": _clean(row.get("Qsw")),
+        "Qg": _clean(row.get("Qg")),
+        "Qrr": _clean(row.get("Qrr")),
         "Vsd": vsd_val,
-        "V_pl": _clean(_safe_attr(specs, "V_pl")),
-        "Vgs_th": _clean(vgs_th),
-        "QgdQgs_ratio": _clean(_safe_attr(specs, "QgdQgsRatio")),
-        "FoM": _clean(_safe_attr(specs, "FoM")),
-        "FoMqsw": _clean(_safe_attr(specs, "FoMqsw")),
-        "FoMqrr": _clean(_safe_attr(specs, "FoMqrr")),
-        "FoMcoss": _clean(_safe_attr(specs, "FoMcoss")),
-        "date": date_str,
-        "extras": _extras(specs, basic),
+        "V_pl": _clean(row.get("V_pl")),
+        "Vgs_th": _clean(row.get("basic_Vgs_th_max")),
+        "QgdQgs_ratio": _clean(row.get("QgdQgsRatio")),
+        "FoM": _clean(row.get("FoM")),
+        "FoMqsw": _clean(row.get("FoMqsw")),
+        "FoMqrr": _clean(row.get("FoMqrr")),
+        "FoMcoss": _clean(row.get("FoMcoss")),
+        "date": row.get("release_date"),
+        "extras": _extras(row),
     }
 
 
 def _load_parts() -> List[dict]:
+    # The columnar spec table only unpickles parts that changed since the last start.
     try:
-        raw = parts_db.load()
+        table = update_spec_table(parts_db)
     except Exception as e:
         log.exception("Failed to load parts_db: %s", e)
         return []
 
     rows: List[dict] = []
-    for part in raw.values():
-        if part is None or part.specs is None:
-            continue
+    for row in table.to_pylist():
         try:
-            rows.append(_serialize(part))
+            rows.append(_serialize(row))
         except Exception as e:
-            log.warning("Skipping part %s/%s: %s", getattr(part, "mfr", "?"), getattr(part, "mpn", "?"), e)
+            log.warning("Skipping part %s/%s: %s", row.get("mfr", "?"), row.get("mpn", "?"), e)
             raise
     return rows
 
@@ -229,48 +206,11 @@ def _build_meta(rows: List[dict]) -> Meta:
     )
 
 
-def _similarity_stats(rows: List[dict]) -> dict:
-    """Per-feature (log_mean, log_std) over positive non-null values."""
-    stats = {}
-    for feat in SIMILARITY_WEIGHTS:
-        logs = [math.log(r[feat]) for r in rows if r.get(feat) is not None and r[feat] > 0]
-        if len(logs) < 2:
-            stats[feat] = (0.0, 1.0)
-            continue
-        mu = sum(logs) / len(logs)
-        var = sum((x - mu) ** 2 for x in logs) / (len(logs) - 1)
-        sigma = math.sqrt(var) if var > 0 else 1.0
-        stats[feat] = (mu, sigma)
-    return stats
-
-
-def _similarity_score(query: dict, candidate: dict, stats: dict) -> Optional[float]:
-    for feat in SIMILARITY_REQUIRED:
-        qv = query.get(feat)
-        cv = candidate.get(feat)
-        if qv is None or cv is None or qv <= 0 or cv <= 0:
-            return None
-    total = 0.0
-    for feat, (w_under, w_over) in SIMILARITY_WEIGHTS.items():
-        qv = query.get(feat)
-        cv = candidate.get(feat)
-        if qv is None or cv is None or qv <= 0 or cv <= 0:
-            continue
-        _, sigma = stats[feat]
-        if sigma <= 0:
-            continue
-        diff = (math.log(cv) - math.log(qv)) / sigma
-        w = w_under if diff < 0 else w_over
-        total += w * diff * diff
-    return total
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     app.state.parts = _load_parts()
     app.state.meta = _build_meta(app.state.parts)
-    app.state.similarity_stats = _similarity_stats(app.state.parts)
-    app.state.part_index = {(p["mfr"], p["mpn"]): p for p in app.state.parts}
+    app.state.similarity = SimilarityIndex(app.state.parts, SIMILARITY_WEIGHTS, SIMILARITY_REQUIRED)
     log.info("Loaded %d parts", len(app.state.parts))
     yield
 
@@ -280,7 +220,7 @@ app = FastAPI(title="MOSFET parametric search", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://127.0.0.1:5173"],
-    allow_methods=["GET"],
+    allow_methods=["GET", "POST"],
     allow_headers=["*"],
 )
 
@@ -323,21 +263,23 @@ def part_image(mfr: str, mpn: str):
     return FileResponse(path, media_type="image/png")
 
 
+def _neighbors(hits: List[tuple]) -> List[dict]:
+    parts = app.state.parts
+    return [{"score": round(s, 4), "part": parts[i]} for i, s in hits]
+
+
 @app.get("/api/similar")
 def similar(mfr: str, mpn: str, limit: int = 20):
-    query = app.state.part_index.get((mfr, mpn))
-    if query is None:
+    hits = app.state.similarity.top_k((mfr, mpn), max(1, limit))
+    if hits is None:
         raise HTTPException(status_code=404, detail="part not found")
+    return _neighbors(hits)
+
 
-    stats = app.state.similarity_stats
-    scored: List[tuple] = []
-    for cand in app.state.parts:
-        if cand["mfr"] == mfr and cand["mpn"] == mpn:
-            continue
-        s = _similarity_score(query, cand, stats)
-        if s is None:
-            continue
-        scored.append((s, cand))
-
-    scored.sort(key=lambda t: t[0])
-    return [{"score": round(s, 4), "part": p} for s, p in scored[: max(1, limit)]]
+@app.post("/api/similar/batch")
+def similar_batch(req: SimilarBatchRequest):
+    """Neighbors of many parts in one request. Unknown parts map to null."""
+    keys = [(q.mfr, q.mpn) for q in req.parts]
+    res = app.state.similarity.top_k_many(keys, max(1, req.limit))
+    return [{"mfr": mfr, "mpn": mpn, "similar": None if hits is None else _neighbors(hits)}
+            for (mfr, mpn), hits in zip(keys, res)]
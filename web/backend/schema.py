@@ -42,3 +42,13 @@ class Meta(BaseModel):
     housings: List[Bucket]
     substrates: List[Bucket]
     ranges: Dict[str, Range]
+
+
+class PartKey(BaseModel):
+    mfr: str
+    mpn: str
+
+
+class SimilarBatchRequest(BaseModel):
+    parts: List[PartKey]
+    limit: int = 20
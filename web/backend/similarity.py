@@ -0,0 +1,89 @@
+"""
+In-memory similarity index over the served part rows.
+
+The log of every feature is computed once into an (n_parts, n_features) matrix, missing or non-positive
+values are NaN. A query scores all candidates at once:
+
+    score = sum over features of w * ((log(candidate) - log(query)) / sigma) ** 2
+
+where w is `w_under` if the candidate is below the query, else `w_over`, and sigma is the feature's std
+of log values over the catalog. Features missing on either side don't contribute. Candidates (or
+queries) missing one of the `required` features are excluded. Top-k uses argpartition.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# queries scored per block in `top_k_many`, bounds the (queries, parts, features) temporary
+_BLOCK = 32
+
+
+class SimilarityIndex:
+    def __init__(self, rows: List[dict], weights: Dict[str, Tuple[float, float]], required: Sequence[str]):
+        """
+        :param rows: part dicts (mfr, mpn, features)
+        :param weights: feature -> (weight_under, weight_over)
+        :param required: features both query and candidate must have
+        """
+        self.features = list(weights)
+        self.keys = [(r["mfr"], r["mpn"]) for r in rows]
+        self.pos = {k: i for i, k in enumerate(self.keys)}
+
+        raw = np.array([[r.get(f) if r.get(f) is not None else np.nan for f in self.features] for r in rows],
+                       dtype=np.float64).reshape(len(rows), len(self.features))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.logs = np.where(raw > 0, np.log(np.where(raw > 0, raw, 1.0)), np.nan)
+        self.valid = ~np.isnan(self.logs)
+
+        # std of log values (ddof=1), 1 for features with too few values or no spread
+        sigma = np.ones(len(self.features))
+        for j in range(len(self.features)):
+            col = self.logs[self.valid[:, j], j]
+            if len(col) >= 2:
+                s = float(np.std(col, ddof=1))
+                sigma[j] = s if s > 0 else 1.0
+        self.sigma = sigma
+
+        self.w_under = np.array([weights[f][0] for f in self.features])
+        self.w_over = np.array([weights[f][1] for f in self.features])
+        req = [self.features.index(f) for f in required]
+        self.eligible = self.valid[:, req].all(axis=1)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _scores(self, qi: np.ndarray) -> np.ndarray:
+        """(len(qi), n_parts) scores, inf for excluded candidates and the query itself."""
+        diff = (self.logs[None, :, :] - self.logs[qi, None, :]) / self.sigma
+        w = np.where(diff < 0, self.w_under, self.w_over)
+        contrib = w * diff * diff
+        scores = np.where(np.isnan(contrib), 0.0, contrib).sum(axis=2)
+        ok = self.eligible[None, :] & self.eligible[qi, None]
+        scores = np.where(ok, scores, np.inf)
+        scores[np.arange(len(qi)), qi] = np.inf
+        return scores
+
+    @staticmethod
+    def _top(scores: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        n_ok = int(np.isfinite(scores).sum())
+        k = min(k, n_ok)
+        if k <= 0:
+            return []
+        idx = np.argpartition(scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        idx = idx[np.argsort(scores[idx], kind="stable")]
+        return [(int(i), float(scores[i])) for i in idx if np.isfinite(scores[i])]
+
+    def top_k(self, key: Tuple[str, str], k: int) -> Optional[List[Tuple[int, float]]]:
+        """[(row index, score)] of the k most similar parts, None if `key` is unknown."""
+        res = self.top_k_many([key], k)
+        return res[0]
+
+    def top_k_many(self, keys: Sequence[Tuple[str, str]], k: int) -> List[Optional[List[Tuple[int, float]]]]:
+        out: List[Optional[List[Tuple[int, float]]]] = [None] * len(keys)
+        known = [(n, self.pos[key]) for n, key in enumerate(keys) if key in self.pos]
+        for b in range(0, len(known), _BLOCK):
+            block = known[b:b + _BLOCK]
+            scores = self._scores(np.array([i for _, i in block], dtype=np.intp))
+            for (n, _), row in zip(block, scores):
+                out[n] = self._top(row, k)
+        return out